@@ -4,7 +4,7 @@ import setuptools
 import sys
 
 
-requirements = ['psutil', 'distro']
+requirements = ['psutil']
 if sys.version_info[:2] < (2, 7):
     requirements.append('argparse')
 
@@ -0,0 +1,303 @@
+"""
+Collector service that nodes push their results to
+
+Nodes run ae-profile --upload http://collector:8080/results and the collector
+stores every run in the same SQLite store that --store writes to. Uploads are
+read concurrently and queued, a single writer stores the queue in batches
+with one transaction per batch, and each upload is answered once its batch
+is committed. GET /summary gives the results of the latest run of every host.
+
+    ae-profile collect --store cluster.db --port 8080
+
+The collector needs Python 3.5 or later, it is only imported for the collect
+subcommand.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from system_profile import store
+
+
+import argparse
+import asyncio
+import json
+import zlib
+
+
+BATCH_SIZE = 200
+FLUSH_INTERVAL = 0.5
+MAX_BODY = 16 * 1024 ** 2
+REQUIRED_FIELDS = ['host', 'timestamp', 'results', 'verdicts', 'overall']
+
+REASONS = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    413: 'Payload Too Large',
+    500: 'Internal Server Error'
+}
+
+
+class RequestError(Exception):
+    def __init__(self, status, message):
+        Exception.__init__(self, message)
+        self.status = status
+
+
+def decode_upload(body, encoding):
+    """
+    Decode an uploaded body into a run for store.record_runs
+    """
+    try:
+        if encoding == 'gzip':
+            # Bounded so a small body can not expand without limit
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            body = decompressor.decompress(body, MAX_BODY)
+            if decompressor.unconsumed_tail:
+                raise RequestError(413, 'Results are too large')
+        elif encoding not in (None, 'identity'):
+            raise RequestError(400, 'Unsupported encoding ' + encoding)
+
+        payload = json.loads(body.decode('utf-8'))
+    except (zlib.error, ValueError):
+        raise RequestError(400, 'Results are not valid JSON')
+
+    if not isinstance(payload, dict):
+        raise RequestError(400, 'Results are not a JSON object')
+
+    missing = [field for field in REQUIRED_FIELDS if field not in payload]
+    if missing:
+        raise RequestError(400, 'Missing ' + ', '.join(missing))
+
+    try:
+        timestamp = float(payload['timestamp'])
+    except (TypeError, ValueError):
+        raise RequestError(400, 'Timestamp is not a number')
+
+    return (
+        str(payload['host']),
+        timestamp,
+        payload['results'],
+        payload['verdicts'],
+        payload['overall']
+    )
+
+
+class Collector(object):
+    def __init__(
+        self,
+        store_path,
+        batch_size=BATCH_SIZE,
+        flush_interval=FLUSH_INTERVAL
+    ):
+        self.store_path = store_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = None
+        self.server = None
+        self.writer_task = None
+        # SQLite connections stay on the thread that opened them
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.conn = None
+
+    def _store(self, runs):
+        if self.conn is None:
+            self.conn = store.connect(self.store_path)
+
+        return store.record_runs(self.conn, runs)
+
+    def _summary(self):
+        if self.conn is None:
+            self.conn = store.connect(self.store_path)
+
+        return store.cluster_summary(self.conn)
+
+    def _close_store(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    async def start(self, host, port):
+        self.queue = asyncio.Queue()
+        self.writer_task = asyncio.ensure_future(self.write_batches())
+        self.server = await asyncio.start_server(self.handle, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+        await self.queue.join()
+        self.writer_task.cancel()
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(self.executor, self._close_store)
+        self.executor.shutdown()
+
+    async def write_batches(self):
+        """
+        Take everything queued within the flush interval, up to the batch
+        size, and store it in one transaction
+        """
+        loop = asyncio.get_event_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+
+                try:
+                    batch.append(
+                        await asyncio.wait_for(self.queue.get(), timeout)
+                    )
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                run_ids = await loop.run_in_executor(
+                    self.executor,
+                    self._store,
+                    [run for run, _ in batch]
+                )
+            except Exception as error:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
+            else:
+                for run_id, (_, future) in zip(run_ids, batch):
+                    if not future.done():
+                        future.set_result(run_id)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def ingest(self, run):
+        future = asyncio.get_event_loop().create_future()
+        await self.queue.put((run, future))
+        return await future
+
+    async def route(self, method, path, headers, body):
+        if path == '/results':
+            if method != 'POST':
+                raise RequestError(405, 'Results are uploaded with POST')
+
+            run = decode_upload(body, headers.get('content-encoding'))
+            run_id = await self.ingest(run)
+            return {'run_id': run_id}
+
+        if path == '/summary':
+            if method != 'GET':
+                raise RequestError(405, 'The summary is read with GET')
+
+            return await asyncio.get_event_loop().run_in_executor(
+                self.executor,
+                self._summary
+            )
+
+        raise RequestError(404, 'No such path ' + path)
+
+    async def handle(self, reader, writer):
+        """
+        One request per connection, the body is read in full before the
+        request is routed
+        """
+        try:
+            try:
+                request_line = await reader.readline()
+                method, path, _ = request_line.decode('latin-1').split(' ', 2)
+                headers = {}
+                while True:
+                    line = (await reader.readline()).decode('latin-1')
+                    if line in ('\r\n', '\n', ''):
+                        break
+
+                    name, _, value = line.partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get('content-length', 0))
+                if length > MAX_BODY:
+                    raise RequestError(413, 'Results are too large')
+
+                body = await reader.readexactly(length) if length else b''
+                status = 200
+                response = await self.route(
+                    method,
+                    path.split('?', 1)[0],
+                    headers,
+                    body
+                )
+            except RequestError as error:
+                status = error.status
+                response = {'error': str(error)}
+            except (ValueError, asyncio.IncompleteReadError):
+                status = 400
+                response = {'error': 'Malformed request'}
+            except Exception as error:
+                status = 500
+                response = {'error': str(error)}
+
+            content = json.dumps(response, sort_keys=True).encode('utf-8')
+            writer.write(
+                (
+                    'HTTP/1.1 {0} {1}\r\n'
+                    'Content-Type: application/json\r\n'
+                    'Content-Length: {2}\r\n'
+                    'Connection: close\r\n\r\n'
+                ).format(status, REASONS[status], len(content)).encode(
+                    'latin-1'
+                ) + content
+            )
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+def handle_collect_arguments(argv):
+    parser = argparse.ArgumentParser(
+        prog='ae-profile collect',
+        description='Collect the results that nodes upload with --upload'
+    )
+    parser.add_argument(
+        '--store',
+        required=True,
+        help='Path to the SQLite store the results are written to'
+    )
+    parser.add_argument(
+        '--host',
+        required=False,
+        default='0.0.0.0',
+        help='Address to listen on'
+    )
+    parser.add_argument(
+        '--port',
+        required=False,
+        type=int,
+        default=8080,
+        help='Port to listen on'
+    )
+    parser.add_argument(
+        '--batch-size',
+        required=False,
+        type=int,
+        default=BATCH_SIZE,
+        help='Most uploads stored in one transaction'
+    )
+    return parser.parse_args(argv)
+
+
+def collect_main(argv):
+    args = handle_collect_arguments(argv)
+    collector = Collector(args.store, args.batch_size)
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    port = loop.run_until_complete(collector.start(args.host, args.port))
+    print('Collecting results on {0}:{1}'.format(args.host, port))
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        loop.run_until_complete(collector.stop())
+        loop.close()
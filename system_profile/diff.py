@@ -0,0 +1,223 @@
+"""
+Structural diff between two preflight runs
+
+Runs are compared section by section. The content hash of each section is
+compared first and only the sections whose hashes differ are loaded and walked,
+so comparing two identical nodes costs a handful of hash comparisons.
+"""
+
+from system_profile import model
+from system_profile import store
+
+
+import argparse
+import json
+import os
+
+
+def section_hashes(system_info):
+    return dict(
+        (name, model.section_hash(data))
+        for name, data in system_info.items()
+    )
+
+
+def changed_sections(old_hashes, new_hashes):
+    """
+    Names of the sections that were added, removed or whose content changed
+    """
+    names = set(old_hashes.keys()) | set(new_hashes.keys())
+    return sorted(
+        name for name in names
+        if old_hashes.get(name) != new_hashes.get(name)
+    )
+
+
+def diff_values(old, new, path=''):
+    """
+    Walk two values in the dict layout and list what changed. Lists are
+    compared by membership, i.e. a module that moved from missing to enabled
+    """
+    changes = []
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key in sorted(set(old.keys()) | set(new.keys())):
+            key_path = key if not path else '{0}.{1}'.format(path, key)
+            if key not in old:
+                changes.append(
+                    {'path': key_path, 'change': 'added', 'new': new[key]}
+                )
+            elif key not in new:
+                changes.append(
+                    {'path': key_path, 'change': 'removed', 'old': old[key]}
+                )
+            else:
+                changes.extend(diff_values(old[key], new[key], key_path))
+    elif isinstance(old, list) and isinstance(new, list):
+        for item in old:
+            if item not in new:
+                changes.append(
+                    {'path': path, 'change': 'removed', 'old': item}
+                )
+
+        for item in new:
+            if item not in old:
+                changes.append(
+                    {'path': path, 'change': 'added', 'new': item}
+                )
+    elif old != new:
+        changes.append(
+            {'path': path, 'change': 'changed', 'old': old, 'new': new}
+        )
+
+    return changes
+
+
+def diff_results(old, new, names=None):
+    """
+    Diff two results in the dict layout. Only the named sections are walked,
+    by default the sections whose content hashes differ
+    """
+    if names is None:
+        names = changed_sections(section_hashes(old), section_hashes(new))
+
+    sections = {}
+    for name in names:
+        if name not in old:
+            changes = [{'path': '', 'change': 'added', 'new': new[name]}]
+        elif name not in new:
+            changes = [{'path': '', 'change': 'removed', 'old': old[name]}]
+        else:
+            changes = diff_values(old[name], new[name])
+
+        if changes:
+            sections[name] = changes
+
+    return sections
+
+
+def diff_stored_runs(conn, old_run, new_run):
+    """
+    Diff two runs in the results store, loading only the changed sections
+    """
+    names = changed_sections(
+        store.section_hashes(conn, old_run),
+        store.section_hashes(conn, new_run)
+    )
+    return diff_results(
+        store.load_sections(conn, old_run, names),
+        store.load_sections(conn, new_run, names),
+        names
+    )
+
+
+def format_diff(sections, old_label, new_label):
+    """
+    Compact human readable layout of the changes
+    """
+    lines = ['--- {0}'.format(old_label), '+++ {0}'.format(new_label)]
+    if not sections:
+        lines.append('No changes')
+
+    for name in sorted(sections.keys()):
+        lines.append(name)
+        for change in sections[name]:
+            path = change['path'] or name
+            if change['change'] == 'added':
+                lines.append('  + {0}: {1}'.format(path, change['new']))
+            elif change['change'] == 'removed':
+                lines.append('  - {0}: {1}'.format(path, change['old']))
+            else:
+                lines.append(
+                    '  ~ {0}: {1} -> {2}'.format(
+                        path,
+                        change['old'],
+                        change['new']
+                    )
+                )
+
+    return '\n'.join(lines)
+
+
+def _resolve_stored(conn, value):
+    if value.isdigit():
+        return int(value)
+
+    run_id = store.latest_run(conn, value)
+    if run_id is None:
+        raise SystemExit('No stored runs found for {0}'.format(value))
+
+    return run_id
+
+
+def handle_diff_arguments(argv):
+    parser = argparse.ArgumentParser(
+        prog='ae-profile diff',
+        description=(
+            'Compare two preflight runs. Without --store A and B are JSON '
+            'results written with --output-json, with --store they are run '
+            'ids or host names for the latest run of the host'
+        )
+    )
+    parser.add_argument('old', help='Earlier run')
+    parser.add_argument('new', help='Later run')
+    parser.add_argument(
+        '--store',
+        required=False,
+        help='Path to the SQLite results store'
+    )
+    parser.add_argument(
+        '--json',
+        required=False,
+        action='store_true',
+        help='Print the changes as JSON'
+    )
+    return parser.parse_args(argv)
+
+
+def diff_main(argv):
+    args = handle_diff_arguments(argv)
+    if args.store:
+        conn = store.connect(args.store)
+        try:
+            old_run = _resolve_stored(conn, args.old)
+            new_run = _resolve_stored(conn, args.new)
+            sections = diff_stored_runs(conn, old_run, new_run)
+            labels = []
+            for run_id in [old_run, new_run]:
+                host, timestamp = conn.execute(
+                    'SELECT host, timestamp FROM runs WHERE id = ?',
+                    (run_id,)
+                ).fetchone()
+                labels.append(
+                    '{0} run {1} ({2})'.format(
+                        host,
+                        run_id,
+                        store.format_timestamp(timestamp)
+                    )
+                )
+        finally:
+            conn.close()
+    else:
+        results = []
+        for path in [args.old, args.new]:
+            if not os.path.isfile(path):
+                raise SystemExit('Results file {0} not found'.format(path))
+
+            with open(path) as f:
+                results.append(json.load(f))
+
+        sections = diff_results(results[0], results[1])
+        labels = [args.old, args.new]
+
+    if args.json:
+        print(
+            json.dumps(
+                {'old': labels[0], 'new': labels[1], 'sections': sections},
+                sort_keys=True,
+                indent=2
+            )
+        )
+    else:
+        print(format_diff(sections, labels[0], labels[1]))
+
+    return sections
@@ -0,0 +1,251 @@
+"""
+Measure name resolution latency against the configured nameservers
+
+A lookup of a name with fewer dots than ndots is tried with every search
+domain appended before the name itself is tried, so a single lookup can turn
+into many queries. The probe sends the same expanded set of queries that the
+resolver would send, to every nameserver at once, with a minimal UDP client
+and records how long each answer took.
+"""
+
+from system_profile import stats
+
+
+import random
+import socket
+import select
+import struct
+import time
+
+
+DNS_PORT = 53
+TYPE_A = 1
+CLASS_IN = 1
+
+HEADER = struct.Struct('!HHHHHH')
+FLAG_RESPONSE = 0x8000
+FLAG_RECURSION_DESIRED = 0x0100
+RCODE_MASK = 0x000f
+RCODES = {
+    0: 'NOERROR',
+    1: 'FORMERR',
+    2: 'SERVFAIL',
+    3: 'NXDOMAIN',
+    4: 'NOTIMP',
+    5: 'REFUSED'
+}
+# An NXDOMAIN is a valid answer for names that only exist with a suffix
+ANSWERED = ['NOERROR', 'NXDOMAIN']
+
+PERCENTILES = [50, 90, 99]
+
+
+def expand_name(name, search_domains, ndots):
+    """
+    Names in the order the resolver tries them until one resolves. Names
+    ending in a dot are never expanded
+    """
+    if name.endswith('.'):
+        return [name.rstrip('.')]
+
+    searched = [
+        '{0}.{1}'.format(name, domain.rstrip('.'))
+        for domain in search_domains
+    ]
+    if name.count('.') >= ndots:
+        return [name] + searched
+
+    return searched + [name]
+
+
+def build_query(query_id, name, query_type=TYPE_A):
+    question = b''
+    for label in name.split('.'):
+        if label:
+            encoded = label.encode('idna')
+            question += struct.pack('!B', len(encoded)) + encoded
+
+    question += b'\0' + struct.pack('!HH', query_type, CLASS_IN)
+    return HEADER.pack(
+        query_id,
+        FLAG_RECURSION_DESIRED,
+        1,
+        0,
+        0,
+        0
+    ) + question
+
+
+def parse_response(data):
+    """
+    Return (query id, rcode name) of a response, or None when the datagram is
+    not a DNS response
+    """
+    if len(data) < HEADER.size:
+        return None
+
+    query_id, flags = HEADER.unpack_from(data)[:2]
+    if not flags & FLAG_RESPONSE:
+        return None
+
+    rcode = flags & RCODE_MASK
+    return query_id, RCODES.get(rcode, 'RCODE{0}'.format(rcode))
+
+
+def summarize(latencies, sent, errors):
+    latencies = sorted(latencies)
+    summary = {
+        'sent': sent,
+        'answered': len(latencies),
+        'timeouts': sent - len(latencies) - sum(errors.values()),
+        'errors': errors
+    }
+    for percent in PERCENTILES:
+        value = stats.percentile(latencies, percent)
+        summary['p{0}_ms'.format(percent)] = (
+            None if value is None else round(value * 1000, 2)
+        )
+
+    summary['max_ms'] = (
+        round(latencies[-1] * 1000, 2) if latencies else None
+    )
+    return summary
+
+
+def _open_socket(server, port):
+    family, socktype, proto, _, address = socket.getaddrinfo(
+        server,
+        port,
+        0,
+        socket.SOCK_DGRAM
+    )[0]
+    sock = socket.socket(family, socktype, proto)
+    sock.setblocking(False)
+    sock.connect(address)
+    return sock
+
+
+def probe_round(servers, names, timeout, port=DNS_PORT):
+    """
+    Send every name to every server at once and wait up to timeout seconds
+    for the answers. Returns per server lists of latencies in seconds and
+    counts of error responses
+    """
+    sockets = {}
+    pending = {}
+    results = {}
+    try:
+        for server in servers:
+            results[server] = {'latencies': [], 'errors': {}, 'sent': 0}
+            try:
+                sock = _open_socket(server, port)
+            except (socket.error, socket.gaierror):
+                results[server]['sent'] = len(names)
+                continue
+
+            sockets[sock] = server
+            pending[sock] = {}
+            query_id = random.randint(0, 0xffff - len(names))
+            for name in names:
+                query_id += 1
+                try:
+                    sock.send(build_query(query_id, name))
+                except socket.error:
+                    pass
+
+                # Unsent queries count as timeouts
+                pending[sock][query_id] = time.time()
+                results[server]['sent'] += 1
+
+        end = time.time() + timeout
+        while any(pending.values()):
+            remaining = end - time.time()
+            if remaining <= 0:
+                break
+
+            waiting = [sock for sock in pending if pending[sock]]
+            readable = select.select(waiting, [], [], remaining)[0]
+            for sock in readable:
+                received = time.time()
+                try:
+                    response = parse_response(sock.recv(4096))
+                except socket.error:
+                    # ICMP port unreachable, nothing else will arrive
+                    pending[sock] = {}
+                    continue
+
+                if response is None or response[0] not in pending[sock]:
+                    continue
+
+                query_id, rcode = response
+                server_results = results[sockets[sock]]
+                sent = pending[sock].pop(query_id)
+                if rcode in ANSWERED:
+                    server_results['latencies'].append(received - sent)
+                else:
+                    server_results['errors'][rcode] = (
+                        server_results['errors'].get(rcode, 0) + 1
+                    )
+    finally:
+        for sock in sockets:
+            sock.close()
+
+    return results
+
+
+def probe_nameservers(
+    servers,
+    names,
+    search_domains,
+    ndots,
+    timeout,
+    rounds,
+    verbose,
+    port=DNS_PORT
+):
+    """
+    Resolve each name the way the resolver would, expanded with the search
+    domains, against all servers for a number of rounds
+    """
+    if verbose:
+        print('Probing nameservers {0}'.format(', '.join(servers)))
+
+    lookups = {}
+    queries = []
+    for name in names:
+        expanded = expand_name(name, search_domains, ndots)
+        lookups[name] = {
+            'expanded': expanded,
+            'queries': len(expanded)
+        }
+        queries.extend(expanded)
+
+    totals = dict(
+        (server, {'latencies': [], 'errors': {}, 'sent': 0})
+        for server in servers
+    )
+    for _ in range(rounds):
+        for server, result in probe_round(
+            servers,
+            queries,
+            timeout,
+            port
+        ).items():
+            totals[server]['latencies'].extend(result['latencies'])
+            totals[server]['sent'] += result['sent']
+            for rcode, count in result['errors'].items():
+                totals[server]['errors'][rcode] = (
+                    totals[server]['errors'].get(rcode, 0) + count
+                )
+
+    return {
+        'rounds': rounds,
+        'lookups': lookups,
+        'servers': dict(
+            (
+                server,
+                summarize(total['latencies'], total['sent'], total['errors'])
+            )
+            for server, total in totals.items()
+        )
+    }
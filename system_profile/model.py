@@ -0,0 +1,591 @@
+"""
+Compact typed model of the results gathered for a host
+
+Each section of system_info is held in a record class that uses __slots__
+instead of a dict, lists are stored as tuples and repeated values such as
+verdicts and port states are interned. Records convert to and from the plain
+dict layout that the gather functions return, so nothing is lost going
+through the model.
+"""
+
+
+import hashlib
+import json
+
+
+try:
+    from sys import intern
+except ImportError:
+    # Python 2 has intern as a builtin
+    pass
+
+
+PASS = intern('PASS')
+WARN = intern('WARN')
+FAIL = intern('FAIL')
+SKIPPED = intern('SKIPPED')
+
+
+def section_hash(data):
+    """
+    Content hash of a section in the dict layout. Equal sections always give
+    the same hash, so unchanged sections can be skipped when comparing runs
+    """
+    if isinstance(data, Record):
+        data = data.to_dict()
+
+    content = json.dumps(data, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+
+def _intern(value):
+    if type(value) is str:
+        return intern(value)
+
+    return value
+
+
+def _load_value(value):
+    if isinstance(value, list):
+        return tuple(_intern(item) for item in value)
+
+    return _intern(value)
+
+
+def _dump_value(value):
+    if isinstance(value, tuple):
+        return list(value)
+
+    return value
+
+
+class Record(object):
+    """
+    Base for the section records. Subclasses list their attributes in
+    __slots__ and describe anything that is not a plain value:
+
+    keys maps an attribute to its key in the dict layout when they differ,
+    nested maps an attribute to the Record class of a nested dict,
+    keyed maps an attribute to the Record class for a dict of named entries
+    which are held as a tuple of records.
+
+    Attributes that were not in the dict layout are left unset, so a record
+    converts back to exactly the dict it was created from.
+    """
+    __slots__ = ()
+    keys = {}
+    nested = {}
+    keyed = {}
+
+    def __init__(self, **values):
+        for name, value in values.items():
+            setattr(self, name, value)
+
+    @classmethod
+    def _attribute(cls, key):
+        for name, mapped_key in cls.keys.items():
+            if mapped_key == key:
+                return name
+
+        return key
+
+    @classmethod
+    def load(cls, name, value):
+        """
+        Convert a value from the dict layout for the given attribute
+        """
+        if value is None:
+            return None
+
+        if name in cls.nested:
+            return cls.nested[name].from_dict(value)
+
+        if name in cls.keyed:
+            record_class = cls.keyed[name]
+            return tuple(
+                record_class.from_item(key, item)
+                for key, item in value.items()
+            )
+
+        return _load_value(value)
+
+    @classmethod
+    def dump(cls, name, value):
+        """
+        Convert an attribute value back to the dict layout
+        """
+        if value is None:
+            return None
+
+        if name in cls.nested:
+            return value.to_dict()
+
+        if name in cls.keyed:
+            return dict(record.to_item() for record in value)
+
+        return _dump_value(value)
+
+    @classmethod
+    def from_dict(cls, data):
+        record = cls()
+        for name in cls.__slots__:
+            key = cls.keys.get(name, name)
+            if key in data:
+                setattr(record, name, cls.load(name, data[key]))
+
+        return record
+
+    def to_dict(self):
+        data = {}
+        for name in self.__slots__:
+            if hasattr(self, name):
+                data[self.keys.get(name, name)] = self.dump(
+                    name,
+                    getattr(self, name)
+                )
+
+        return data
+
+    def get(self, key, default=None):
+        """
+        Dict style access using the key names of the dict layout
+        """
+        return getattr(self, self._attribute(key), default)
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, self._attribute(key))
+        except AttributeError:
+            raise KeyError(key)
+
+    def __eq__(self, other):
+        if type(self) is not type(other):
+            return False
+
+        return self.to_dict() == other.to_dict()
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __repr__(self):
+        return '{0}({1})'.format(
+            type(self).__name__,
+            ', '.join(
+                '{0}={1!r}'.format(name, getattr(self, name))
+                for name in self.__slots__
+                if hasattr(self, name)
+            )
+        )
+
+
+class KeyedRecord(Record):
+    """
+    Record for one entry of a dict keyed by name, i.e. a mount point
+    """
+    __slots__ = ()
+    key = None
+
+    @classmethod
+    def from_item(cls, key, data):
+        record = cls.from_dict(data)
+        setattr(record, cls.key, _intern(key))
+        return record
+
+    def to_item(self):
+        data = self.to_dict()
+        del data[self.key]
+        return getattr(self, self.key), data
+
+
+class OSProfile(Record):
+    __slots__ = ('distribution', 'version', 'dist_name', 'based_on')
+
+
+class Compatability(Record):
+    __slots__ = ('os', 'version')
+    keys = {'os': 'OS'}
+
+
+class Requirement(Record):
+    __slots__ = ('minimum', 'maximum', 'actual', 'workers')
+
+
+class Resources(Record):
+    __slots__ = ('memory', 'cpu_cores')
+    nested = {'memory': Requirement, 'cpu_cores': Requirement}
+
+
+class Usage(Record):
+    __slots__ = ('used', 'limit', 'headroom', 'recommended')
+
+
+class SystemdLimit(Record):
+    __slots__ = ('soft', 'hard')
+
+
+class Capacity(Record):
+    """
+    limits holds the nofile and nproc lines from limits.conf as dicts
+    """
+    __slots__ = (
+        'file_handles',
+        'processes',
+        'threads',
+        'systemd_nofile',
+        'limits',
+        'recommended'
+    )
+    nested = {
+        'file_handles': Usage,
+        'processes': Usage,
+        'threads': Usage,
+        'systemd_nofile': SystemdLimit
+    }
+
+
+class Pressure(Record):
+    """
+    stall holds the some and full percentages per resource, reclaim the
+    rates per counter and oom_kills the counts, all as small dicts
+    """
+    __slots__ = ('window', 'stall', 'reclaim', 'oom_kills')
+
+
+class CpuSteal(Record):
+    """
+    aggregate and throttling are small dicts, cores holds a list of per CPU
+    percentages for each field with None for offline CPUs
+    """
+    __slots__ = ('window', 'cpus', 'aggregate', 'cores', 'throttling')
+
+
+class NicInterface(KeyedRecord):
+    """
+    rates and since_boot hold the error and drop counters as dicts
+    """
+    __slots__ = (
+        'interface',
+        'speed_mbps',
+        'rx_mbps',
+        'tx_mbps',
+        'utilization',
+        'rates',
+        'since_boot'
+    )
+    key = 'interface'
+
+
+class Nic(Record):
+    __slots__ = ('window', 'interfaces')
+    keyed = {'interfaces': NicInterface}
+
+
+class MemoryPerformance(Record):
+    __slots__ = (
+        'buffer_size',
+        'copy_bandwidth',
+        'all_core_bandwidth',
+        'latency'
+    )
+    nested = {
+        'copy_bandwidth': Requirement,
+        'all_core_bandwidth': Requirement,
+        'latency': Requirement
+    }
+
+
+class TransparentHugepage(Record):
+    __slots__ = ('enabled', 'defrag')
+
+
+class Fragmentation(Record):
+    __slots__ = ('free_pages', 'high_order_percent')
+
+
+class PerformanceMode(Record):
+    """
+    Hugepage pools, governors and pstate are small dicts kept as they are
+    """
+    __slots__ = (
+        'transparent_hugepage',
+        'hugepages',
+        'fragmentation',
+        'governors',
+        'pstate'
+    )
+    nested = {
+        'transparent_hugepage': TransparentHugepage,
+        'fragmentation': Fragmentation
+    }
+
+
+class Mount(KeyedRecord):
+    __slots__ = (
+        'mountpoint',
+        'recommended',
+        'free',
+        'total',
+        'mount_options',
+        'file_system',
+        'ftype',
+        'inodes_total',
+        'inodes_free',
+        'files_per_gb',
+        'bytes_per_inode',
+        'recommended_inodes'
+    )
+    key = 'mountpoint'
+
+
+class OverlayCopyUp(Record):
+    __slots__ = ('files', 'size', 'p50_ms', 'p99_ms', 'max_ms')
+
+
+class OverlaySmallFiles(Record):
+    __slots__ = ('files', 'size', 'create_per_second', 'read_per_second')
+
+
+class Overlay(Record):
+    """
+    mounted is None when the probe could not try to mount an overlay
+    """
+    __slots__ = (
+        'directory',
+        'd_type',
+        'mounted',
+        'error',
+        'copy_up',
+        'small_files'
+    )
+    nested = {'copy_up': OverlayCopyUp, 'small_files': OverlaySmallFiles}
+
+
+class InterfacePorts(KeyedRecord):
+    """
+    Port states for an interface, held as a tuple of (port, state) pairs
+    """
+    __slots__ = ('interface', 'ports')
+    key = 'interface'
+
+    @classmethod
+    def from_item(cls, key, data):
+        return cls(
+            interface=_intern(key),
+            ports=tuple(
+                (_intern(port), _intern(state))
+                for port, state in data.items()
+            )
+        )
+
+    def to_item(self):
+        return self.interface, dict(self.ports)
+
+
+class PortRange(KeyedRecord):
+    __slots__ = ('ports', 'services', 'listeners')
+    key = 'ports'
+
+
+class PortPlan(Record):
+    """
+    planned holds the number of planned ports of each protocol as a dict
+    """
+    __slots__ = (
+        'planned',
+        'ephemeral',
+        'reserved',
+        'conflicts',
+        'ephemeral_overlap',
+        'recommended_reserved'
+    )
+    keyed = {'conflicts': PortRange, 'ephemeral_overlap': PortRange}
+
+
+class Selinux(Record):
+    __slots__ = ('getenforce', 'config')
+
+
+class Resolv(Record):
+    __slots__ = (
+        'search_domains',
+        'options',
+        'nameservers',
+        'resolver'
+    )
+
+
+class DnsLookup(KeyedRecord):
+    __slots__ = ('name', 'expanded', 'queries')
+    key = 'name'
+
+
+class DnsServer(KeyedRecord):
+    """
+    errors holds the count of each error response code as a dict
+    """
+    __slots__ = (
+        'server',
+        'sent',
+        'answered',
+        'timeouts',
+        'errors',
+        'p50_ms',
+        'p90_ms',
+        'p99_ms',
+        'max_ms'
+    )
+    key = 'server'
+
+
+class Dns(Record):
+    __slots__ = ('rounds', 'lookups', 'servers')
+    keyed = {'lookups': DnsLookup, 'servers': DnsServer}
+
+
+class Conntrack(Record):
+    """
+    stats holds the summed drop counters as a dict
+    """
+    __slots__ = (
+        'count',
+        'max',
+        'utilization',
+        'buckets',
+        'recommended_max',
+        'recommended_buckets',
+        'stats'
+    )
+
+
+class AgentWindow(Record):
+    __slots__ = ('seconds', 'method', 'seen')
+
+
+class Agents(Record):
+    __slots__ = ('running', 'window')
+    nested = {'window': AgentWindow}
+
+
+class Modules(Record):
+    __slots__ = ('missing', 'enabled')
+
+
+class SysctlSetting(KeyedRecord):
+    __slots__ = (
+        'setting',
+        'subsystem',
+        'rule',
+        'minimum',
+        'maximum',
+        'actual',
+        'result'
+    )
+    key = 'setting'
+
+
+class Sysctl(Record):
+    __slots__ = ('enabled', 'disabled', 'tuning')
+    keyed = {'tuning': SysctlSetting}
+
+
+class HostResult(Record):
+    """
+    All of the sections gathered for a host. Sections that the model does not
+    know about, such as the ones from check plugins, are kept as they are in
+    extras
+    """
+    __slots__ = (
+        'profile',
+        'compatability',
+        'resources',
+        'capacity',
+        'pressure',
+        'cpu_steal',
+        'nic',
+        'memory_performance',
+        'performance_mode',
+        'mounts',
+        'overlay',
+        'selinux',
+        'resolv',
+        'dns',
+        'ports',
+        'port_plan',
+        'conntrack',
+        'agents',
+        'modules',
+        'infinity_set',
+        'sysctl',
+        'extras'
+    )
+    nested = {
+        'profile': OSProfile,
+        'compatability': Compatability,
+        'resources': Resources,
+        'capacity': Capacity,
+        'pressure': Pressure,
+        'cpu_steal': CpuSteal,
+        'nic': Nic,
+        'memory_performance': MemoryPerformance,
+        'performance_mode': PerformanceMode,
+        'overlay': Overlay,
+        'selinux': Selinux,
+        'resolv': Resolv,
+        'dns': Dns,
+        'port_plan': PortPlan,
+        'conntrack': Conntrack,
+        'agents': Agents,
+        'modules': Modules,
+        'sysctl': Sysctl
+    }
+    keyed = {'mounts': Mount, 'ports': InterfacePorts}
+
+    def __init__(self, **values):
+        self.extras = {}
+        Record.__init__(self, **values)
+
+    @classmethod
+    def from_dict(cls, data):
+        record = cls()
+        for key, value in data.items():
+            record[key] = value
+
+        return record
+
+    def to_dict(self):
+        data = dict(self.extras)
+        for name in self.__slots__:
+            if name != 'extras' and hasattr(self, name):
+                data[name] = self.dump(name, getattr(self, name))
+
+        return data
+
+    def get(self, key, default=None):
+        if key in self.extras:
+            return self.extras[key]
+
+        if key == 'extras':
+            return default
+
+        return getattr(self, key, default)
+
+    def __getitem__(self, key):
+        if key in self.extras:
+            return self.extras[key]
+
+        if key != 'extras' and hasattr(self, key):
+            return getattr(self, key)
+
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in self.__slots__ and key != 'extras':
+            setattr(self, key, self.load(key, value))
+        else:
+            self.extras[key] = value
+
+    def __contains__(self, key):
+        if key in self.extras:
+            return True
+
+        return key != 'extras' and hasattr(self, key)
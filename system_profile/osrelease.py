@@ -0,0 +1,198 @@
+"""
+Operating system release information
+
+/etc/os-release is parsed with the shell style quoting it is defined with
+and the distribution release files such as /etc/centos-release are used for
+the full version, since os-release often only has the major version. The
+family a distribution belongs to is taken from ID and then ID_LIKE, so
+derivatives are classified the same way as the distribution they are based
+on. Each root is only parsed once per run.
+"""
+
+from system_profile import scanner
+
+
+import glob
+import os
+import re
+
+
+OS_RELEASE_FILES = ['etc/os-release', 'usr/lib/os-release']
+# Files in /etc that match *-release but do not describe the distribution
+IGNORED_RELEASE_FILES = [
+    'lsb-release',
+    'oem-release',
+    'os-release',
+    'system-release',
+    'plesk-release',
+    'iredmail-release'
+]
+# IDs that are spelt differently in the release file names
+NORMALIZED_IDS = {'redhat': 'rhel', 'suse': 'sles'}
+FAMILIES = {
+    'rhel': [
+        'rhel',
+        'centos',
+        'fedora',
+        'rocky',
+        'almalinux',
+        'ol',
+        'scientific',
+        'amzn'
+    ],
+    'debian': ['debian', 'ubuntu'],
+    'suse': ['suse', 'sles', 'sled', 'opensuse']
+}
+# Release files left by older distributions without an os-release
+FAMILY_FILES = [
+    ('etc/redhat-release', 'rhel'),
+    ('etc/debian_version', 'debian'),
+    ('etc/SuSE-release', 'suse')
+]
+
+RELEASE_FILE_PATTERN = re.compile(
+    r'^(?P<name>.+?)\s+(?:release\s+)?(?P<version_id>\d[\d.]*)'
+    r'(?:\s*\((?P<codename>[^)]*)\))?'
+)
+SHELL_ESCAPE = re.compile(r'\\(.)')
+
+_release_cache = {}
+
+
+def unquote(value):
+    """
+    Values may be double quoted with backslash escapes or single quoted
+    """
+    if len(value) > 1 and value[0] == value[-1] == '"':
+        return SHELL_ESCAPE.sub(r'\1', value[1:-1])
+
+    if len(value) > 1 and value[0] == value[-1] == "'":
+        return value[1:-1]
+
+    return value
+
+
+def parse_os_release(content):
+    """
+    Keys of os-release in lower case, i.e. id, id_like and version_id
+    """
+    info = {}
+    for line in content.splitlines():
+        line = line.strip()
+        if not line or line.startswith('#') or '=' not in line:
+            continue
+
+        key, value = line.split('=', 1)
+        info[key.strip().lower()] = unquote(value.strip())
+
+    return info
+
+
+def parse_release_file(content):
+    """
+    Name, version and codename from the first line of a release file such as
+    'CentOS Linux release 7.5.1804 (Core)'
+    """
+    lines = content.strip().splitlines()
+    found = RELEASE_FILE_PATTERN.match(lines[0]) if lines else None
+    if not found:
+        return {}
+
+    return dict(
+        (key, value) for key, value in found.groupdict().items()
+        if value is not None
+    )
+
+
+def family(info):
+    """
+    Family of a distribution from its ID, then each entry of ID_LIKE
+    """
+    candidates = [info.get('id', '')] + info.get('id_like', '').split()
+    for candidate in candidates:
+        candidate = candidate.lower()
+        for name, members in FAMILIES.items():
+            for member in members:
+                if candidate == member or candidate.startswith(member + '-'):
+                    return name
+
+    return None
+
+
+def _read(path):
+    try:
+        return scanner.read_file(path)
+    except (IOError, OSError):
+        return None
+
+
+def _distribution_release(root, preferred=None):
+    """
+    Info from the first distribution release file that can be parsed, with
+    the ID taken from the file name. The file named after the os-release ID
+    is tried first, derivatives often also ship a redhat-release
+    """
+    paths = sorted(glob.glob(os.path.join(root, 'etc', '*-release')))
+    if preferred:
+        preferred_path = os.path.join(
+            root,
+            'etc',
+            '{0}-release'.format(preferred)
+        )
+        if preferred_path in paths:
+            paths.remove(preferred_path)
+            paths.insert(0, preferred_path)
+
+    for path in paths:
+        basename = os.path.basename(path)
+        if basename in IGNORED_RELEASE_FILES:
+            continue
+
+        content = _read(path)
+        info = parse_release_file(content) if content else {}
+        if info:
+            distribution = basename.split('-')[0].lower()
+            info['id'] = NORMALIZED_IDS.get(distribution, distribution)
+            return info
+
+    return {}
+
+
+def release_info(root='/'):
+    """
+    Release information for a root. id and name come from os-release when
+    there is one and version_id from the distribution release file, which
+    has the full version. family is rhel, debian, suse or None
+    """
+    if root in _release_cache:
+        return _release_cache[root]
+
+    info = {}
+    for relative in OS_RELEASE_FILES:
+        content = _read(os.path.join(root, relative))
+        if content is not None:
+            info = parse_os_release(content)
+            break
+
+    release = _distribution_release(root, info.get('id'))
+    for key in ['id', 'name']:
+        if key in release and key not in info:
+            info[key] = release[key]
+
+    for key in ['version_id', 'codename']:
+        if key in release:
+            info[key] = release[key]
+
+    info['family'] = family(info)
+    if info['family'] is None:
+        for relative, name in FAMILY_FILES:
+            if os.path.isfile(os.path.join(root, relative)):
+                info['family'] = name
+                break
+
+    _release_cache[root] = info
+    return info
+
+
+def clear_cache():
+    _release_cache.clear()
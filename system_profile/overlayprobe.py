@@ -0,0 +1,281 @@
+"""
+Mount a real overlay filesystem and measure it
+
+Docker and gravity keep their layers on an overlay mount, and the checks on
+ftype and the overlay module only say it should work. The probe creates a
+scratch directory on the backing filesystem of /var/lib/gravity, checks that
+the filesystem returns the file type in directory entries (d_type) like the
+overlay driver needs, mounts an overlay over it and measures how long the
+first write to a lower file takes, which copies the file up, and how many
+small files can be created and read through the overlay. Everything is
+unmounted and removed again afterwards.
+"""
+
+from subprocess import Popen
+from subprocess import PIPE
+from system_profile import stats
+
+
+import ctypes.util
+import tempfile
+import ctypes
+import shutil
+import time
+import os
+
+
+OVERLAY_DIR = '/var/lib/gravity'
+COPY_UP_FILES = 200
+COPY_UP_SIZE = 64 * 1024
+SMALL_FILES = 2000
+SMALL_FILE_SIZE = 4096
+PERCENTILES = [50, 99]
+
+DT_UNKNOWN = 0
+
+
+class _Dirent(ctypes.Structure):
+    # struct dirent64 on Linux, the same layout on every architecture
+    _fields_ = [
+        ('d_ino', ctypes.c_uint64),
+        ('d_off', ctypes.c_int64),
+        ('d_reclen', ctypes.c_ushort),
+        ('d_type', ctypes.c_ubyte),
+        ('d_name', ctypes.c_char * 256)
+    ]
+
+
+def backing_directory(path):
+    """
+    The directory itself, or the nearest parent that exists, which is on the
+    filesystem the directory will be created on
+    """
+    path = os.path.abspath(path)
+    while not os.path.isdir(path):
+        path = os.path.dirname(path)
+
+    return path
+
+
+def _libc():
+    libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+    readdir = getattr(libc, 'readdir64', None) or libc.readdir
+    libc.opendir.argtypes = [ctypes.c_char_p]
+    libc.opendir.restype = ctypes.c_void_p
+    readdir.argtypes = [ctypes.c_void_p]
+    readdir.restype = ctypes.POINTER(_Dirent)
+    libc.closedir.argtypes = [ctypes.c_void_p]
+    return libc, readdir
+
+
+def entry_types(path):
+    """
+    d_type of each entry of a directory as readdir returns it, or None when
+    the C library can not be used
+    """
+    try:
+        libc, readdir = _libc()
+    except (OSError, AttributeError, TypeError):
+        return None
+
+    handle = libc.opendir(path.encode('utf-8'))
+    if not handle:
+        return None
+
+    types = {}
+    try:
+        while True:
+            entry = readdir(handle)
+            if not entry:
+                break
+
+            name = entry.contents.d_name.decode('utf-8', 'replace')
+            if name not in ('.', '..'):
+                types[name] = entry.contents.d_type
+    finally:
+        libc.closedir(handle)
+
+    return types
+
+
+def d_type_supported(directory):
+    """
+    Like docker, create a file and a directory and check that neither comes
+    back from readdir as DT_UNKNOWN
+    """
+    check_dir = os.path.join(directory, 'd_type')
+    os.mkdir(check_dir)
+    os.mkdir(os.path.join(check_dir, 'directory'))
+    open(os.path.join(check_dir, 'file'), 'w').close()
+    types = entry_types(check_dir)
+    if types is None:
+        return None
+
+    return DT_UNKNOWN not in types.values()
+
+
+def _run(command):
+    p = Popen(command, stdout=PIPE, stderr=PIPE, stdin=PIPE)
+    _, err = p.communicate()
+    return p.returncode, err.decode('utf-8', 'replace').strip()
+
+
+def mount_overlay(lower, upper, work, merged):
+    """
+    Returns None when the overlay was mounted, otherwise the error
+    """
+    returncode, err = _run(
+        [
+            'mount',
+            '-t',
+            'overlay',
+            'overlay',
+            '-o',
+            'lowerdir={0},upperdir={1},workdir={2}'.format(
+                lower,
+                upper,
+                work
+            ),
+            merged
+        ]
+    )
+    if returncode != 0:
+        return err or 'mount exited with {0}'.format(returncode)
+
+    return None
+
+
+def unmount(merged):
+    if _run(['umount', merged])[0] != 0:
+        # Something still has a file open, detach it so it is not left behind
+        _run(['umount', '-l', merged])
+
+
+def write_files(directory, count, size):
+    content = b'\0' * size
+    names = []
+    for index in range(count):
+        name = os.path.join(directory, 'file{0}'.format(index))
+        with open(name, 'wb') as f:
+            f.write(content)
+
+        names.append(name)
+
+    return names
+
+
+def measure_copy_up(names):
+    """
+    Time the first write to each lower file through the overlay, which
+    copies the whole file up before it returns
+    """
+    latencies = []
+    for name in names:
+        start = time.time()
+        with open(name, 'r+b') as f:
+            f.write(b'\1')
+
+        latencies.append(time.time() - start)
+
+    latencies.sort()
+    copy_up = {'files': len(names)}
+    for percent in PERCENTILES:
+        value = stats.percentile(latencies, percent)
+        copy_up['p{0}_ms'.format(percent)] = (
+            None if value is None else round(value * 1000, 3)
+        )
+
+    copy_up['max_ms'] = (
+        round(latencies[-1] * 1000, 3) if latencies else None
+    )
+    return copy_up
+
+
+def measure_small_files(directory, count, size):
+    """
+    Files created and read per second in a new directory of the overlay
+    """
+    os.mkdir(directory)
+    start = time.time()
+    names = write_files(directory, count, size)
+    created = time.time() - start
+
+    start = time.time()
+    for name in names:
+        with open(name, 'rb') as f:
+            f.read()
+
+    read = time.time() - start
+    return {
+        'files': count,
+        'size': size,
+        'create_per_second': int(count / max(created, 1e-9)),
+        'read_per_second': int(count / max(read, 1e-9))
+    }
+
+
+def overlay_probe(
+    verbose,
+    directory=OVERLAY_DIR,
+    copy_up_files=COPY_UP_FILES,
+    small_files=SMALL_FILES
+):
+    """
+    Mount an overlay in a scratch directory on the filesystem of directory
+    and measure copy up and small file throughput. mounted is None when the
+    probe could not try to mount, i.e. when it is not run as root
+    """
+    backing = backing_directory(directory)
+    if verbose:
+        print('Probing the overlay filesystem on {0}'.format(backing))
+
+    results = {
+        'directory': backing,
+        'd_type': None,
+        'mounted': None,
+        'error': None,
+        'copy_up': None,
+        'small_files': None
+    }
+    if os.geteuid() != 0:
+        results['error'] = 'Mounting an overlay needs root'
+        return results
+
+    scratch = tempfile.mkdtemp(prefix='.ae-profile-overlay-', dir=backing)
+    merged = os.path.join(scratch, 'merged')
+    mounted = False
+    try:
+        results['d_type'] = d_type_supported(scratch)
+        layers = [
+            os.path.join(scratch, layer)
+            for layer in ['lower', 'upper', 'work']
+        ]
+        for layer in layers + [merged]:
+            os.mkdir(layer)
+
+        lower_files = write_files(layers[0], copy_up_files, COPY_UP_SIZE)
+        results['error'] = mount_overlay(*(layers + [merged]))
+        mounted = results['error'] is None
+        results['mounted'] = mounted
+        if mounted:
+            results['copy_up'] = measure_copy_up(
+                [
+                    os.path.join(merged, os.path.basename(name))
+                    for name in lower_files
+                ]
+            )
+            results['copy_up']['size'] = COPY_UP_SIZE
+            results['small_files'] = measure_small_files(
+                os.path.join(merged, 'small'),
+                small_files,
+                SMALL_FILE_SIZE
+            )
+    except (IOError, OSError) as error:
+        results['error'] = str(error)
+    finally:
+        if mounted:
+            unmount(merged)
+
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    return results
@@ -0,0 +1,301 @@
+"""
+Check registry and entry point plugin discovery
+
+A check is one section of the report. It has a gather function that collects
+the data for the section and a rule that writes the section to the results
+file and returns the verdict for it.
+
+Site specific checks are installed as separate packages that register a Check
+instance in the ae_profile.checks entry point group:
+
+    entry_points={
+        'ae_profile.checks': [
+            'storage_array = site_checks.storage:storage_array_check'
+        ]
+    }
+
+Plugins are discovered from the installed package metadata only. The module
+behind an entry point is not imported until the check is selected to run.
+"""
+
+
+ENTRY_POINT_GROUP = 'ae_profile.checks'
+
+# Cost classes that are used to order and select checks
+COST_FAST = 'fast'
+COST_MEDIUM = 'medium'
+COST_SLOW = 'slow'
+COSTS = [COST_FAST, COST_MEDIUM, COST_SLOW]
+
+# What a check reads, which decides if it can run against an offline root.
+# Config files can always be read from the root, /proc and /sys need a
+# captured or host --proc and live checks need the running system
+SOURCE_FILES = 'files'
+SOURCE_PROC = 'proc'
+SOURCE_LIVE = 'live'
+SOURCES = [SOURCE_FILES, SOURCE_PROC, SOURCE_LIVE]
+
+# What a check is about. The process exits with the bits of every category
+# that has a failing check, 1 and 2 are left for errors and usage errors
+CATEGORY_OS = 'os'
+CATEGORY_RESOURCES = 'resources'
+CATEGORY_STORAGE = 'storage'
+CATEGORY_NETWORK = 'network'
+CATEGORY_CONFIG = 'config'
+EXIT_CODES = {
+    CATEGORY_OS: 4,
+    CATEGORY_RESOURCES: 8,
+    CATEGORY_STORAGE: 16,
+    CATEGORY_NETWORK: 32,
+    CATEGORY_CONFIG: 64
+}
+
+VERDICTS = ['PASS', 'WARN', 'FAIL']
+
+
+class PluginError(Exception):
+    pass
+
+
+class Check(object):
+    """
+    A single check and how it is reported
+
+    gather(system_info, args) returns the data for the section, which is
+    stored in system_info under the name of the check. system_info is a
+    system_profile.model.HostResult, which also supports dict style access.
+
+    rule(f, data, system_info) writes the section to the open results file
+    and returns PASS, WARN, FAIL, SKIPPED or None when there is no verdict.
+
+    cost is one of COST_FAST, COST_MEDIUM or COST_SLOW, and requires lists the
+    names of the checks whose data the gather function reads.
+
+    source is one of SOURCE_FILES, SOURCE_PROC or SOURCE_LIVE and says what
+    the gather function needs when checking an offline root.
+
+    category is one of the keys of EXIT_CODES and decides the exit code when
+    the check fails. A FAIL of a disqualifying check means the host can not
+    be used at all, and stops a run with --fail-fast.
+    """
+    def __init__(
+        self,
+        name,
+        gather,
+        rule,
+        cost=COST_FAST,
+        requires=None,
+        affects_overall=True,
+        source=SOURCE_LIVE,
+        category=CATEGORY_CONFIG,
+        disqualifying=False
+    ):
+        if cost not in COSTS:
+            raise PluginError(
+                'Unknown cost class "{0}" for check {1}'.format(cost, name)
+            )
+
+        if source not in SOURCES:
+            raise PluginError(
+                'Unknown source "{0}" for check {1}'.format(source, name)
+            )
+
+        if category not in EXIT_CODES:
+            raise PluginError(
+                'Unknown category "{0}" for check {1}'.format(category, name)
+            )
+
+        self.name = name
+        self.gather = gather
+        self.rule = rule
+        self.cost = cost
+        self.requires = requires or []
+        self.affects_overall = affects_overall
+        self.source = source
+        self.category = category
+        self.disqualifying = disqualifying
+
+    def __repr__(self):
+        return '<Check {0} ({1})>'.format(self.name, self.cost)
+
+
+def merge_verdicts(current, verdict):
+    """
+    Combine the overall result with the verdict of a section. FAIL wins over
+    WARN which wins over PASS, anything else leaves the result unchanged
+    """
+    if verdict not in VERDICTS:
+        return current
+
+    if VERDICTS.index(verdict) > VERDICTS.index(current):
+        return verdict
+
+    return current
+
+
+def select_checks(checks, only=None, skip=None):
+    """
+    Return the checks to run and the checks to report for the section names
+    given with --only and --skip. Every check a reported check requires is
+    run as well, even when it is skipped, so its data is there for the
+    checks that read it. Both lists keep the order of checks
+    """
+    names = [check.name for check in checks]
+    unknown = [
+        name for name in (only or []) + (skip or []) if name not in names
+    ]
+    if unknown:
+        raise PluginError(
+            'Unknown check {0}, the checks are {1}'.format(
+                ', '.join(unknown),
+                ', '.join(names)
+            )
+        )
+
+    reported = set(only or names) - set(skip or [])
+    by_name = dict((check.name, check) for check in checks)
+    needed = set()
+    pending = list(reported)
+    while pending:
+        name = pending.pop()
+        if name in needed:
+            continue
+
+        needed.add(name)
+        for required in by_name[name].requires:
+            if required not in by_name:
+                raise PluginError(
+                    'Check {0} requires {1}, which is not a check'.format(
+                        name,
+                        required
+                    )
+                )
+
+            pending.append(required)
+
+    return (
+        [check for check in checks if check.name in needed],
+        [check for check in checks if check.name in reported]
+    )
+
+
+def tiered(checks):
+    """
+    Order the checks by cost class so the cheap checks run first. A check
+    takes the most expensive class of the checks it requires, so it never
+    runs before them, and the order is otherwise unchanged
+    """
+    by_name = dict((check.name, check) for check in checks)
+    tiers = {}
+
+    def tier(check):
+        if check.name not in tiers:
+            tiers[check.name] = max(
+                [COSTS.index(check.cost)] + [
+                    tier(by_name[required])
+                    for required in check.requires
+                    if required in by_name
+                ]
+            )
+
+        return tiers[check.name]
+
+    return sorted(checks, key=tier)
+
+
+def exit_code(checks, verdicts):
+    """
+    Combine the exit code bits of the categories with a failing check. Checks
+    that do not affect the overall result never fail the run
+    """
+    code = 0
+    for check in checks:
+        if check.affects_overall and verdicts.get(check.name) == 'FAIL':
+            code |= EXIT_CODES[check.category]
+
+    return code
+
+
+def _entry_points(group):
+    try:
+        from importlib import metadata
+    except ImportError:
+        import pkg_resources
+        return list(pkg_resources.iter_entry_points(group))
+
+    all_entry_points = metadata.entry_points()
+    if hasattr(all_entry_points, 'select'):
+        return list(all_entry_points.select(group=group))
+
+    return list(all_entry_points.get(group, []))
+
+
+def discover_plugins(group=ENTRY_POINT_GROUP):
+    """
+    Find the installed check plugins from package metadata. Returns a dict of
+    plugin name to entry point, none of the plugin modules are imported
+    """
+    found = {}
+    for entry_point in _entry_points(group):
+        if entry_point.name not in found:
+            found[entry_point.name] = entry_point
+
+    return found
+
+
+def load_plugin(name, entry_point):
+    """
+    Import the object behind an entry point and make sure it is a usable check
+    """
+    try:
+        plugin = entry_point.load()
+    except Exception as e:
+        raise PluginError(
+            'Unable to load check plugin {0}: {1}'.format(name, e)
+        )
+
+    if callable(plugin) and not isinstance(plugin, Check):
+        plugin = plugin()
+
+    for attribute in ['gather', 'rule', 'cost']:
+        if not hasattr(plugin, attribute):
+            raise PluginError(
+                'Check plugin {0} does not define {1}'.format(name, attribute)
+            )
+
+    if plugin.cost not in COSTS:
+        raise PluginError(
+            'Unknown cost class "{0}" for check {1}'.format(plugin.cost, name)
+        )
+
+    # The entry point name is the name of the section in the results
+    plugin.name = name
+    if not hasattr(plugin, 'requires'):
+        plugin.requires = []
+
+    if not hasattr(plugin, 'affects_overall'):
+        plugin.affects_overall = True
+
+    if getattr(plugin, 'category', CATEGORY_CONFIG) not in EXIT_CODES:
+        raise PluginError(
+            'Unknown category "{0}" for check {1}'.format(
+                plugin.category,
+                name
+            )
+        )
+
+    if not hasattr(plugin, 'category'):
+        plugin.category = CATEGORY_CONFIG
+
+    if not hasattr(plugin, 'disqualifying'):
+        plugin.disqualifying = False
+
+    if not hasattr(plugin, 'source'):
+        plugin.source = SOURCE_LIVE
+
+    if plugin.source not in SOURCES:
+        raise PluginError(
+            'Unknown source "{0}" for check {1}'.format(plugin.source, name)
+        )
+
+    return plugin
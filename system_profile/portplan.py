@@ -0,0 +1,174 @@
+"""
+Port plan of an install held as bitmaps of the 65536 ports
+
+Every range the install needs is set in one bitmap per protocol. The sockets
+listening on the host and the ephemeral port range are turned into bitmaps
+the same way, so a conflict is a single AND of two bitmaps no matter how wide
+the ranges are, and the result is turned back into compact ranges such as
+30000-32767 for the report. Python integers are used as the bitmaps, bit n
+is port n.
+"""
+
+import socket
+import struct
+
+
+PROTOCOLS = ['tcp', 'udp']
+
+# Ports used by Gravity and the Kubernetes cluster it runs, and the ingress
+PLAN = [
+    ('tcp', '53', 'Cluster DNS'),
+    ('udp', '53', 'Cluster DNS'),
+    ('tcp', '80,443', 'Ingress'),
+    ('tcp', '2379-2380,4001,7001', 'etcd'),
+    ('tcp', '3008-3012', 'Gravity services'),
+    ('tcp', '3022-3025,3080', 'Teleport'),
+    ('tcp', '4242', 'Bandwidth checker'),
+    ('tcp', '5000', 'Docker registry'),
+    ('tcp', '6443', 'Kubernetes API server'),
+    ('tcp', '7373,7496', 'Serf health checks'),
+    ('tcp', '7575', 'Cluster status API'),
+    ('udp', '8472', 'VXLAN overlay network'),
+    ('tcp', '10248-10250,10255', 'Kubernetes components'),
+    ('tcp', '30000-32767', 'Kubernetes NodePort range'),
+    ('tcp', '32009', 'Gravity Hub'),
+    ('tcp', '61008-61010,61022-61024', 'Gravity installer')
+]
+
+# Socket files in /proc/net for each protocol and the state of a socket that
+# is accepting connections, unconnected UDP sockets are bound ones
+LISTENER_FILES = {
+    'tcp': (['net/tcp', 'net/tcp6'], '0A'),
+    'udp': (['net/udp', 'net/udp6'], '07')
+}
+# Stub resolvers such as systemd-resolved listen on 127.0.0.53:53 on stock
+# hosts. Cluster DNS does not bind to loopback, so those do not conflict
+LOOPBACK_PORTS = [53]
+
+
+def parse_ranges(text):
+    """
+    Ranges in the syntax of ip_local_reserved_ports, i.e. 2379-2380,6443, as
+    a list of (first, last) tuples
+    """
+    ranges = []
+    for part in text.replace(' ', '').split(','):
+        if not part:
+            continue
+
+        first, _, last = part.partition('-')
+        ranges.append((int(first), int(last or first)))
+
+    return ranges
+
+
+def to_bitmap(ranges):
+    bitmap = 0
+    for first, last in ranges:
+        bitmap |= ((1 << (last - first + 1)) - 1) << first
+
+    return bitmap
+
+
+def to_ranges(bitmap):
+    """
+    Runs of set bits as (first, last) tuples. Each run is found with a couple
+    of integer operations, so this takes as long as there are ranges and not
+    as long as there are ports
+    """
+    ranges = []
+    while bitmap:
+        first = (bitmap & -bitmap).bit_length() - 1
+        shifted = bitmap >> first
+        # The lowest clear bit above the run gives its length
+        length = ((shifted + 1) & ~shifted).bit_length() - 1
+        ranges.append((first, first + length - 1))
+        bitmap &= ~(((1 << length) - 1) << first)
+
+    return ranges
+
+
+def format_ranges(ranges):
+    return ','.join(
+        str(first) if first == last else '{0}-{1}'.format(first, last)
+        for first, last in ranges
+    )
+
+
+def plan_bitmaps(plan=PLAN):
+    bitmaps = dict((protocol, 0) for protocol in PROTOCOLS)
+    for protocol, ports, _ in plan:
+        bitmaps[protocol] |= to_bitmap(parse_ranges(ports))
+
+    return bitmaps
+
+
+def services(plan, protocol, first, last):
+    """
+    Names of the entries of the plan that use any port from first to last,
+    with any protocol when protocol is None
+    """
+    wanted = to_bitmap([(first, last)])
+    return sorted(
+        set(
+            name for entry_protocol, ports, name in plan
+            if (protocol is None or entry_protocol == protocol) and
+            to_bitmap(parse_ranges(ports)) & wanted
+        )
+    )
+
+
+def sort_key(ports):
+    """
+    Order ranges such as tcp/80 or 2379-2380 by protocol and first port
+    """
+    protocol, _, ports = ports.rpartition('/')
+    return protocol, int(ports.split('-')[0])
+
+
+def decode_address(address):
+    """
+    Address of a /proc/net socket line, i.e. 0100007F:0035 is 127.0.0.1:53.
+    The address is in host byte order 32 bits at a time
+    """
+    host, port = address.split(':')
+    words = [
+        struct.pack('=I', int(host[index:index + 8], 16))
+        for index in range(0, len(host), 8)
+    ]
+    if len(words) == 1:
+        host = socket.inet_ntoa(words[0])
+    else:
+        host = '[{0}]'.format(
+            socket.inet_ntop(socket.AF_INET6, b''.join(words))
+        )
+
+    return host, int(port, 16)
+
+
+def is_loopback(host):
+    return host.startswith('127.') or host == '[::1]'
+
+
+def plan_listeners(listeners):
+    """
+    The listeners that can conflict with the plan, i.e. all of them except
+    the ones on loopback for the LOOPBACK_PORTS
+    """
+    return [
+        (host, port) for host, port in listeners
+        if port not in LOOPBACK_PORTS or not is_loopback(host)
+    ]
+
+
+def parse_listeners(content, state):
+    """
+    Local address and port of every socket in the given state
+    """
+    listeners = []
+    for line in content.splitlines()[1:]:
+        fields = line.split()
+        if len(fields) > 3 and fields[3] == state:
+            listeners.append(decode_address(fields[1]))
+
+    return listeners
@@ -0,0 +1,236 @@
+"""
+Watch process creation over a time window
+
+Config management agents are often started from cron and only run for a few
+seconds, so a single look at the process list misses them. The netlink proc
+connector is used when it is available (it needs root) and gives an event for
+every exec. Otherwise /proc is listed periodically and only the pids that are
+new since the last listing are looked at.
+"""
+
+import socket
+import select
+import struct
+import errno
+import time
+import os
+
+
+# Values from linux/netlink.h, linux/connector.h and linux/cn_proc.h
+NETLINK_CONNECTOR = 11
+CN_IDX_PROC = 1
+CN_VAL_PROC = 1
+NLMSG_DONE = 3
+PROC_CN_MCAST_LISTEN = 1
+PROC_CN_MCAST_IGNORE = 2
+PROC_EVENT_EXEC = 0x00000002
+PROC_EVENT_COMM = 0x00000200
+
+NLMSGHDR = struct.Struct('=IHHII')
+CN_MSG = struct.Struct('=IIIIHH')
+PROC_EVENT = struct.Struct('=IIQ')
+EXEC_EVENT = struct.Struct('=ii')
+COMM_EVENT = struct.Struct('=ii16s')
+EVENT_OFFSET = NLMSGHDR.size + CN_MSG.size
+DATA_OFFSET = EVENT_OFFSET + PROC_EVENT.size
+
+POLL_INTERVAL = 0.5
+
+
+def read_comm(pid, proc='/proc'):
+    """
+    Command name of a pid, or None when the process is already gone
+    """
+    try:
+        with open('{0}/{1}/comm'.format(proc, pid)) as f:
+            return f.read().strip()
+    except (IOError, OSError):
+        return None
+
+
+def match_agent(name, agents):
+    if name is None:
+        return False
+
+    lower_name = name.lower()
+    for agent in agents:
+        if agent in lower_name:
+            return True
+
+    return False
+
+
+class AgentCounter(object):
+    """
+    Counts process starts whose name matches one of the agents. A process is
+    counted once per exec, even when it renames itself afterwards
+    """
+    def __init__(self, agents):
+        self.agents = agents
+        self.seen = {}
+        self.counted = set()
+
+    def exec_seen(self, pid, name):
+        self.counted.discard(pid)
+        self.name_seen(pid, name)
+
+    def name_seen(self, pid, name):
+        if pid in self.counted or not match_agent(name, self.agents):
+            return
+
+        self.counted.add(pid)
+        self.seen[name] = self.seen.get(name, 0) + 1
+
+
+def _connector_message(op):
+    payload = struct.pack('=I', op)
+    cn_msg = CN_MSG.pack(CN_IDX_PROC, CN_VAL_PROC, 0, 0, len(payload), 0)
+    length = NLMSGHDR.size + len(cn_msg) + len(payload)
+    return NLMSGHDR.pack(
+        length,
+        NLMSG_DONE,
+        0,
+        0,
+        os.getpid()
+    ) + cn_msg + payload
+
+
+def parse_events(data):
+    """
+    Yield (event, pid, name) for the exec and comm events in a datagram from
+    the proc connector. name is None for exec events, thread events are left
+    out
+    """
+    offset = 0
+    while offset + NLMSGHDR.size <= len(data):
+        length = NLMSGHDR.unpack_from(data, offset)[0]
+        if length < NLMSGHDR.size:
+            break
+
+        if length >= DATA_OFFSET:
+            what = PROC_EVENT.unpack_from(data, offset + EVENT_OFFSET)[0]
+            if what == PROC_EVENT_EXEC:
+                pid, tgid = EXEC_EVENT.unpack_from(data, offset + DATA_OFFSET)
+                yield PROC_EVENT_EXEC, tgid, None
+            elif what == PROC_EVENT_COMM:
+                pid, tgid, comm = COMM_EVENT.unpack_from(
+                    data,
+                    offset + DATA_OFFSET
+                )
+                if pid == tgid:
+                    yield (
+                        PROC_EVENT_COMM,
+                        tgid,
+                        comm.split(b'\0', 1)[0].decode('utf-8', 'replace')
+                    )
+
+        # Messages are aligned to 4 bytes
+        offset += (length + 3) & ~3
+
+
+def open_connector():
+    """
+    Subscribe to the proc connector, raises socket.error when it is not
+    available or the caller is not allowed to listen
+    """
+    sock = socket.socket(
+        socket.AF_NETLINK,
+        socket.SOCK_DGRAM,
+        NETLINK_CONNECTOR
+    )
+    try:
+        sock.bind((os.getpid(), CN_IDX_PROC))
+        sock.send(_connector_message(PROC_CN_MCAST_LISTEN))
+    except Exception:
+        sock.close()
+        raise
+
+    return sock
+
+
+def watch_connector(sock, window, agents, proc='/proc'):
+    counter = AgentCounter(agents)
+    end = time.time() + window
+    while True:
+        remaining = end - time.time()
+        if remaining <= 0:
+            break
+
+        readable = select.select([sock], [], [], remaining)[0]
+        if not readable:
+            continue
+
+        try:
+            data = sock.recv(65536)
+        except socket.error as error:
+            # Events were dropped because the buffer was full, keep going
+            if error.errno == errno.ENOBUFS:
+                continue
+
+            raise
+
+        for event, pid, name in parse_events(data):
+            if event == PROC_EVENT_EXEC:
+                counter.exec_seen(pid, read_comm(pid, proc))
+            else:
+                counter.name_seen(pid, name)
+
+    return counter.seen
+
+
+def list_pids(proc='/proc'):
+    return set(int(entry) for entry in os.listdir(proc) if entry.isdigit())
+
+
+def watch_proc(window, agents, interval=POLL_INTERVAL, proc='/proc'):
+    """
+    Diff the pids in /proc every interval, only new pids have their name read
+    """
+    counter = AgentCounter(agents)
+    known = list_pids(proc)
+    end = time.time() + window
+    while True:
+        remaining = end - time.time()
+        if remaining <= 0:
+            break
+
+        time.sleep(min(interval, remaining))
+        current = list_pids(proc)
+        for pid in current - known:
+            counter.exec_seen(pid, read_comm(pid, proc))
+
+        known = current
+
+    return counter.seen
+
+
+def watch_for_agents(window, agents, verbose):
+    """
+    Watch for agents started during the window and count how often each one
+    was seen
+    """
+    if verbose:
+        print('Watching for agents for {0} seconds'.format(window))
+
+    try:
+        sock = open_connector()
+    except (socket.error, AttributeError):
+        # AttributeError when the platform has no AF_NETLINK
+        sock = None
+
+    if sock is not None:
+        method = 'netlink'
+        try:
+            seen = watch_connector(sock, window, agents)
+        finally:
+            try:
+                sock.send(_connector_message(PROC_CN_MCAST_IGNORE))
+            except socket.error:
+                pass
+
+            sock.close()
+    else:
+        method = 'proc'
+        seen = watch_proc(window, agents)
+
+    return {'seconds': window, 'method': method, 'seen': seen}
@@ -1,16 +1,41 @@
 from contextlib import closing
+from array import array
 from subprocess import Popen
 from subprocess import PIPE
-
-
+from system_profile import plugins
+from system_profile import model
+from system_profile import store
+from system_profile import diff
+from system_profile import prometheus
+from system_profile import scanner
+from system_profile import procwatch
+from system_profile import overlayprobe
+from system_profile import portplan
+from system_profile import dnsprobe
+from system_profile import osrelease
+from system_profile import upload
+
+
+import multiprocessing
 import argparse
 import socket
+import json
+import tempfile
+import random
 import psutil
-import distro
+import glob
+import time
+import sys
 import os
 import re
 
 
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+
 OS_VALUES = {
     'rhel': {
         'versions': ['7.2', '7.3', '7.4', '7.5'],
@@ -54,8 +79,182 @@ DEFAULT_SYSCTL = [
     'fs.may_detach_mounts',
     'net.ipv4.ip_forward'
 ]
+# Kernel tuning rules grouped by subsystem. minimum and maximum rules can
+# scale with the memory in GB (per_gb) and the number of cores (per_core),
+# the largest of value and the scaled values is used
+SYSCTL_TUNING = [
+    ('filesystem', 'fs.file-max', {
+        'rule': 'minimum', 'value': 1048576, 'per_gb': 8192
+    }),
+    ('filesystem', 'fs.inotify.max_user_watches', {
+        'rule': 'minimum', 'value': 524288, 'per_gb': 4096
+    }),
+    ('filesystem', 'fs.inotify.max_user_instances', {
+        'rule': 'minimum', 'value': 8192
+    }),
+    ('kernel', 'kernel.pid_max', {
+        'rule': 'minimum', 'value': 65536, 'per_core': 2048
+    }),
+    ('memory', 'vm.max_map_count', {
+        'rule': 'minimum', 'value': 262144
+    }),
+    ('memory', 'vm.overcommit_memory', {
+        'rule': 'range', 'minimum': 0, 'maximum': 1
+    }),
+    ('memory', 'vm.panic_on_oom', {
+        'rule': 'exact', 'value': 0
+    }),
+    ('memory', 'vm.swappiness', {
+        'rule': 'maximum', 'value': 10
+    }),
+    ('network', 'net.core.somaxconn', {
+        'rule': 'minimum', 'value': 1024, 'per_core': 128
+    }),
+    ('network', 'net.netfilter.nf_conntrack_max', {
+        'rule': 'minimum', 'value': 131072, 'per_gb': 8192, 'per_core': 32768
+    }),
+    ('network', 'net.ipv4.neigh.default.gc_thresh1', {
+        'rule': 'minimum', 'value': 1024
+    }),
+    ('network', 'net.ipv4.neigh.default.gc_thresh2', {
+        'rule': 'minimum', 'value': 4096
+    }),
+    ('network', 'net.ipv4.neigh.default.gc_thresh3', {
+        'rule': 'minimum', 'value': 8192
+    })
+]
 OPEN_PORTS = [80, 443, 32009, 61009, 65535]
 FILE_TYPES = ['xfs', 'ext4']
+# Conda environments and image layers average well under 32KB a file, so a
+# mount needs about this many free inodes for each GB it is expected to fill.
+# ext4 formatted with more bytes per inode than the mke2fs huge type is
+# likely to run out of inodes first
+INODES_PER_GB = 32768
+INODE_RATIO_MAX = 65536
+# Sampling window in seconds for the pressure check and the thresholds that
+# warn. Stalls are the percentage of the window that some or all tasks were
+# stalled, rates are pages per second
+SAMPLE_WINDOW = 5.0
+PRESSURE = {
+    'stall': {
+        'cpu': {'some': 10.0},
+        'memory': {'some': 5.0, 'full': 1.0},
+        'io': {'some': 10.0, 'full': 5.0}
+    },
+    'direct_scan': 1000.0,
+    'swap_in': 100.0,
+    'swap_out': 100.0
+}
+SKIP_INTERFACES = ['veth', 'flannel', 'docker', 'lo']
+# Columns of /proc/net/dev, frame also counts receive overruns
+NET_DEV_FIELDS = [
+    'rx_bytes',
+    'rx_packets',
+    'rx_errors',
+    'rx_dropped',
+    'rx_fifo',
+    'rx_frame',
+    'rx_compressed',
+    'rx_multicast',
+    'tx_bytes',
+    'tx_packets',
+    'tx_errors',
+    'tx_dropped',
+    'tx_fifo',
+    'tx_collisions',
+    'tx_carrier',
+    'tx_compressed'
+]
+NIC_ERRORS = [
+    'rx_errors',
+    'rx_dropped',
+    'rx_fifo',
+    'rx_frame',
+    'tx_errors',
+    'tx_dropped',
+    'tx_fifo',
+    'tx_carrier'
+]
+# Percentage of the link speed in use that warns and fails
+NIC_UTILIZATION = {'warn': 60.0, 'fail': 85.0}
+# Resolver defaults and the largest values the resolver accepts, from
+# resolv.conf(5)
+RESOLVER_OPTIONS = {
+    'ndots': {'default': 1, 'maximum': 15},
+    'timeout': {'default': 5, 'maximum': 30},
+    'attempts': {'default': 2, 'maximum': 5}
+}
+# Rounds of queries sent to each nameserver, the p90 latency in ms that warns
+# and the number of A queries a single lookup may expand to
+DNS_PROBE = {
+    'rounds': 5,
+    'warn_ms': 100.0,
+    'max_queries': 4
+}
+# Slowest copy up of a 64 KB file and fewest 4 KB files created per second
+# through an overlay before image pulls and container starts are affected
+OVERLAY_PROBE = {
+    'copy_up_p99_ms': 10.0,
+    'min_create_per_second': 2000
+}
+# Fields of the cpu lines in /proc/stat up to steal, the ones that are
+# reported and the percentages of time that warn
+CPU_STAT_FIELDS = [
+    'user',
+    'nice',
+    'system',
+    'idle',
+    'iowait',
+    'irq',
+    'softirq',
+    'steal'
+]
+CPU_STEAL = {
+    'aggregate': {'steal': 10.0, 'iowait': 20.0, 'irq': 10.0, 'softirq': 10.0},
+    'core_steal': 25.0,
+    'throttled': 10.0
+}
+VMSTAT_COUNTERS = {
+    'kswapd_scan': ['pgscan_kswapd'],
+    'direct_scan': ['pgscan_direct'],
+    'allocstall': ['allocstall'],
+    'swap_in': ['pswpin'],
+    'swap_out': ['pswpout'],
+    'major_faults': ['pgmajfault']
+}
+MEMORY_PERFORMANCE = {
+    'copy_bandwidth': {
+        'minimum': 4.0
+    },
+    'all_core_bandwidth': {
+        'minimum': 16.0
+    },
+    'latency': {
+        'maximum': 150.0
+    }
+}
+# Recommended performance profile, THP is fine when it is only used on
+# request and at least some of the free memory should be in 2MB blocks
+PERFORMANCE_MODE = {
+    'thp_enabled': ['madvise', 'never'],
+    'thp_defrag': ['defer', 'defer+madvise', 'madvise', 'never'],
+    'governor': ['performance'],
+    'high_order_percent': 10.0
+}
+HUGEPAGE_ORDER = 9
+# Recommended limits for the capacity check, sized like the sysctl tuning
+# rules. Usage above 80% of a limit warns and above 95% fails
+CAPACITY = {
+    'threads': {'rule': 'minimum', 'value': 65536, 'per_core': 4096},
+    'nofile': {'rule': 'minimum', 'value': 65536, 'per_core': 1024},
+    'nproc': {'rule': 'minimum', 'value': 32768, 'per_core': 512},
+    'warn_headroom': 20.0,
+    'fail_headroom': 5.0
+}
+# Conntrack counters from /proc/net/stat/nf_conntrack that mean packets were
+# dropped, and the recommended number of entries per hash bucket
+CONNTRACK_DROPS = ['drop', 'early_drop', 'insert_failed']
+CONNTRACK_ENTRIES_PER_BUCKET = 4
 RUNNING_AGENTS = [
     'salt',
     'puppet',
@@ -64,6 +263,36 @@ RUNNING_AGENTS = [
     'sisipsutildaemon'
 ]
 
+INTERFACE_SCANNER = scanner.ConfigScanner(
+    [('interfaces', r'^([^:\n]+):', scanner.ALL)]
+)
+SELINUX_SCANNER = scanner.ConfigScanner(
+    [('selinux', r'^SELINUX=(.*)$', scanner.FIRST)]
+)
+RESOLV_SCANNER = scanner.ConfigScanner(
+    [
+        ('search', r'^search\s(.*)$', scanner.ALL),
+        ('options', r'^options\s(.*)$', scanner.ALL),
+        ('nameservers', r'^nameserver\s+(\S+)', scanner.ALL)
+    ]
+)
+INFINITY_SCANNER = scanner.ConfigScanner(
+    [('infinity', r'^DefaultTasksMax=infinity', scanner.FIRST)]
+)
+SYSTEMD_LIMITS_SCANNER = scanner.ConfigScanner(
+    [('nofile', r'^DefaultLimitNOFILE=(.*)$', scanner.ALL)]
+)
+LIMITS_SCANNER = scanner.ConfigScanner(
+    [
+        (
+            'limits',
+            r'^[ \t]*[^#\s]+[ \t]+(?:soft|hard|-)[ \t]+(?:nofile|nproc)'
+            r'[ \t]+\S+',
+            scanner.ALL
+        )
+    ]
+)
+
 
 def execute_command(command, verbose):
     """
@@ -102,27 +331,24 @@ def check_for_socket(interface, port, verbose):
 
 
 def get_active_interfaces(devices_file):
+    # The device list changes while running so it is never cached
+    found = INTERFACE_SCANNER.scan_file(devices_file, cache=False)
+    return active_interfaces(found['interfaces'])
+
+
+def active_interfaces(names):
     interfaces = []
-    skip_interfaces = ['veth', 'flannel', 'docker', 'lo']
-    with open(devices_file) as f:
-        temp = f.readline()
-        while temp:
-            # Run regex search to grab interface name
-            search = re.search(r'^(.+?):', temp)
-            if search:
-                # Set the interface to a temp variable
-                temp_interface = search.group(1).strip()
-
-                # Test for inclusion to skipped interfaces
-                test_interfaces = [
-                    x in temp_interface for x in skip_interfaces
-                ]
-
-                # Make sure everything is False as it means valid interface
-                if True not in test_interfaces:
-                    interfaces.append(temp_interface)
-
-            temp = f.readline()
+    for temp_interface in names:
+        temp_interface = temp_interface.strip()
+
+        # Test for inclusion to skipped interfaces
+        test_interfaces = [
+            x in temp_interface for x in SKIP_INTERFACES
+        ]
+
+        # Make sure everything is False as it means valid interface
+        if True not in test_interfaces:
+            interfaces.append(temp_interface)
 
     return interfaces
 
@@ -139,7 +365,7 @@ def get_interface_ip_address(interface, verbose):
     return ip_address
 
 
-def get_os_info(verbose):
+def get_os_info(verbose, root='/'):
     """
     Get operating system details about the system the script is being run on.
     This will setup future steps and dictate what else needs to be done or
@@ -149,11 +375,7 @@ def get_os_info(verbose):
     if verbose:
         print('Gathering OS and distribution information')
 
-    linux_info = distro.distro_release_info()
-    # On SUSE distro_release_info gives an empty {} so get the info another way
-    if linux_info == {}:
-        linux_info = distro.os_release_info()
-
+    linux_info = osrelease.release_info(root)
     version = 'UNK'
     if linux_info.get('version_id'):
         temp_version = linux_info.get('version_id').split('.')
@@ -165,20 +387,11 @@ def get_os_info(verbose):
     profile['distribution'] = linux_info.get('id')
     profile['version'] = version
     profile['dist_name'] = linux_info.get('name')
-
-    based_on = None
-    if os.path.isfile('/etc/redhat-release'):
-        based_on = 'rhel'
-    elif os.path.isfile('/etc/debian_version'):
-        based_on = 'debian'
-    elif os.path.isfile('/etc/os-release'):
-        based_on = 'suse'
-
-    profile['based_on'] = based_on
+    profile['based_on'] = linux_info.get('family')
     return profile
 
 
-def system_requirements(verbose):
+def system_requirements(verbose, proc_dir='/proc'):
     """
     Grab the memory and CPUs for the sytem to verify things are good
     """
@@ -194,7 +407,7 @@ def system_requirements(verbose):
         print('Gathering memory and CPU information')
 
     temp_memory = (
-        execute_command(["cat", "/proc/meminfo"], verbose)
+        execute_command(["cat", os.path.join(proc_dir, 'meminfo')], verbose)
     )
     if temp_memory is not None:
         found = re.search(r'^MemTotal:\s+(\d+)', temp_memory.decode('utf-8'))
@@ -203,6 +416,16 @@ def system_requirements(verbose):
 
         requirements['memory']['actual'] = round(temp_memory, 2)
 
+    if proc_dir != '/proc':
+        # getconf only knows about the running system, a captured /proc/stat
+        # lists the CPUs that were online
+        with open(os.path.join(proc_dir, 'stat')) as f:
+            requirements['cpu_cores']['actual'] = len(
+                re.findall(r'^cpu\d+ ', f.read(), re.MULTILINE)
+            )
+
+        return requirements
+
     temp_cores = execute_command(["getconf", "_NPROCESSORS_ONLN"], verbose)
     if temp_cores is not None:
         requirements['cpu_cores']['actual'] = int(temp_cores.strip())
@@ -210,6 +433,693 @@ def system_requirements(verbose):
     return requirements
 
 
+def get_llc_size(cache_dir):
+    """
+    Find the size in bytes of the largest (last level) cache reported by the
+    kernel for the first CPU. Falls back to 32 MB when sysfs has no data
+    """
+    llc_size = 0
+    for size_file in glob.glob(os.path.join(cache_dir, 'index*', 'size')):
+        with open(size_file) as f:
+            found = re.search(r'^(\d+)([KMG]?)', f.read().strip())
+
+        if found:
+            multiplier = {'': 1, 'K': 1024, 'M': 1024**2, 'G': 1024**3}
+            size = int(found.group(1)) * multiplier[found.group(2)]
+            if size > llc_size:
+                llc_size = size
+
+    if llc_size == 0:
+        llc_size = 32 * 1024**2
+
+    return llc_size
+
+
+def measure_copy_bandwidth(buffer_size, iterations):
+    """
+    Streaming copy between two buffers of buffer_size / 2 bytes each. Like
+    the STREAM copy kernel both the read and the write are counted, and the
+    best iteration is returned in GB/s
+    """
+    try:
+        # numpy is optional and slow to import, so only the probe loads it
+        import numpy
+    except ImportError:
+        numpy = None
+
+    half = int(buffer_size // 2)
+    if numpy is not None:
+        source = numpy.ones(half, dtype=numpy.uint8)
+        destination = numpy.empty_like(source)
+
+        def copy():
+            numpy.copyto(destination, source)
+    else:
+        source = bytearray(b'\x01') * half
+        destination = bytearray(half)
+
+        def copy():
+            destination[:] = source
+
+    # Fault in the destination pages before timing
+    copy()
+    best = None
+    for _ in range(iterations):
+        start = time.time()
+        copy()
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+
+    return round((2 * half) / max(best, 1e-9) / 1024.0**3, 2)
+
+
+def _chase_pointers(buffer_size, hops):
+    """
+    Build a random cycle of hops slots spread over buffer_size bytes and time
+    one pass through it. Returns the seconds taken for the full cycle
+    """
+    slots = max(int(buffer_size // 8), hops)
+    chain = array('l', [0]) * slots
+    positions = random.sample(range(slots), hops)
+    for index in range(hops):
+        chain[positions[index - 1]] = positions[index]
+
+    position = positions[0]
+    start = time.time()
+    for _ in range(hops):
+        position = chain[position]
+
+    return time.time() - start
+
+
+def measure_memory_latency(buffer_size, hops):
+    """
+    Random access latency in nanoseconds over a buffer of buffer_size bytes.
+    The same chase over a buffer that fits in the L1/L2 caches is subtracted
+    to remove the interpreter overhead of each hop
+    """
+    cached = _chase_pointers(min(64 * 1024, buffer_size), hops)
+    uncached = _chase_pointers(buffer_size, hops)
+    return round(max(uncached - cached, 0.0) / hops * 1e9, 2)
+
+
+def _bandwidth_worker(probe_args):
+    return measure_copy_bandwidth(*probe_args)
+
+
+def memory_performance(buffer_size, minimums, verbose):
+    """
+    Measure streaming copy bandwidth on one core and across all cores, and the
+    random access latency of memory. The working set defaults to twice the
+    last level cache so that the results reflect memory and not the caches
+    """
+    if verbose:
+        print('Measuring memory bandwidth and latency')
+
+    if not buffer_size:
+        llc_size = get_llc_size('/sys/devices/system/cpu/cpu0/cache')
+        buffer_size = min(max(2 * llc_size, 64 * 1024**2), 1024**3)
+
+    workers = multiprocessing.cpu_count()
+    results = {
+        'buffer_size': round(buffer_size / 1024.0**2, 2),
+        'copy_bandwidth': {
+            'minimum': minimums['copy_bandwidth']['minimum']
+        },
+        'all_core_bandwidth': {
+            'minimum': minimums['all_core_bandwidth']['minimum'],
+            'workers': workers
+        },
+        'latency': {
+            'maximum': minimums['latency']['maximum']
+        }
+    }
+
+    results['copy_bandwidth']['actual'] = measure_copy_bandwidth(
+        buffer_size,
+        5
+    )
+
+    # Split the working set so the combined footprint still exceeds the LLC
+    worker_size = max(buffer_size // workers, 16 * 1024**2)
+    pool = multiprocessing.Pool(processes=workers)
+    try:
+        worker_results = pool.map(
+            _bandwidth_worker,
+            [(worker_size, 10)] * workers
+        )
+    finally:
+        pool.close()
+        pool.join()
+
+    results['all_core_bandwidth']['actual'] = round(sum(worker_results), 2)
+    results['latency']['actual'] = measure_memory_latency(
+        buffer_size,
+        100000
+    )
+    return results
+
+
+def selected_option(value):
+    """
+    Pick the selected option out of sysfs output like always [madvise] never
+    """
+    if value is None:
+        return None
+
+    found = re.search(r'\[(.+?)\]', value)
+    if found:
+        return found.group(1)
+
+    return value
+
+
+def buddy_fragmentation(buddyinfo):
+    """
+    Free pages and the percentage of them in blocks big enough for a 2MB
+    huge page, summed over every node and zone in /proc/buddyinfo
+    """
+    free_pages = 0
+    high_order_pages = 0
+    for line in buddyinfo.splitlines():
+        counts = line.split()[4:]
+        for order, count in enumerate(counts):
+            pages = int(count) << order
+            free_pages += pages
+            if order >= HUGEPAGE_ORDER:
+                high_order_pages += pages
+
+    high_order_percent = 0.0
+    if free_pages:
+        high_order_percent = round(100.0 * high_order_pages / free_pages, 2)
+
+    return {
+        'free_pages': free_pages,
+        'high_order_percent': high_order_percent
+    }
+
+
+def performance_mode(verbose, sys_dir='/sys', proc_dir='/proc'):
+    """
+    Gather the memory and CPU settings that decide how the host performs.
+    Every sysfs file is read in one batch, on large machines the governors
+    are read per cpufreq policy instead of per CPU when possible
+    """
+    if verbose:
+        print('Checking memory and CPU performance settings')
+
+    thp_dir = os.path.join(sys_dir, 'kernel/mm/transparent_hugepage')
+    hugepages_dir = os.path.join(sys_dir, 'kernel/mm/hugepages')
+    cpu_dir = os.path.join(sys_dir, 'devices/system/cpu')
+    pools = sorted(glob.glob(os.path.join(hugepages_dir, 'hugepages-*')))
+    governors = glob.glob(
+        os.path.join(cpu_dir, 'cpufreq/policy*/scaling_governor')
+    )
+    policies = [
+        os.path.join(os.path.dirname(path), 'affected_cpus')
+        for path in governors
+    ]
+    if not governors:
+        governors = glob.glob(
+            os.path.join(cpu_dir, 'cpu[0-9]*/cpufreq/scaling_governor')
+        )
+        policies = []
+
+    paths = {
+        'thp_enabled': os.path.join(thp_dir, 'enabled'),
+        'thp_defrag': os.path.join(thp_dir, 'defrag'),
+        'buddyinfo': os.path.join(proc_dir, 'buddyinfo'),
+        'intel_pstate': os.path.join(cpu_dir, 'intel_pstate/status'),
+        'no_turbo': os.path.join(cpu_dir, 'intel_pstate/no_turbo'),
+        'amd_pstate': os.path.join(cpu_dir, 'amd_pstate/status')
+    }
+    batch = list(paths.values()) + governors + policies
+    for pool in pools:
+        batch.append(os.path.join(pool, 'nr_hugepages'))
+        batch.append(os.path.join(pool, 'free_hugepages'))
+
+    values = scanner.read_values(batch)
+    results = {
+        'transparent_hugepage': {
+            'enabled': selected_option(values[paths['thp_enabled']]),
+            'defrag': selected_option(values[paths['thp_defrag']])
+        },
+        'hugepages': {},
+        'governors': {},
+        'pstate': {}
+    }
+    for pool in pools:
+        total = values[os.path.join(pool, 'nr_hugepages')]
+        free = values[os.path.join(pool, 'free_hugepages')]
+        if total is not None and free is not None:
+            results['hugepages'][os.path.basename(pool)[10:]] = {
+                'total': int(total),
+                'free': int(free)
+            }
+
+    if values[paths['buddyinfo']]:
+        results['fragmentation'] = buddy_fragmentation(
+            values[paths['buddyinfo']]
+        )
+
+    for path in governors:
+        governor = values[path]
+        if governor is None:
+            continue
+
+        # A policy can cover several CPUs, count each CPU once
+        cpus = 1
+        affected = os.path.join(os.path.dirname(path), 'affected_cpus')
+        if values.get(affected):
+            cpus = len(values[affected].split())
+
+        results['governors'][governor] = (
+            results['governors'].get(governor, 0) + cpus
+        )
+
+    for driver in ['intel_pstate', 'amd_pstate']:
+        if values[paths[driver]] is not None:
+            results['pstate'] = {
+                'driver': driver,
+                'status': values[paths[driver]]
+            }
+            if driver == 'intel_pstate' and values[paths['no_turbo']]:
+                results['pstate']['no_turbo'] = int(
+                    values[paths['no_turbo']]
+                )
+
+            break
+
+    return results
+
+
+def parse_pressure(content):
+    """
+    Stall totals in microseconds from a /proc/pressure file
+    """
+    totals = {}
+    for line in content.splitlines():
+        fields = line.split()
+        for field in fields[1:]:
+            if field.startswith('total='):
+                totals[fields[0]] = int(field[6:])
+
+    return totals
+
+
+def vmstat_counters(content):
+    """
+    Sum the reclaim, swap and OOM counters in /proc/vmstat. Older kernels
+    split the counters by zone, i.e. pgscan_kswapd_normal
+    """
+    counters = dict((name, 0) for name in VMSTAT_COUNTERS)
+    counters['oom_kill'] = 0
+    for line in content.splitlines():
+        key, _, value = line.partition(' ')
+        if key == 'oom_kill':
+            counters['oom_kill'] = int(value)
+            continue
+
+        for name, prefixes in VMSTAT_COUNTERS.items():
+            for prefix in prefixes:
+                if key.startswith(prefix) and key != 'pgscan_direct_throttle':
+                    counters[name] += int(value)
+
+    return counters
+
+
+def pressure_snapshot(proc_dir='/proc'):
+    """
+    One read of the PSI files and /proc/vmstat. Two snapshots are all the
+    sampler needs, so the overhead does not depend on the length of the
+    window
+    """
+    resources = ['cpu', 'memory', 'io']
+    paths = [os.path.join(proc_dir, 'pressure', x) for x in resources]
+    paths.append(os.path.join(proc_dir, 'vmstat'))
+    values = scanner.read_values(paths)
+    return {
+        'resources': resources,
+        'paths': paths,
+        'values': values,
+        'time': time.time()
+    }
+
+
+def pressure_delta(window, start, end):
+    elapsed = end['time'] - start['time']
+    paths = start['paths']
+    pressure = {'window': window, 'stall': {}}
+    for resource, path in zip(start['resources'], paths):
+        if start['values'][path] is None or end['values'][path] is None:
+            # PSI needs a 4.20 kernel and can be turned off with psi=0
+            continue
+
+        before = parse_pressure(start['values'][path])
+        after = parse_pressure(end['values'][path])
+        pressure['stall'][resource] = dict(
+            (
+                kind,
+                round((after[kind] - before[kind]) / (elapsed * 1e4), 2)
+            )
+            for kind in after if kind in before
+        )
+
+    vmstat = paths[-1]
+    if (
+        start['values'][vmstat] is not None and
+        end['values'][vmstat] is not None
+    ):
+        before = vmstat_counters(start['values'][vmstat])
+        after = vmstat_counters(end['values'][vmstat])
+        pressure['reclaim'] = dict(
+            (name, round((after[name] - before[name]) / elapsed, 2))
+            for name in VMSTAT_COUNTERS
+        )
+        pressure['oom_kills'] = {
+            'window': after['oom_kill'] - before['oom_kill'],
+            'since_boot': after['oom_kill']
+        }
+
+    return pressure
+
+
+def parse_net_dev(content):
+    """
+    Counters for every interface in /proc/net/dev
+    """
+    counters = {}
+    for line in content.splitlines():
+        if ':' not in line:
+            # The two header lines
+            continue
+
+        name, values = line.split(':', 1)
+        counters[name.strip()] = dict(
+            zip(NET_DEV_FIELDS, [int(x) for x in values.split()])
+        )
+
+    return counters
+
+
+def nic_snapshot(proc_dir='/proc', sys_dir='/sys'):
+    """
+    Counters of the active interfaces and the link speed of each one
+    """
+    net_dev = os.path.join(proc_dir, 'net/dev')
+    counters = parse_net_dev(scanner.read_values([net_dev])[net_dev] or '')
+    snapshot_time = time.time()
+    interfaces = active_interfaces(counters.keys())
+    speed_paths = dict(
+        (name, os.path.join(sys_dir, 'class/net', name, 'speed'))
+        for name in interfaces
+    )
+    speeds = scanner.read_values(speed_paths.values())
+    return {
+        'counters': counters,
+        'interfaces': interfaces,
+        'speeds': dict(
+            (name, speeds[path]) for name, path in speed_paths.items()
+        ),
+        'time': snapshot_time
+    }
+
+
+def nic_delta(window, start, end):
+    elapsed = end['time'] - start['time']
+    before = start['counters']
+    after = end['counters']
+    nic = {'window': window, 'interfaces': {}}
+    for name in sorted(start['interfaces']):
+        if name not in after:
+            # The interface went away during the window
+            continue
+
+        # Virtual interfaces report -1 or fail to read when there is no
+        # link speed
+        speed = start['speeds'][name]
+        speed = int(speed) if speed and int(speed) > 0 else None
+        rx_mbps = round(
+            (after[name]['rx_bytes'] - before[name]['rx_bytes']) * 8 /
+            (elapsed * 1e6),
+            2
+        )
+        tx_mbps = round(
+            (after[name]['tx_bytes'] - before[name]['tx_bytes']) * 8 /
+            (elapsed * 1e6),
+            2
+        )
+        utilization = None
+        if speed:
+            utilization = round(100.0 * max(rx_mbps, tx_mbps) / speed, 2)
+
+        nic['interfaces'][name] = {
+            'speed_mbps': speed,
+            'rx_mbps': rx_mbps,
+            'tx_mbps': tx_mbps,
+            'utilization': utilization,
+            'rates': dict(
+                (
+                    counter,
+                    round(
+                        (after[name][counter] - before[name][counter]) /
+                        elapsed,
+                        2
+                    )
+                )
+                for counter in NIC_ERRORS
+            ),
+            'since_boot': dict(
+                (counter, after[name][counter]) for counter in NIC_ERRORS
+            )
+        }
+
+    return nic
+
+
+def cpu_stat_slots(content):
+    """
+    Number of slots needed for the cpu lines in /proc/stat, slot 0 is the
+    aggregate line and cpuN is slot N + 1 so offline CPUs keep their place
+    """
+    slots = 1
+    for line in content.splitlines():
+        if not line.startswith('cpu'):
+            break
+
+        name = line.split(None, 1)[0]
+        if name != 'cpu':
+            slots = max(slots, int(name[3:]) + 2)
+
+    return slots
+
+
+def parse_cpu_stat(content, times):
+    """
+    Fill the preallocated times array from the cpu lines of /proc/stat
+    without creating a list per CPU
+    """
+    width = len(CPU_STAT_FIELDS)
+    slots = len(times) // width
+    for line in content.splitlines():
+        if not line.startswith('cpu'):
+            # The cpu lines always come first
+            break
+
+        fields = line.split()
+        slot = 0 if fields[0] == 'cpu' else int(fields[0][3:]) + 1
+        if slot >= slots:
+            continue
+
+        base = slot * width
+        for index in range(min(width, len(fields) - 1)):
+            times[base + index] = float(fields[index + 1])
+
+
+def cpu_percentages(start, end, slot):
+    """
+    Percentage of the time spent in each reported field for a slot, or None
+    when the CPU was offline
+    """
+    width = len(CPU_STAT_FIELDS)
+    base = slot * width
+    total = 0.0
+    for index in range(width):
+        total += end[base + index] - start[base + index]
+
+    if total <= 0:
+        return None
+
+    return dict(
+        (
+            name,
+            round(
+                100.0 * (
+                    end[base + CPU_STAT_FIELDS.index(name)] -
+                    start[base + CPU_STAT_FIELDS.index(name)]
+                ) / total,
+                2
+            )
+        )
+        for name in CPU_STEAL['aggregate']
+    )
+
+
+def cgroup_cpu_stat(proc_dir='/proc', cgroup_dir='/sys/fs/cgroup'):
+    """
+    Path of cpu.stat for the cgroup this process runs in, for cgroup v1 and
+    v2. None when there is no cpu controller
+    """
+    try:
+        content = scanner.read_file(
+            os.path.join(proc_dir, 'self/cgroup'),
+            cache=False
+        )
+    except (IOError, OSError):
+        return None
+
+    candidates = []
+    for line in content.splitlines():
+        _, controllers, path = line.split(':', 2)
+        path = path.lstrip('/')
+        if 'cpu' in controllers.split(','):
+            candidates.append(os.path.join(cgroup_dir, controllers, path))
+            candidates.append(os.path.join(cgroup_dir, 'cpu', path))
+        elif controllers == '':
+            candidates.append(os.path.join(cgroup_dir, path))
+            candidates.append(os.path.join(cgroup_dir, 'unified', path))
+
+    for candidate in candidates:
+        stat = os.path.join(candidate, 'cpu.stat')
+        if os.path.isfile(stat):
+            return stat
+
+    return None
+
+
+def parse_throttling(content):
+    values = {}
+    for line in content.splitlines():
+        key, _, value = line.partition(' ')
+        values[key] = int(value)
+
+    # v1 reports nanoseconds and v2 microseconds
+    if 'throttled_usec' in values:
+        values['throttled_seconds'] = values['throttled_usec'] / 1e6
+    else:
+        values['throttled_seconds'] = values.get('throttled_time', 0) / 1e9
+
+    return values
+
+
+def cpu_steal_snapshot(proc_dir='/proc', cgroup_dir='/sys/fs/cgroup'):
+    """
+    Per CPU times from /proc/stat and the cgroup throttling counters
+    """
+    stat_path = os.path.join(proc_dir, 'stat')
+    throttle_path = cgroup_cpu_stat(proc_dir, cgroup_dir)
+    paths = [stat_path]
+    if throttle_path is not None:
+        paths.append(throttle_path)
+
+    values = scanner.read_values(paths)
+    return {
+        'stat': values[stat_path],
+        'throttle_path': throttle_path,
+        'throttle': values.get(throttle_path)
+    }
+
+
+def cpu_steal_delta(window, first, second):
+    """
+    The times of every CPU are parsed into two arrays allocated up front, so
+    hundreds of CPUs cost two passes over /proc/stat
+    """
+    slots = cpu_stat_slots(first['stat'])
+    start = array('d', [0.0]) * (slots * len(CPU_STAT_FIELDS))
+    end = array('d', [0.0]) * (slots * len(CPU_STAT_FIELDS))
+    parse_cpu_stat(first['stat'], start)
+    parse_cpu_stat(second['stat'], end)
+
+    cores = dict((name, []) for name in CPU_STEAL['aggregate'])
+    for slot in range(1, slots):
+        percentages = cpu_percentages(start, end, slot)
+        for name in cores:
+            cores[name].append(
+                None if percentages is None else percentages[name]
+            )
+
+    steal = {
+        'window': window,
+        'cpus': slots - 1,
+        'aggregate': cpu_percentages(start, end, 0),
+        'cores': cores
+    }
+    throttle_path = first['throttle_path']
+    if (
+        throttle_path is not None and
+        first['throttle'] is not None and
+        second['throttle'] is not None
+    ):
+        before = parse_throttling(first['throttle'])
+        after = parse_throttling(second['throttle'])
+        periods = after.get('nr_periods', 0) - before.get('nr_periods', 0)
+        throttled = (
+            after.get('nr_throttled', 0) - before.get('nr_throttled', 0)
+        )
+        steal['throttling'] = {
+            'cgroup': os.path.dirname(throttle_path),
+            'periods': periods,
+            'throttled': throttled,
+            'throttled_percent': (
+                round(100.0 * throttled / periods, 2) if periods else 0.0
+            ),
+            'throttled_seconds': round(
+                after['throttled_seconds'] - before['throttled_seconds'],
+                3
+            )
+        }
+
+    return steal
+
+
+def sample_counters(
+    window,
+    verbose,
+    proc_dir='/proc',
+    sys_dir='/sys',
+    cgroup_dir='/sys/fs/cgroup'
+):
+    """
+    Take the start snapshot of every sampler, sleep for the window once and
+    take the end snapshots, so the pressure, CPU steal and NIC checks share
+    a single window instead of waiting for one each
+    """
+    if verbose:
+        print(
+            'Sampling pressure, CPU steal and interface counters for {0} '
+            'seconds'.format(window)
+        )
+
+    samplers = [
+        ('pressure', pressure_snapshot, pressure_delta, (proc_dir,)),
+        (
+            'cpu_steal',
+            cpu_steal_snapshot,
+            cpu_steal_delta,
+            (proc_dir, cgroup_dir)
+        ),
+        ('nic', nic_snapshot, nic_delta, (proc_dir, sys_dir))
+    ]
+    starts = [snapshot(*dirs) for _, snapshot, _, dirs in samplers]
+    time.sleep(window)
+    return dict(
+        (name, delta(window, start, snapshot(*dirs)))
+        for (name, snapshot, delta, dirs), start in zip(samplers, starts)
+    )
+
+
 def mounts_check(verbose):
     """
     Checking mount points to ensure that there is enough space for everything
@@ -239,9 +1149,23 @@ def mounts_check(verbose):
     mounts = {}
     for mountpoint, mount_data in found_mounts.items():
         mounts[mountpoint] = {}
-        temp_usage = psutil.disk_usage(mountpoint)
-        mounts[mountpoint]['free'] = round((temp_usage.free / 1024.0**3), 2)
-        mounts[mountpoint]['total'] = round((temp_usage.total / 1024.0**3), 2)
+        # One statvfs call gives both the space and the inodes, free space is
+        # what is available to non root users like disk_usage reports it
+        stats = os.statvfs(mountpoint)
+        total = stats.f_blocks * stats.f_frsize
+        free = stats.f_bavail * stats.f_frsize
+        mounts[mountpoint]['free'] = round((free / 1024.0**3), 2)
+        mounts[mountpoint]['total'] = round((total / 1024.0**3), 2)
+        if stats.f_files:
+            # Some file systems such as btrfs have no fixed inode count
+            mounts[mountpoint]['inodes_total'] = stats.f_files
+            mounts[mountpoint]['inodes_free'] = stats.f_favail
+            mounts[mountpoint]['bytes_per_inode'] = total // stats.f_files
+            if free:
+                mounts[mountpoint]['files_per_gb'] = int(
+                    stats.f_favail / (free / 1024.0**3)
+                )
+
         mounts[mountpoint]['mount_options'] = mount_data.get('options')
         mounts[mountpoint]['file_system'] = mount_data.get('file_system')
         if '/tmp' in mountpoint:
@@ -272,10 +1196,16 @@ def mounts_check(verbose):
             root_total -= 100.0
 
     mounts['/']['recommended'] = root_total
+    for mountpoint in mounts:
+        if 'inodes_total' in mounts[mountpoint]:
+            mounts[mountpoint]['recommended_inodes'] = int(
+                mounts[mountpoint]['recommended'] * INODES_PER_GB
+            )
+
     return mounts
 
 
-def check_modules(distro, version, verbose):
+def check_modules(distro, version, verbose, proc_dir='/proc'):
     """
     Check for modules and ensure things are enabled
     """
@@ -291,7 +1221,14 @@ def check_modules(distro, version, verbose):
 
     missing = []
     enabled = []
-    lsmod_result = execute_command(['lsmod'], verbose)
+    if proc_dir != '/proc':
+        # lsmod only lists the modules of the running kernel
+        lsmod_result = execute_command(
+            ['cat', os.path.join(proc_dir, 'modules')],
+            verbose
+        )
+    else:
+        lsmod_result = execute_command(['lsmod'], verbose)
     for module in modules:
         search_for = module
         if type(lsmod_result) == bytes:
@@ -324,27 +1261,26 @@ def check_system_type(based_on, version, verbose):
     return supported
 
 
-def selinux(selinux_config, verbose):
+def selinux(selinux_config, verbose, running=True):
     """
-    Check selinux and make sure it is in a good state
+    Check selinux and make sure it is in a good state. An offline root is not
+    running, it boots into the mode from its config
     """
     if verbose:
         print('Checking selinux status and configuration')
 
-    value = execute_command(['getenforce'], verbose)
-    config_option = 'disabled'
-    with open(selinux_config) as f:
-        temp = f.readline()
-        while temp:
-            search = re.search(r'^SELINUX=(.*)$', temp)
-            if search:
-                config_option = search.group(1)
-                break
-            else:
-                temp = f.readline()
+    config_option = SELINUX_SCANNER.scan_file(selinux_config)['selinux']
+    if config_option is None:
+        config_option = 'disabled'
+
+    if running:
+        value = execute_command(['getenforce'], verbose)
+        value = value.decode('utf-8')
+    else:
+        value = config_option
 
     status = {
-        'getenforce': value.decode('utf-8').strip().lower(),
+        'getenforce': value.strip().lower(),
         'config': config_option.lower()
     }
     return status
@@ -384,30 +1320,65 @@ def inspect_resolv_conf(resolv_conf_location, verbose):
     Ensure that resolv.conf does not have anything that might interfere
     with kubernetes
     """
-    all_options = []
     if verbose:
         print('Checking {0}'.format(resolv_conf_location))
 
-    with open(resolv_conf_location) as f:
-        temp = f.readline()
-        while temp:
-            domains = re.search(r'^search\s(.*)$', temp)
-            options = re.search(r'^options\s(.*)$', temp)
-            if domains:
-                search_domains = domains.group(1).split(' ')
-
-            if options:
-                all_options.append(options.group(1))
-
-            temp = f.readline()
+    found = RESOLV_SCANNER.scan_file(resolv_conf_location)
+    # The resolver only uses the last search line when there are several
+    search_domains = []
+    if found['search']:
+        search_domains = found['search'][-1].split()
 
     status = {
         'search_domains': search_domains,
-        'options': all_options
+        'options': found['options'],
+        'nameservers': found['nameservers'],
+        'resolver': resolver_options(found['options'])
     }
     return status
 
 
+def resolver_options(options):
+    """
+    ndots, timeout and attempts as the resolver sees them, later options win
+    and values are capped the same way the resolver caps them
+    """
+    resolver = {}
+    for name, limits in RESOLVER_OPTIONS.items():
+        resolver[name] = limits['default']
+
+    for line in options:
+        for option in line.split():
+            name, _, value = option.partition(':')
+            if name in RESOLVER_OPTIONS and value.isdigit():
+                resolver[name] = min(
+                    int(value),
+                    RESOLVER_OPTIONS[name]['maximum']
+                )
+
+    return resolver
+
+
+def dns_probe(resolv, names, verbose):
+    """
+    Query the nameservers from resolv.conf for the names, expanded with the
+    search domains the same way the resolver expands them
+    """
+    if not resolv or not resolv.get('nameservers'):
+        return None
+
+    resolver = resolv['resolver']
+    return dnsprobe.probe_nameservers(
+        list(resolv['nameservers']),
+        names,
+        list(resolv['search_domains']),
+        resolver['ndots'],
+        resolver['timeout'],
+        DNS_PROBE['rounds'],
+        verbose
+    )
+
+
 def check_open_ports(interface, verbose):
     open_ports = {}
     if interface:
@@ -431,369 +1402,2168 @@ def check_open_ports(interface, verbose):
     return open_ports
 
 
-def suse_infinity_check(system_file, verbose):
-    infinity_set = False
+def port_plan(verbose, proc_dir='/proc', plan=portplan.PLAN):
+    """
+    Ports of the plan that sockets on the host already listen on, and the
+    ones in the ephemeral range that are not reserved, as compact ranges.
+    None when the listening sockets can not be read
+    """
     if verbose:
-        print('Checking setting for Suse Linux in {0}'.format(system_file))
+        print('Checking the port plan against the listening sockets')
 
-    with open(system_file) as f:
-        temp = f.readline()
-        while temp:
-            infinity_check = re.search(r'^DefaultTasksMax=infinity', temp)
-            if infinity_check:
-                infinity_set = True
-                break
+    ipv4 = os.path.join(proc_dir, 'sys/net/ipv4')
+    paths = {
+        'range': os.path.join(ipv4, 'ip_local_port_range'),
+        'reserved': os.path.join(ipv4, 'ip_local_reserved_ports')
+    }
+    for files, _ in portplan.LISTENER_FILES.values():
+        for name in files:
+            paths[name] = os.path.join(proc_dir, name)
+
+    values = scanner.read_values(paths.values())
+    planned = portplan.plan_bitmaps(plan)
+    results = {
+        'planned': dict(
+            (protocol, bin(bitmap).count('1'))
+            for protocol, bitmap in planned.items()
+        ),
+        'ephemeral': None,
+        'reserved': values[paths['reserved']] or None,
+        'conflicts': {},
+        'ephemeral_overlap': {},
+        'recommended_reserved': None
+    }
 
-            temp = f.readline()
+    found_listeners = False
+    for protocol, (files, state) in portplan.LISTENER_FILES.items():
+        listeners = []
+        for name in files:
+            if values[paths[name]] is not None:
+                found_listeners = True
+                listeners.extend(
+                    portplan.parse_listeners(values[paths[name]], state)
+                )
 
-    return infinity_set
+        listeners = portplan.plan_listeners(listeners)
+        listening = portplan.to_bitmap(
+            [(port, port) for _, port in listeners]
+        )
+        for first, last in portplan.to_ranges(planned[protocol] & listening):
+            results['conflicts'][
+                '{0}/{1}'.format(
+                    protocol,
+                    portplan.format_ranges([(first, last)])
+                )
+            ] = {
+                'services': portplan.services(plan, protocol, first, last),
+                'listeners': sorted(
+                    set(
+                        '{0}:{1}'.format(host, port)
+                        for host, port in listeners
+                        if first <= port <= last
+                    )
+                )
+            }
 
+    if not found_listeners:
+        return None
 
-def check_sysctl(verbose):
-    enabled = []
-    disabled = []
-    if verbose:
-        print('Checking sysctl settings on system')
+    if values[paths['range']]:
+        first, last = [int(x) for x in values[paths['range']].split()]
+        results['ephemeral'] = '{0}-{1}'.format(first, last)
+        # Both protocols take their ephemeral ports from the same range
+        reserved = portplan.to_bitmap(
+            portplan.parse_ranges(results['reserved'] or '')
+        )
+        in_range = (
+            (planned['tcp'] | planned['udp']) &
+            portplan.to_bitmap([(first, last)])
+        )
+        for first, last in portplan.to_ranges(in_range & ~reserved):
+            results['ephemeral_overlap'][
+                portplan.format_ranges([(first, last)])
+            ] = {
+                'services': portplan.services(plan, None, first, last),
+                'listeners': []
+            }
 
-    for setting in DEFAULT_SYSCTL:
-        temp_result = execute_command(
-            ['sysctl', setting],
-            verbose
-        ).decode('utf-8')
-        if temp_result:
-            result = temp_result.split('=')[1].strip()
-            if str(result) == '1':
-                enabled.append(setting)
-            else:
-                disabled.append(setting)
+        if results['ephemeral_overlap']:
+            results['recommended_reserved'] = portplan.format_ranges(
+                portplan.to_ranges(reserved | in_range)
+            )
+
+    return results
+
+
+def suse_infinity_check(system_file, verbose):
+    if verbose:
+        print('Checking setting for Suse Linux in {0}'.format(system_file))
+
+    found = INFINITY_SCANNER.scan_file(system_file)
+    return found['infinity'] is not None
+
+
+def read_sysctl(settings, sysctl_dir):
+    """
+    Read the settings straight from /proc/sys in one pass instead of running
+    sysctl for each one. Settings that do not exist are None
+    """
+    paths = dict(
+        (setting, os.path.join(sysctl_dir, *setting.split('.')))
+        for setting in settings
+    )
+    values = scanner.read_values(paths.values())
+    return dict((setting, values[paths[setting]]) for setting in settings)
+
+
+def sysctl_limits(rule, memory, cores):
+    """
+    Minimum and maximum allowed for a tuning rule, scaled by the memory in GB
+    and the number of cores when the rule asks for it
+    """
+    if rule['rule'] == 'range':
+        return rule['minimum'], rule['maximum']
+
+    if rule['rule'] == 'exact':
+        return rule['value'], rule['value']
+
+    value = rule['value']
+    if memory and rule.get('per_gb'):
+        value = max(value, int(rule['per_gb'] * memory))
+
+    if cores and rule.get('per_core'):
+        value = max(value, int(rule['per_core'] * cores))
+
+    if rule['rule'] == 'minimum':
+        return value, None
+
+    return None, value
+
+
+def check_sysctl(verbose, memory=None, cores=None, sysctl_dir='/proc/sys'):
+    enabled = []
+    disabled = []
+    tuning = {}
+    if verbose:
+        print('Checking sysctl settings on system')
+
+    values = read_sysctl(
+        DEFAULT_SYSCTL + [setting for _, setting, _ in SYSCTL_TUNING],
+        sysctl_dir
+    )
+    for setting in DEFAULT_SYSCTL:
+        if values[setting] == '1':
+            enabled.append(setting)
         else:
             disabled.append(setting)
 
-    sysctl_modules = {'enabled': enabled, 'disabled': disabled}
-    return sysctl_modules
+    for subsystem, setting, rule in SYSCTL_TUNING:
+        minimum, maximum = sysctl_limits(rule, memory, cores)
+        tuning[setting] = {
+            'subsystem': subsystem,
+            'rule': rule['rule'],
+            'minimum': minimum,
+            'maximum': maximum
+        }
+        try:
+            actual = int(values[setting])
+        except (TypeError, ValueError):
+            # Not available on this kernel or the module is not loaded
+            tuning[setting]['result'] = 'SKIPPED'
+            continue
+
+        tuning[setting]['actual'] = actual
+        if (
+            (minimum is not None and actual < minimum) or
+            (maximum is not None and actual > maximum)
+        ):
+            tuning[setting]['result'] = 'WARN'
+        else:
+            tuning[setting]['result'] = 'PASS'
+
+    sysctl_modules = {
+        'enabled': enabled,
+        'disabled': disabled,
+        'tuning': tuning
+    }
+    return sysctl_modules
+
+
+def parse_limit(value):
+    """
+    Turn a limit from limits.conf or systemd into a number, None is unlimited.
+    Returns False for a value that is not a limit, so it is left out
+    """
+    if value in ['unlimited', 'infinity', '-1']:
+        return None
+
+    try:
+        return int(value)
+    except ValueError:
+        return False
+
+
+def usage(used, limit, recommended):
+    headroom = None
+    if limit:
+        headroom = round(100.0 * (limit - used) / limit, 2)
+
+    return {
+        'used': used,
+        'limit': limit,
+        'headroom': headroom,
+        'recommended': recommended
+    }
+
+
+def capacity_check(
+    verbose,
+    memory=None,
+    cores=None,
+    proc_dir='/proc',
+    etc_dir='/etc'
+):
+    """
+    Compare the file handles, processes and threads in use against their
+    limits, and read the per user nofile and nproc limits that are set
+    """
+    if verbose:
+        print('Checking file descriptor, process and thread capacity')
+
+    sysctl_dir = os.path.join(proc_dir, 'sys')
+    values = scanner.read_values(
+        [
+            os.path.join(sysctl_dir, 'fs/file-nr'),
+            os.path.join(sysctl_dir, 'kernel/pid_max'),
+            os.path.join(sysctl_dir, 'kernel/threads-max'),
+            os.path.join(proc_dir, 'loadavg')
+        ]
+    )
+    tuning = dict(
+        (setting, rule) for _, setting, rule in SYSCTL_TUNING
+    )
+    capacity = {}
+    file_nr = values[os.path.join(sysctl_dir, 'fs/file-nr')]
+    if file_nr:
+        allocated, unused, maximum = [int(x) for x in file_nr.split()]
+        capacity['file_handles'] = usage(
+            allocated - unused,
+            maximum,
+            sysctl_limits(tuning['fs.file-max'], memory, cores)[0]
+        )
+
+    pid_max = values[os.path.join(sysctl_dir, 'kernel/pid_max')]
+    if pid_max:
+        capacity['processes'] = usage(
+            len([x for x in os.listdir(proc_dir) if x.isdigit()]),
+            int(pid_max),
+            sysctl_limits(tuning['kernel.pid_max'], memory, cores)[0]
+        )
+
+    # The last field of loadavg is running/total scheduling entities, which
+    # counts every thread without walking /proc/*/task
+    threads_max = values[os.path.join(sysctl_dir, 'kernel/threads-max')]
+    loadavg = values[os.path.join(proc_dir, 'loadavg')]
+    if threads_max and loadavg:
+        capacity['threads'] = usage(
+            int(loadavg.split()[3].split('/')[1]),
+            int(threads_max),
+            sysctl_limits(CAPACITY['threads'], memory, cores)[0]
+        )
+
+    systemd_files = [os.path.join(etc_dir, 'systemd/system.conf')] + sorted(
+        glob.glob(os.path.join(etc_dir, 'systemd/system.conf.d/*.conf'))
+    )
+    for path in systemd_files:
+        try:
+            found = SYSTEMD_LIMITS_SCANNER.scan_file(path)
+        except (IOError, OSError):
+            continue
+
+        # Drop ins are read after system.conf and the last setting wins
+        if not found['nofile']:
+            continue
+
+        soft, _, hard = found['nofile'][-1].strip().partition(':')
+        soft = parse_limit(soft)
+        hard = parse_limit(hard) if hard else soft
+        if soft is False or hard is False:
+            # An empty value resets the limit to the systemd default, which
+            # is not known here, same as a value that can not be read
+            capacity.pop('systemd_nofile', None)
+            continue
+
+        capacity['systemd_nofile'] = {'soft': soft, 'hard': hard}
+
+    limit_files = [os.path.join(etc_dir, 'security/limits.conf')] + sorted(
+        glob.glob(os.path.join(etc_dir, 'security/limits.d/*.conf'))
+    )
+    limits = []
+    for path in limit_files:
+        try:
+            found = LIMITS_SCANNER.scan_file(path)
+        except (IOError, OSError):
+            continue
+
+        for line in found['limits']:
+            domain, limit_type, item, value = line.split()
+            value = parse_limit(value)
+            if value is False:
+                continue
+
+            limits.append(
+                {
+                    'domain': domain,
+                    'type': limit_type,
+                    'item': item,
+                    'value': value,
+                    'file': path
+                }
+            )
+
+    capacity['limits'] = limits
+    capacity['recommended'] = {
+        'nofile': sysctl_limits(CAPACITY['nofile'], memory, cores)[0],
+        'nproc': sysctl_limits(CAPACITY['nproc'], memory, cores)[0]
+    }
+    return capacity
+
+
+def conntrack_stats(stat):
+    """
+    Sum the per CPU counters in /proc/net/stat/nf_conntrack, which are hex
+    """
+    lines = stat.splitlines()
+    names = lines[0].split()
+    totals = dict((name, 0) for name in names)
+    for line in lines[1:]:
+        for name, value in zip(names, line.split()):
+            totals[name] += int(value, 16)
+
+    return dict(
+        (name, totals[name]) for name in CONNTRACK_DROPS if name in totals
+    )
+
+
+def conntrack_check(verbose, memory=None, cores=None, proc_dir='/proc'):
+    """
+    Conntrack table usage, size and drop counters. None when nf_conntrack is
+    not loaded
+    """
+    if verbose:
+        print('Checking conntrack table size and usage')
+
+    netfilter = os.path.join(proc_dir, 'sys/net/netfilter')
+    paths = {
+        'count': os.path.join(netfilter, 'nf_conntrack_count'),
+        'max': os.path.join(netfilter, 'nf_conntrack_max'),
+        'buckets': os.path.join(netfilter, 'nf_conntrack_buckets'),
+        'stat': os.path.join(proc_dir, 'net/stat/nf_conntrack')
+    }
+    values = scanner.read_values(paths.values())
+    if values[paths['count']] is None or values[paths['max']] is None:
+        return None
+
+    rule = [
+        x for _, setting, x in SYSCTL_TUNING
+        if setting == 'net.netfilter.nf_conntrack_max'
+    ][0]
+    recommended_max = sysctl_limits(rule, memory, cores)[0]
+    conntrack = {
+        'count': int(values[paths['count']]),
+        'max': int(values[paths['max']]),
+        'recommended_max': recommended_max,
+        'recommended_buckets': (
+            recommended_max // CONNTRACK_ENTRIES_PER_BUCKET
+        )
+    }
+    conntrack['utilization'] = round(
+        100.0 * conntrack['count'] / conntrack['max'],
+        2
+    )
+    if values[paths['buckets']] is not None:
+        conntrack['buckets'] = int(values[paths['buckets']])
+
+    if values[paths['stat']]:
+        conntrack['stats'] = conntrack_stats(values[paths['stat']])
+
+    return conntrack
+
+
+SEPARATOR = '---------------------------------------------------------\n'
+
+
+def report_profile(f, profile, system_info):
+    # Compatability and basic system info
+    f.write('\nOS Information\n')
+    f.write('Name:     {0}\n'.format((profile.distribution or '').title()))
+    f.write('Version:  {0}\n'.format(profile.version))
+    f.write('Based On: {0}\n\n'.format(profile.based_on))
+    return None
+
+
+def report_compatability(f, compatability, system_info):
+    result = 'PASS'
+    f.write('\nCompatability\n')
+    f.write('Supported OS:      {0}\n'.format(compatability.os))
+    f.write('Supported Version: {0}\n\n'.format(compatability.version))
+    if compatability.os == 'FAIL' or compatability.version == 'FAIL':
+        result = 'FAIL'
+
+    return result
+
+
+def report_resources(f, resources, system_info):
+    memory = resources.memory
+    f.write('\nMemory\n')
+    f.write('Minimum: {0}\n'.format(memory.minimum))
+    f.write('Actual:  {0}\n'.format(memory.actual))
+    memory_result = 'FAIL'
+    if memory.actual >= memory.minimum:
+        memory_result = 'PASS'
+
+    f.write('Memory:  {0}\n\n'.format(memory_result))
+    f.write(SEPARATOR)
+
+    # Cores
+    cores = resources.cpu_cores
+    core_result = 'FAIL'
+    f.write('\nCPU Cores\n')
+    f.write('Minimum:  {0}\n'.format(cores.minimum))
+    f.write('Actual:   {0}\n'.format(cores.actual))
+    if cores.actual >= cores.minimum:
+        core_result = 'PASS'
+
+    f.write('CPU Core: {0}\n\n'.format(core_result))
+    return plugins.merge_verdicts(memory_result, core_result)
+
+
+def sysctl_tuned(setting):
+    """
+    True when the sysctl section recommends a value for the setting, other
+    sections point there instead of repeating it
+    """
+    return setting in [name for _, name, _ in SYSCTL_TUNING]
+
+
+def report_capacity(f, capacity, system_info):
+    capacity_result = 'PASS'
+    recommendations = []
+    tuned = []
+    f.write('\nCapacity\n')
+    for name, label, setting in [
+        ('file_handles', 'File Handles:', 'fs.file-max'),
+        ('processes', 'Processes:   ', 'kernel.pid_max'),
+        ('threads', 'Threads:     ', 'kernel.threads-max')
+    ]:
+        resource = capacity.get(name)
+        if resource is None:
+            continue
+
+        f.write(
+            '{0} {1} of {2} used, {3}% headroom\n'.format(
+                label,
+                resource.used,
+                resource.limit,
+                resource.headroom
+            )
+        )
+        if resource.headroom < CAPACITY['fail_headroom']:
+            capacity_result = 'FAIL'
+        elif resource.headroom < CAPACITY['warn_headroom']:
+            capacity_result = plugins.merge_verdicts(capacity_result, 'WARN')
+
+        if resource.limit < resource.recommended:
+            capacity_result = plugins.merge_verdicts(capacity_result, 'WARN')
+            if sysctl_tuned(setting):
+                tuned.append(setting)
+            else:
+                recommendations.append(
+                    '{0} = {1}'.format(setting, resource.recommended)
+                )
+
+    recommended = capacity.recommended
+    systemd_nofile = capacity.get('systemd_nofile')
+    if systemd_nofile is not None:
+        f.write(
+            'systemd DefaultLimitNOFILE: {0} soft, {1} hard\n'.format(
+                systemd_nofile.soft or 'unlimited',
+                systemd_nofile.hard or 'unlimited'
+            )
+        )
+        if (
+            systemd_nofile.hard is not None and
+            systemd_nofile.hard < recommended['nofile']
+        ):
+            capacity_result = plugins.merge_verdicts(capacity_result, 'WARN')
+            recommendations.append(
+                'DefaultLimitNOFILE={0}:{1} in {2}'.format(
+                    systemd_nofile.soft or 'infinity',
+                    recommended['nofile'],
+                    '/etc/systemd/system.conf'
+                )
+            )
+
+    for limit in capacity.limits:
+        f.write(
+            'Limit: {0} {1} {2} {3} ({4})\n'.format(
+                limit['domain'],
+                limit['type'],
+                limit['item'],
+                limit['value'] or 'unlimited',
+                limit['file']
+            )
+        )
+        # Soft limits are meant to be low, only the hard limit caps usage
+        if (
+            limit['type'] != 'soft' and
+            limit['value'] is not None and
+            limit['value'] < recommended[limit['item']]
+        ):
+            capacity_result = plugins.merge_verdicts(capacity_result, 'WARN')
+            recommendations.append(
+                '{0} {1} {2} {3} in {4}'.format(
+                    limit['domain'],
+                    limit['type'],
+                    limit['item'],
+                    recommended[limit['item']],
+                    limit['file']
+                )
+            )
+
+    if recommendations:
+        f.write('\nRecommended:\n')
+        for recommendation in recommendations:
+            f.write('{0}\n'.format(recommendation))
+
+    if tuned:
+        f.write(
+            '\nNote: The recommended {0} {1} under Kernel Tuning in the '
+            'Sysctl Settings section\n'.format(
+                ' and '.join(tuned),
+                'are' if len(tuned) > 1 else 'is'
+            )
+        )
+
+    f.write('\nCapacity Result: {0}\n\n'.format(capacity_result))
+    return capacity_result
+
+
+def report_pressure(f, pressure, system_info):
+    if not pressure:
+        return None
+
+    pressure_result = 'PASS'
+    warnings = []
+    f.write('\nPressure\n')
+    f.write('Window: {0} seconds\n'.format(pressure.window))
+    if not pressure.stall:
+        f.write('Stalls: PSI not available\n')
+
+    for resource, label in [
+        ('cpu', 'CPU'),
+        ('memory', 'Memory'),
+        ('io', 'IO')
+    ]:
+        stall = pressure.stall.get(resource)
+        if stall is None:
+            continue
+
+        f.write(
+            '{0} Stall: {1}\n'.format(
+                label,
+                ', '.join(
+                    '{0} {1}%'.format(kind, stall[kind])
+                    for kind in sorted(stall.keys())
+                )
+            )
+        )
+        for kind, threshold in PRESSURE['stall'][resource].items():
+            if stall.get(kind, 0) >= threshold:
+                warnings.append(
+                    '{0} {1} stall of {2}% is over {3}%'.format(
+                        resource,
+                        kind,
+                        stall[kind],
+                        threshold
+                    )
+                )
+
+    reclaim = pressure.get('reclaim')
+    if reclaim is not None:
+        f.write(
+            'Reclaim: {0} kswapd, {1} direct pages/s\n'.format(
+                reclaim['kswapd_scan'],
+                reclaim['direct_scan']
+            )
+        )
+        f.write(
+            'Swap:    {0} in, {1} out pages/s\n'.format(
+                reclaim['swap_in'],
+                reclaim['swap_out']
+            )
+        )
+        for name in ['direct_scan', 'swap_in', 'swap_out']:
+            if reclaim[name] >= PRESSURE[name]:
+                warnings.append(
+                    '{0} of {1} pages/s is over {2}'.format(
+                        name.replace('_', ' '),
+                        reclaim[name],
+                        PRESSURE[name]
+                    )
+                )
+
+    oom_kills = pressure.get('oom_kills')
+    if oom_kills is not None:
+        f.write(
+            'OOM Kills: {0} during the window, {1} since boot\n'.format(
+                oom_kills['window'],
+                oom_kills['since_boot']
+            )
+        )
+        if oom_kills['window'] > 0:
+            warnings.append('processes were OOM killed during the window')
+
+    if warnings:
+        pressure_result = 'WARN'
+        f.write('\n')
+        for warning in warnings:
+            f.write('WARNING: {0}\n'.format(warning))
+
+        f.write(
+            'The host is already busy with other workloads and may not have '
+            'room for Anaconda Enterprise\n'
+        )
+
+    f.write('\nPressure Result: {0}\n\n'.format(pressure_result))
+    return pressure_result
+
+
+def report_nic(f, nic, system_info):
+    if not nic:
+        return None
+
+    nic_result = 'PASS'
+    problems = []
+    f.write('\nNetwork Interfaces\n')
+    f.write('Window: {0} seconds\n'.format(nic.window))
+    for interface in sorted(nic.interfaces, key=lambda x: x.interface):
+        speed = 'unknown'
+        if interface.speed_mbps:
+            speed = '{0} Mb/s'.format(interface.speed_mbps)
+
+        f.write('\n{0}\n'.format(interface.interface))
+        f.write('Link Speed: {0}\n'.format(speed))
+        f.write(
+            'Throughput: {0} Mb/s rx, {1} Mb/s tx\n'.format(
+                interface.rx_mbps,
+                interface.tx_mbps
+            )
+        )
+        if interface.utilization is not None:
+            f.write('Utilization: {0}%\n'.format(interface.utilization))
+            for level, verdict in [('fail', 'FAIL'), ('warn', 'WARN')]:
+                if interface.utilization >= NIC_UTILIZATION[level]:
+                    problems.append(
+                        (
+                            verdict,
+                            '{0} is using {1}% of its link speed'.format(
+                                interface.interface,
+                                interface.utilization
+                            )
+                        )
+                    )
+                    break
+
+        dropping = [
+            counter for counter in NIC_ERRORS
+            if interface.rates[counter] > 0
+        ]
+        for counter in dropping:
+            problems.append(
+                (
+                    'FAIL',
+                    '{0} {1} at {2}/s during the window'.format(
+                        interface.interface,
+                        counter.replace('_', ' '),
+                        interface.rates[counter]
+                    )
+                )
+            )
+
+        since_boot = [
+            '{0} {1}'.format(interface.since_boot[counter], counter)
+            for counter in NIC_ERRORS
+            if interface.since_boot[counter]
+        ]
+        if since_boot:
+            f.write('Since Boot: {0}\n'.format(', '.join(since_boot)))
+
+    if problems:
+        f.write('\n')
+        for verdict, problem in problems:
+            nic_result = plugins.merge_verdicts(nic_result, verdict)
+            f.write('WARNING: {0}\n'.format(problem))
+
+        f.write(
+            'Interfaces that already drop packets or run near their link '
+            'speed will get worse once cluster traffic is added\n'
+        )
+
+    f.write('\nNetwork Interfaces Result: {0}\n\n'.format(nic_result))
+    return nic_result
+
+
+def report_cpu_steal(f, steal, system_info):
+    if not steal:
+        return None
+
+    steal_result = 'PASS'
+    warnings = []
+    aggregate = steal.aggregate or {}
+    f.write('\nCPU Steal\n')
+    f.write(
+        'Window: {0} seconds over {1} CPUs\n'.format(steal.window, steal.cpus)
+    )
+    for name, label in [
+        ('steal', 'Steal'),
+        ('iowait', 'IO Wait'),
+        ('irq', 'IRQ'),
+        ('softirq', 'SoftIRQ')
+    ]:
+        if name not in aggregate:
+            continue
+
+        f.write('{0}: {1}%\n'.format(label, aggregate[name]))
+        if aggregate[name] >= CPU_STEAL['aggregate'][name]:
+            warnings.append(
+                '{0} of {1}% is over {2}%'.format(
+                    name,
+                    aggregate[name],
+                    CPU_STEAL['aggregate'][name]
+                )
+            )
+
+    core_steal = [
+        (value, cpu) for cpu, value in enumerate(steal.cores['steal'])
+        if value is not None
+    ]
+    if core_steal:
+        worst, cpu = max(core_steal)
+        f.write('Worst Core Steal: cpu{0} {1}%\n'.format(cpu, worst))
+        stealing = [
+            x for x in core_steal if x[0] >= CPU_STEAL['core_steal']
+        ]
+        if stealing:
+            warnings.append(
+                '{0} CPUs lost over {1}% to steal'.format(
+                    len(stealing),
+                    CPU_STEAL['core_steal']
+                )
+            )
+
+    throttling = steal.get('throttling')
+    if throttling is not None:
+        f.write(
+            'Throttled: {0} of {1} periods ({2}%), {3} seconds\n'.format(
+                throttling['throttled'],
+                throttling['periods'],
+                throttling['throttled_percent'],
+                throttling['throttled_seconds']
+            )
+        )
+        if throttling['throttled_percent'] >= CPU_STEAL['throttled']:
+            warnings.append(
+                'cgroup {0} was throttled in {1}% of periods'.format(
+                    throttling['cgroup'],
+                    throttling['throttled_percent']
+                )
+            )
+
+    if warnings:
+        steal_result = 'WARN'
+        f.write('\n')
+        for warning in warnings:
+            f.write('WARNING: {0}\n'.format(warning))
+
+        f.write(
+            'CPU time is being taken by the hypervisor, interrupts or cgroup '
+            'limits and workloads will run slower than the core count '
+            'suggests\n'
+        )
+
+    f.write('\nCPU Steal Result: {0}\n\n'.format(steal_result))
+    return steal_result
+
+
+def report_memory_performance(f, performance, system_info):
+    if not performance:
+        return None
+
+    performance_result = 'PASS'
+    copy = performance.copy_bandwidth
+    all_core = performance.all_core_bandwidth
+    latency = performance.latency
+    f.write('\nMemory Performance\n')
+    f.write(
+        'Buffer Size:               {0} MB\n'.format(performance.buffer_size)
+    )
+    f.write('Copy Bandwidth Minimum:    {0} GB/s\n'.format(copy.minimum))
+    f.write('Copy Bandwidth Actual:     {0} GB/s\n'.format(copy.actual))
+    f.write(
+        'All Core Bandwidth Min:    {0} GB/s\n'.format(all_core.minimum)
+    )
+    f.write(
+        'All Core Bandwidth Actual: {0} GB/s ({1} workers)\n'.format(
+            all_core.actual,
+            all_core.workers
+        )
+    )
+    f.write('Latency Maximum:           {0} ns\n'.format(latency.maximum))
+    f.write('Latency Actual:            {0} ns\n'.format(latency.actual))
+    if (
+        copy.actual < copy.minimum or
+        all_core.actual < all_core.minimum or
+        latency.actual > latency.maximum
+    ):
+        performance_result = 'WARN'
+        f.write(
+            'WARNING: Memory bandwidth or latency is below the recommended '
+            'values. Shared hypervisors and single channel memory '
+            'configurations will slow down notebooks and model training\n'
+        )
+
+    f.write('Memory Performance Result: {0}\n\n'.format(performance_result))
+    return performance_result
+
+
+def performance_deviations(performance):
+    """
+    List the settings that deviate from the recommended performance profile
+    """
+    deviations = []
+    thp = performance.transparent_hugepage
+    for name, value in [('enabled', thp.enabled), ('defrag', thp.defrag)]:
+        recommended = PERFORMANCE_MODE['thp_{0}'.format(name)]
+        if value is not None and value not in recommended:
+            deviations.append(
+                'Transparent hugepage {0} is {1}, recommended {2}'.format(
+                    name,
+                    value,
+                    ' or '.join(recommended)
+                )
+            )
+
+    for size in sorted(performance.hugepages.keys()):
+        pool = performance.hugepages[size]
+        if pool['total'] > 0 and pool['free'] == pool['total']:
+            deviations.append(
+                '{0} {1} hugepages are reserved and none are in use'.format(
+                    pool['total'],
+                    size
+                )
+            )
+
+    fragmentation = performance.get('fragmentation')
+    if (
+        fragmentation is not None and
+        thp.enabled not in [None, 'never'] and
+        fragmentation.high_order_percent <
+        PERFORMANCE_MODE['high_order_percent']
+    ):
+        deviations.append(
+            'Only {0}% of free memory is in 2MB blocks, memory is too '
+            'fragmented for transparent hugepages'.format(
+                fragmentation.high_order_percent
+            )
+        )
+
+    total_cpus = sum(performance.governors.values())
+    for governor in sorted(performance.governors.keys()):
+        if governor not in PERFORMANCE_MODE['governor']:
+            deviations.append(
+                '{0} of {1} CPUs use the {2} governor, recommended '
+                '{3}'.format(
+                    performance.governors[governor],
+                    total_cpus,
+                    governor,
+                    ' or '.join(PERFORMANCE_MODE['governor'])
+                )
+            )
+
+    if performance.pstate.get('no_turbo') == 1:
+        deviations.append('Turbo is disabled in intel_pstate')
+
+    return deviations
+
+
+def report_performance_mode(f, performance, system_info):
+    performance_result = 'PASS'
+    thp = performance.transparent_hugepage
+    f.write('\nPerformance Mode\n')
+    f.write('THP Enabled: {0}\n'.format(thp.enabled or 'not available'))
+    f.write('THP Defrag:  {0}\n'.format(thp.defrag or 'not available'))
+    for size in sorted(performance.hugepages.keys()):
+        f.write(
+            'Hugepages {0}: {1} reserved, {2} free\n'.format(
+                size,
+                performance.hugepages[size]['total'],
+                performance.hugepages[size]['free']
+            )
+        )
+
+    fragmentation = performance.get('fragmentation')
+    if fragmentation is not None:
+        f.write(
+            'Free memory in 2MB blocks: {0}%\n'.format(
+                fragmentation.high_order_percent
+            )
+        )
+
+    for governor in sorted(performance.governors.keys()):
+        f.write(
+            'Governor {0}: {1} CPUs\n'.format(
+                governor,
+                performance.governors[governor]
+            )
+        )
+
+    if performance.pstate.get('driver'):
+        f.write(
+            'Frequency Driver: {0} ({1})\n'.format(
+                performance.pstate['driver'],
+                performance.pstate['status']
+            )
+        )
+
+    deviations = performance_deviations(performance)
+    if deviations:
+        performance_result = 'WARN'
+        f.write('\nDeviations:\n')
+        for deviation in deviations:
+            f.write('{0}\n'.format(deviation))
+
+    f.write('\nPerformance Mode Result: {0}\n\n'.format(performance_result))
+    return performance_result
+
+
+def report_mounts(f, mounts, system_info):
+    f.write('\nMounts\n')
+    overall_mount_result = 'WARN'
+    ftype_incorrect = False
+    inodes_short = False
+    inode_ratio_large = False
+    for mount in mounts:
+        mount_result = 'WARN'
+        f.write('Mount Point:  {0}\n'.format(mount.mountpoint))
+        f.write('Recommended:  {0} GB\n'.format(mount.recommended))
+        f.write('Total:        {0} GB\n'.format(mount.total))
+        f.write('Free:         {0} GB\n'.format(mount.free))
+        f.write('File System:  {0}\n'.format(mount.file_system))
+        if mount.file_system == 'xfs':
+            f.write('Ftype:        {0}\n'.format(mount.ftype))
+
+        inodes_low = False
+        if mount.get('inodes_total') is not None:
+            f.write('Inodes:       {0}\n'.format(mount.inodes_total))
+            f.write('Inodes Free:  {0}\n'.format(mount.inodes_free))
+            f.write('Inodes Min:   {0}\n'.format(mount.recommended_inodes))
+            if mount.get('files_per_gb') is not None:
+                f.write('Files per GB: {0}\n'.format(mount.files_per_gb))
+
+            if mount.file_system == 'ext4':
+                f.write('Inode Ratio:  {0}\n'.format(mount.bytes_per_inode))
+                if mount.bytes_per_inode > INODE_RATIO_MAX:
+                    inode_ratio_large = True
+                    inodes_low = True
+
+            if (
+                mount.inodes_free < mount.recommended_inodes or
+                mount.get('files_per_gb', INODES_PER_GB) < INODES_PER_GB
+            ):
+                inodes_low = True
+
+        # Check to ensure the free space and file system pass
+        if (
+            mount.free >= mount.recommended and
+            mount.file_system in FILE_TYPES
+        ):
+            # Check for xfs and if not then pass
+            if mount.file_system == 'xfs':
+                # Ensure that the ftype was set correctly
+                if mount.ftype == '1':
+                    mount_result = 'PASS'
+                else:
+                    ftype_incorrect = True
+            else:
+                mount_result = 'PASS'
+
+        if inodes_low:
+            mount_result = 'WARN'
+            inodes_short = True
+
+        f.write('Mount Result: {0}\n\n'.format(mount_result))
+        overall_mount_result = mount_result
+
+    if overall_mount_result == 'WARN':
+        f.write(
+            'Note: The free space may have fallen below specific size '
+            'requirements due to reserve space and/or small files placed '
+            'on the mount after formatting. Confirm that the size is '
+            'close to the requested size before proceeding.\n\n'
+        )
+        if ftype_incorrect:
+            f.write(
+                'Note: XFS file system should be formatted with the '
+                'option ftype=1 in order to support the overlay driver '
+                ' for docker. In order to fix the issue the file system '
+                'will need to be recreated and can be done using the '
+                'following example:\nmkfs.xfs -n ftype=1 '
+                '/path/to/your/device\n\n'
+            )
+
+    if inodes_short:
+        f.write(
+            'Note: Conda environments and container image layers are made '
+            'of many small files and can use up the inodes of a mount while '
+            'there is still free space. Each mount should have at least '
+            '{0} free inodes for every recommended GB.\n\n'.format(
+                INODES_PER_GB
+            )
+        )
+        if inode_ratio_large:
+            f.write(
+                'Note: An ext4 file system formatted with more than {0} bytes '
+                'per inode will run out of inodes before space. The inode '
+                'count can only be changed by recreating the file system, '
+                'for example:\nmkfs.ext4 -i 16384 /path/to/your/device'
+                '\n\n'.format(INODE_RATIO_MAX)
+            )
+
+    return overall_mount_result
+
+
+def report_overlay(f, overlay, system_info):
+    if not overlay:
+        return None
+
+    f.write('\nOverlay Probe\n')
+    f.write('Directory:          {0}\n'.format(overlay.directory))
+    if overlay.mounted is None:
+        f.write('WARNING: {0}\n'.format(overlay.error))
+        f.write('\nOverlay Probe Result: SKIPPED\n\n')
+        return model.SKIPPED
+
+    overlay_result = 'PASS'
+    problems = []
+    f.write(
+        'd_type:             {0}\n'.format(
+            {True: 'Supported', False: 'Not Supported'}.get(
+                overlay.d_type,
+                'Unknown'
+            )
+        )
+    )
+    if overlay.d_type is False:
+        overlay_result = 'FAIL'
+        problems.append(
+            'the filesystem does not return file types in directory '
+            'entries, which the overlay driver needs. Recreate XFS with '
+            'mkfs.xfs -n ftype=1'
+        )
+
+    if not overlay.mounted or overlay.error:
+        overlay_result = 'FAIL'
+        problems.append(
+            'an overlay could not be mounted or used: {0}'.format(
+                overlay.error
+            )
+        )
+
+    copy_up = overlay.copy_up
+    if copy_up:
+        f.write(
+            'Copy Up:            p50 {0} ms, p99 {1} ms, max {2} ms '
+            '({3} files of {4} KB)\n'.format(
+                copy_up.p50_ms,
+                copy_up.p99_ms,
+                copy_up.max_ms,
+                copy_up.files,
+                copy_up.size // 1024
+            )
+        )
+        if copy_up.p99_ms > OVERLAY_PROBE['copy_up_p99_ms']:
+            overlay_result = plugins.merge_verdicts(overlay_result, 'WARN')
+            problems.append(
+                'p99 copy up latency of {0} ms is over {1} ms'.format(
+                    copy_up.p99_ms,
+                    OVERLAY_PROBE['copy_up_p99_ms']
+                )
+            )
+
+    small_files = overlay.small_files
+    if small_files:
+        f.write(
+            'Small Files:        {0} created/s, {1} read/s '
+            '({2} files of {3} KB)\n'.format(
+                small_files.create_per_second,
+                small_files.read_per_second,
+                small_files.files,
+                small_files.size // 1024
+            )
+        )
+        if (
+            small_files.create_per_second <
+            OVERLAY_PROBE['min_create_per_second']
+        ):
+            overlay_result = plugins.merge_verdicts(overlay_result, 'WARN')
+            problems.append(
+                'only {0} small files were created per second, the minimum '
+                'is {1}'.format(
+                    small_files.create_per_second,
+                    OVERLAY_PROBE['min_create_per_second']
+                )
+            )
+
+    if problems:
+        f.write('\n')
+        for problem in problems:
+            f.write('WARNING: {0}\n'.format(problem))
+
+    f.write('\nOverlay Probe Result: {0}\n\n'.format(overlay_result))
+    return overlay_result
+
+
+def report_selinux(f, selinux, system_info):
+    if (system_info.profile.based_on or '').lower() != 'rhel':
+        f.write('\nSelinux Result: SKIPPED\n\n')
+        return model.SKIPPED
+
+    selinux_result = 'FAIL'
+    f.write('\nSelinux Status\n')
+    f.write('Current Status: {0}\n'.format(selinux.getenforce.title()))
+    f.write('Config Setting: {0}\n'.format(selinux.config.title()))
+    if (
+        selinux.config.lower() != 'enforcing' and
+        selinux.getenforce.lower() != 'enforcing'
+    ):
+        selinux_result = 'PASS'
+
+    f.write('Selinux Result: {0}\n\n'.format(selinux_result))
+    return selinux_result
+
+
+def report_resolv(f, resolv, system_info):
+    if not resolv:
+        # Container roots often get resolv.conf mounted in when they run
+        f.write('\n/etc/resolv.conf Result: SKIPPED\n\n')
+        return model.SKIPPED
+
+    options_result = 'PASS'
+    search_domain_result = 'FAIL'
+    f.write('\n/etc/resolv.conf Check\n')
+    f.write('Search Domains: {0}\n'.format(len(resolv.search_domains)))
+    if len(resolv.search_domains) <= 3:
+        search_domain_result = 'PASS'
+
+    for option in resolv.options:
+        f.write('Added Option: {0}\n'.format(option))
+        if 'rotate' in option:
+            f.write(
+                'WARNING: rotate option has been known to create issues '
+                'on install and is recommended to comment this out\n'
+            )
+            options_result = 'WARN'
+
+    f.write('\nSearch Domain Result: {0}\n'.format(search_domain_result))
+    f.write('Options Result: {0}\n\n'.format(options_result))
+    return plugins.merge_verdicts(search_domain_result, options_result)
+
+
+def report_dns(f, dns, system_info):
+    if not dns:
+        return None
+
+    dns_result = 'PASS'
+    warnings = []
+    f.write('\nDNS Latency\n')
+    for lookup in sorted(dns.lookups, key=lambda x: x.name):
+        f.write(
+            'Lookup {0}: {1} names, {2} queries\n'.format(
+                lookup.name,
+                len(lookup.expanded),
+                lookup.queries
+            )
+        )
+        if lookup.queries > DNS_PROBE['max_queries']:
+            warnings.append(
+                'a lookup of {0} sends {1} queries, lower ndots or use '
+                'fewer search domains'.format(lookup.name, lookup.queries)
+            )
+
+    for server in sorted(dns.servers, key=lambda x: x.server):
+        if not server.answered:
+            f.write(
+                'Nameserver {0}: no answers to {1} queries\n'.format(
+                    server.server,
+                    server.sent
+                )
+            )
+            dns_result = 'FAIL'
+            continue
+
+        f.write(
+            'Nameserver {0}: p50 {1} ms, p90 {2} ms, p99 {3} ms, '
+            'max {4} ms\n'.format(
+                server.server,
+                server.p50_ms,
+                server.p90_ms,
+                server.p99_ms,
+                server.max_ms
+            )
+        )
+        if server.p90_ms >= DNS_PROBE['warn_ms']:
+            warnings.append(
+                '{0} p90 latency of {1} ms is over {2} ms'.format(
+                    server.server,
+                    server.p90_ms,
+                    DNS_PROBE['warn_ms']
+                )
+            )
+
+        failed = server.timeouts + sum(server.errors.values())
+        if failed:
+            warnings.append(
+                '{0} did not answer {1} of {2} queries'.format(
+                    server.server,
+                    failed,
+                    server.sent
+                )
+            )
+
+    if warnings:
+        dns_result = plugins.merge_verdicts(dns_result, 'WARN')
+        f.write('\n')
+        for warning in warnings:
+            f.write('WARNING: {0}\n'.format(warning))
+
+    f.write('\nDNS Latency Result: {0}\n\n'.format(dns_result))
+    return dns_result
+
+
+def report_ports(f, ports, system_info):
+    ports_result = 'PASS'
+    f.write('\nPort Check\n')
+    f.write(
+        'Note: This test will check all interfaces for open ports and '
+        'each interface may not apply to the installation\n'
+    )
+    for interface in ports:
+        interface_result = 'PASS'
+        f.write('\nInterface {0}:\n'.format(interface.interface))
+        for port, port_status in interface.ports:
+            f.write('Port: {0} - {1}\n'.format(port, port_status.title()))
+            if port_status == 'closed':
+                interface_result = 'WARN'
+
+        f.write(
+            '\n{0} Result: {1}\n\n'.format(
+                interface.interface,
+                interface_result
+            )
+        )
+        ports_result = plugins.merge_verdicts(ports_result, interface_result)
+
+    return ports_result
+
+
+def report_port_plan(f, plan, system_info):
+    if not plan:
+        f.write('\nPort Plan Result: SKIPPED\n\n')
+        return model.SKIPPED
+
+    plan_result = 'PASS'
+    f.write('\nPort Plan\n')
+    f.write(
+        'Planned:          {0} TCP and {1} UDP ports\n'.format(
+            plan.planned['tcp'],
+            plan.planned['udp']
+        )
+    )
+    f.write('Ephemeral Range:  {0}\n'.format(plan.ephemeral))
+    f.write('Reserved:         {0}\n'.format(plan.reserved or 'None'))
+    for conflict in sorted(
+        plan.conflicts,
+        key=lambda x: portplan.sort_key(x.ports)
+    ):
+        plan_result = 'FAIL'
+        f.write(
+            'In Use {0}: {1} (listening on {2})\n'.format(
+                conflict.ports,
+                ', '.join(conflict.services),
+                ', '.join(conflict.listeners)
+            )
+        )
+
+    for overlap in sorted(
+        plan.ephemeral_overlap,
+        key=lambda x: portplan.sort_key(x.ports)
+    ):
+        plan_result = plugins.merge_verdicts(plan_result, 'WARN')
+        f.write(
+            'Ephemeral {0}: {1}\n'.format(
+                overlap.ports,
+                ', '.join(overlap.services)
+            )
+        )
+
+    if plan.conflicts:
+        f.write(
+            '\nWARNING: Ports the install needs are already in use. Stop or '
+            'move the services listening on them before installing\n'
+        )
+
+    if plan.ephemeral_overlap:
+        f.write(
+            '\nWARNING: Ports the install needs are in the ephemeral range '
+            'and can be taken by outgoing connections. Reserve them with:\n'
+            'sysctl -w net.ipv4.ip_local_reserved_ports={0}\n'.format(
+                plan.recommended_reserved
+            )
+        )
+
+    f.write('\nPort Plan Result: {0}\n\n'.format(plan_result))
+    return plan_result
+
+
+def report_conntrack(f, conntrack, system_info):
+    if not conntrack:
+        f.write('\nConntrack Result: SKIPPED\n\n')
+        return model.SKIPPED
+
+    conntrack_result = 'PASS'
+    recommendations = []
+    f.write('\nConntrack\n')
+    f.write(
+        'Entries:  {0} of {1} ({2}% used)\n'.format(
+            conntrack.count,
+            conntrack.max,
+            conntrack.utilization
+        )
+    )
+    headroom = 100 - conntrack.utilization
+    if headroom < CAPACITY['fail_headroom']:
+        conntrack_result = 'FAIL'
+    elif headroom < CAPACITY['warn_headroom']:
+        conntrack_result = 'WARN'
+
+    table_small = conntrack.max < conntrack.recommended_max
+    if table_small:
+        conntrack_result = plugins.merge_verdicts(conntrack_result, 'WARN')
+
+    buckets = conntrack.get('buckets')
+    if buckets is not None:
+        f.write('Buckets:  {0}\n'.format(buckets))
+        if buckets < conntrack.recommended_buckets:
+            conntrack_result = plugins.merge_verdicts(
+                conntrack_result,
+                'WARN'
+            )
+            recommendations.append(
+                'options nf_conntrack hashsize={0}'.format(
+                    conntrack.recommended_buckets
+                )
+            )
+
+    stats = conntrack.get('stats') or {}
+    for name in CONNTRACK_DROPS:
+        if name in stats:
+            f.write(
+                '{0}: {1}\n'.format(
+                    name.replace('_', ' ').title(),
+                    stats[name]
+                )
+            )
+
+    if [name for name in stats if stats[name] > 0]:
+        conntrack_result = plugins.merge_verdicts(conntrack_result, 'WARN')
+        f.write(
+            'WARNING: Connections have been dropped because the conntrack '
+            'table was full or busy\n'
+        )
+
+    if recommendations:
+        f.write('\nRecommended:\n')
+        for recommendation in recommendations:
+            f.write('{0}\n'.format(recommendation))
+
+    if table_small:
+        f.write(
+            '\nNote: The recommended net.netfilter.nf_conntrack_max is under '
+            'Kernel Tuning in the Sysctl Settings section\n'
+        )
+
+    f.write('\nConntrack Result: {0}\n\n'.format(conntrack_result))
+    if recommendations:
+        f.write(
+            'HOW TO\nTo resize the hash table you can do the following as '
+            'root:\necho BUCKETS > /sys/module/nf_conntrack/parameters/'
+            'hashsize\n\nTo persist through a reboot add the options line to '
+            '/etc/modprobe.d/nf_conntrack.conf as root\n\n'
+        )
+
+    return conntrack_result
+
+
+def report_agents(f, agents, system_info):
+    agent_result = 'PASS'
+    f.write('\nAgent Checks\n')
+    if len(agents.running) > 0:
+        agent_result = 'WARN'
+        for agent in agents.running:
+            f.write('Running: {0}\n'.format(agent))
+
+        f.write(
+            'WARNING: These agents have been known to cause issues with '
+            'the system as it could block traffic, or change settings '
+            'that are needed by Anaconda Enterprise to function properly\n'
+        )
+    else:
+        f.write('No running agents found\n')
+
+    window = agents.get('window')
+    if window is not None:
+        f.write(
+            '\nWatched for {0} seconds using {1}\n'.format(
+                window.seconds,
+                window.method
+            )
+        )
+        if window.seen:
+            agent_result = 'WARN'
+            for agent in sorted(window.seen.keys()):
+                f.write(
+                    'Started: {0} ({1} times)\n'.format(
+                        agent,
+                        window.seen[agent]
+                    )
+                )
+
+            f.write(
+                'WARNING: These agents were started during the window, i.e. '
+                'from cron, and can change settings after the install\n'
+            )
+        else:
+            f.write('No agents were started\n')
+
+    f.write('\nAgent Result: {0}\n\n'.format(agent_result))
+    return agent_result
+
+
+def report_modules(f, modules, system_info):
+    module_result = 'PASS'
+    f.write('\nModule Checks\n')
+    f.write('Enabled:\n')
+    for module in modules.enabled:
+        f.write('{0}\n'.format(module))
+
+    if len(modules.missing) > 0:
+        module_result = 'FAIL'
+        f.write('\nMissing:\n')
+        for module in modules.missing:
+            f.write('{0}\n'.format(module))
+
+        f.write(
+            '\nHOW TO\nTo enable a module you can do the following as '
+            'root:\nmodprobe MODULE_NAME\n\nTo persist through a reboot '
+            'do the following as root:\necho -e "MODULE_NAME" > '
+            '/etc/modules-load.d/MODULE_NAME.conf\n'
+        )
+
+    f.write('\nModule Result: {0}\n\n'.format(module_result))
+    return module_result
+
+
+def report_infinity_set(f, infinity, system_info):
+    if (system_info.profile.distribution or '').lower() != 'sles':
+        return None
+
+    infinity_result = 'FAIL'
+    f.write('\nInfinty Max Tasks\n')
+    if infinity:
+        infinity_result = 'PASS'
+
+    f.write('Result: {0}\n\n'.format(infinity_result))
+    if infinity_result == 'FAIL':
+        f.write(
+            'HOW TO\nTo enable infinity on SUSE then add the '
+            'following to /etc/systemd/system.conf:\n'
+            'DefaultTasksMax=infinity\n\n'
+        )
+
+    return infinity_result
+
+
+def sysctl_expected(setting):
+    if setting.rule == 'exact':
+        return 'exactly {0}'.format(setting.minimum)
+
+    if setting.rule == 'range':
+        return '{0} to {1}'.format(setting.minimum, setting.maximum)
+
+    if setting.rule == 'minimum':
+        return 'minimum {0}'.format(setting.minimum)
+
+    return 'maximum {0}'.format(setting.maximum)
+
+
+def report_sysctl(f, sysctl, system_info):
+    sysctl_result = 'PASS'
+    f.write('\nSysctl Settings\n')
+    f.write('Enabled:\n')
+    for setting in sysctl.enabled:
+        f.write('{0}\n'.format(setting))
+
+    if len(sysctl.disabled) > 0:
+        sysctl_result = 'FAIL'
+        f.write('\nDisabled:\n')
+        for setting in sysctl.disabled:
+            f.write('{0}\n'.format(setting))
+
+    recommendations = []
+    subsystems = {}
+    for setting in sysctl.get('tuning') or ():
+        subsystems.setdefault(setting.subsystem, []).append(setting)
+
+    if subsystems:
+        f.write('\nKernel Tuning\n')
+
+    for subsystem in sorted(subsystems.keys()):
+        f.write('{0}:\n'.format(subsystem.capitalize()))
+        for setting in sorted(subsystems[subsystem], key=lambda x: x.setting):
+            f.write(
+                '{0}: {1} ({2}) {3}\n'.format(
+                    setting.setting,
+                    setting.get('actual', 'not available'),
+                    sysctl_expected(setting),
+                    setting.result
+                )
+            )
+            if setting.result == 'WARN':
+                if setting.minimum is not None and (
+                    setting.actual < setting.minimum
+                ):
+                    recommended = setting.minimum
+                else:
+                    recommended = setting.maximum
+
+                recommendations.append(
+                    '{0} = {1}'.format(setting.setting, recommended)
+                )
+
+    if recommendations:
+        if sysctl_result == 'PASS':
+            sysctl_result = 'WARN'
+
+        f.write('\nRecommended:\n')
+        for recommendation in recommendations:
+            f.write('{0}\n'.format(recommendation))
+
+    f.write('\nSysctl Result: {0}\n\n'.format(sysctl_result))
+    if sysctl_result == 'FAIL':
+        f.write(
+            'HOW TO\nTo enable a setting you can do the following as root:'
+            '\nsysctl -w SYSCTL_SETTING=1\n\nTo persist through a reboot '
+            'do the following as root:\necho -e "SYSCTL_SETTING = 1" '
+            '>> /etc/sysctl.d/10-SYSCTL_SETTING.conf"\n\n'
+        )
+
+    if recommendations:
+        f.write(
+            'HOW TO\nTo apply a recommended value you can do the following '
+            'as root:\nsysctl -w SYSCTL_SETTING=VALUE\n\nTo persist through '
+            'a reboot add the recommended lines to '
+            '/etc/sysctl.d/90-anaconda-enterprise.conf as root\n\n'
+        )
+
+    return sysctl_result
+
+
+def root_path(args, path):
+    """
+    Path of a file in the root being checked, / unless --root was given
+    """
+    return os.path.join(args.root or '/', path.lstrip('/'))
+
+
+def proc_path(args):
+    return args.proc or '/proc'
+
+
+def offline(args):
+    return args.root is not None or args.proc is not None
 
 
-def process_results(system_info):
+def can_run(check, args):
     """
-    Layout the report file and print out an overall pass/warn/fail for each
-    section that was checked
+    Checks against an offline root only run when what they read is there,
+    live checks need the running system and never run
     """
-    overall_result = 'PASS'
-    with open('results.txt', 'w+') as f:
-        f.write('=========================================================\n')
-        f.write('                SYSTEM PROFILE RESULTS                   \n')
-        f.write('=========================================================\n')
-
-        # Compatability and basic system info
-        profile = system_info['profile']
-        f.write('\nOS Information\n')
-        f.write('Name:     {0}\n'.format(profile.get('distribution').title()))
-        f.write('Version:  {0}\n'.format(profile.get('version')))
-        f.write('Based On: {0}\n\n'.format(profile.get('based_on')))
-        f.write('---------------------------------------------------------\n')
-
-        compatability = system_info['compatability']
-        f.write('\nCompatability\n')
-        f.write('Supported OS:      {0}\n'.format(compatability['OS']))
-        f.write('Supported Version: {0}\n\n'.format(compatability['version']))
-        if compatability['OS'] == 'FAIL' or compatability['version'] == 'FAIL':
-            overall_result = 'FAIL'
-
-        f.write('---------------------------------------------------------\n')
-
-        resources = system_info['resources']
-        memory = resources.get('memory')
-        f.write('\nMemory\n')
-        f.write('Minimum: {0}\n'.format(memory.get('minimum')))
-        f.write('Actual:  {0}\n'.format(memory.get('actual')))
-        memory_result = 'FAIL'
-        if memory.get('actual') >= memory.get('minimum'):
-            memory_result = 'PASS'
-
-        f.write('Memory:  {0}\n\n'.format(memory_result))
-        if memory_result == 'FAIL':
-            overall_result = 'FAIL'
-
-        f.write('---------------------------------------------------------\n')
-
-        # Cores
-        cores = resources.get('cpu_cores')
-        core_result = 'FAIL'
-        f.write('\nCPU Cores\n')
-        f.write('Minimum:  {0}\n'.format(cores.get('minimum')))
-        f.write('Actual:   {0}\n'.format(cores.get('actual')))
-        if cores.get('actual') >= cores.get('minimum'):
-            core_result = 'PASS'
-
-        f.write('CPU Core: {0}\n\n'.format(core_result))
-        if core_result == 'FAIL':
-            overall_result = 'FAIL'
-
-        f.write('---------------------------------------------------------\n')
-
-        # Mounts
-        mounts = system_info['mounts']
-        f.write('\nMounts\n')
-        overall_mount_result = 'WARN'
-        ftype_incorrect = False
-        for mount, mount_data in mounts.items():
-            mount_result = 'WARN'
-            f.write('Mount Point:  {0}\n'.format(mount))
-            f.write(
-                'Recommended:  {0} GB\n'.format(
-                    mount_data.get('recommended')
-                )
-            )
-            f.write(
-                'Total:        {0} GB\n'.format(mount_data.get('total'))
-            )
+    if not offline(args):
+        return True
 
-            f.write(
-                'Free:         {0} GB\n'.format(mount_data.get('free'))
-            )
-            f.write(
-                'File System:  {0}\n'.format(
-                    mount_data.get('file_system')
-                )
-            )
-            if mount_data.get('file_system') == 'xfs':
-                f.write(
-                    'Ftype:        {0}\n'.format(mount_data.get('ftype'))
-                )
+    if check.source == plugins.SOURCE_PROC:
+        return args.proc is not None
 
-            # Check to ensure the free space and file system pass
-            if (
-                mount_data.get('free') >= mount_data.get('recommended') and
-                mount_data.get('file_system') in FILE_TYPES
-            ):
-                # Check for xfs and if not then pass
-                if mount_data.get('file_system') == 'xfs':
-                    # Ensure that the ftype was set correctly
-                    if mount_data.get('ftype') == '1':
-                        mount_result = 'PASS'
-                    else:
-                        ftype_incorrect = True
-                else:
-                    mount_result = 'PASS'
+    return check.source == plugins.SOURCE_FILES
 
-            f.write('Mount Result: {0}\n\n'.format(mount_result))
-            overall_mount_result = mount_result
 
-        if overall_mount_result == 'WARN':
-            f.write(
-                'Note: The free space may have fallen below specific size '
-                'requirements due to reserve space and/or small files placed '
-                'on the mount after formatting. Confirm that the size is '
-                'close to the requested size before proceeding.\n\n'
-            )
-            if ftype_incorrect:
-                f.write(
-                    'Note: XFS file system should be formatted with the '
-                    'option ftype=1 in order to support the overlay driver '
-                    ' for docker. In order to fix the issue the file system '
-                    'will need to be recreated and can be done using the '
-                    'following example:\nmkfs.xfs -n ftype=1 '
-                    '/path/to/your/device\n\n'
-                )
+def skipped_section(check):
+    """
+    Section for a check that could not run against the offline root, so the
+    results show it was left out
+    """
+    needs = '--proc' if check.source == plugins.SOURCE_PROC else (
+        'the running system'
+    )
+    return (
+        '\n{0} Result: SKIPPED\n\n'
+        'NOTE: Not run against the offline root, the check needs {1}\n\n'
+    ).format(check.name, needs)
 
-        if overall_result == 'PASS' and overall_mount_result == 'WARN':
-            overall_result = 'WARN'
 
-        f.write('---------------------------------------------------------\n')
+def gather_profile(system_info, args):
+    return get_os_info(args.verbose, args.root or '/')
 
-        # Selinux
-        if system_info.get('profile').get('based_on').lower() == 'rhel':
-            selinux = system_info['selinux']
-            selinux_result = 'FAIL'
-            f.write('\nSelinux Status\n')
-            f.write(
-                'Current Status: {0}\n'.format(
-                    selinux.get('getenforce').title()
-                )
-            )
-            f.write(
-                'Config Setting: {0}\n'.format(selinux.get('config').title())
-            )
 
-            if (
-                selinux.get('config').lower() != 'enforcing' and
-                selinux.get('getenforce').lower() != 'enforcing'
-            ):
-                selinux_result = 'PASS'
+def gather_compatability(system_info, args):
+    return check_system_type(
+        system_info.profile.based_on,
+        system_info.profile.version,
+        args.verbose
+    )
 
-            f.write('Selinux Result: {0}\n\n'.format(selinux_result))
-            if selinux_result == 'FAIL':
-                overall_result = 'FAIL'
-        else:
-            f.write('\nSelinux Result: SKIPPED\n\n')
 
-        f.write('---------------------------------------------------------\n')
+def gather_resources(system_info, args):
+    return system_requirements(args.verbose, proc_path(args))
 
-        # /etc/resolv.conf
-        resolv = system_info['resolv']
-        options_result = 'PASS'
-        search_domain_result = 'FAIL'
-        f.write('\n/etc/resolv.conf Check\n')
-        f.write(
-            'Search Domains: {0}\n'.format(
-                len(resolv.get('search_domains', []))
-            )
+
+def detected_size(system_info):
+    """
+    Memory in GB and cores found by the resources check, used to size the
+    recommended limits
+    """
+    resources = system_info.get('resources')
+    if resources is None:
+        return None, None
+
+    return resources.memory.get('actual'), resources.cpu_cores.get('actual')
+
+
+def gather_capacity(system_info, args):
+    memory, cores = detected_size(system_info)
+    return capacity_check(
+        args.verbose,
+        memory,
+        cores,
+        proc_path(args),
+        root_path(args, '/etc')
+    )
+
+
+# Samples of the current run, filled by the first sampling check
+_sample_cache = {}
+
+
+def shared_sample(args):
+    """
+    The sampling checks all read from one window, sampled when the first of
+    them runs
+    """
+    if 'samples' not in _sample_cache:
+        _sample_cache['samples'] = sample_counters(
+            args.sample_window,
+            args.verbose
         )
-        if len(resolv.get('search_domains', [])) <= 3:
-            search_domain_result = 'PASS'
 
-        for option in resolv.get('options', []):
-            f.write('Added Option: {0}\n'.format(option))
-            if 'rotate' in option:
-                f.write(
-                    'WARNING: rotate option has been known to create issues '
-                    'on install and is recommended to comment this out\n'
-                )
-                options_result = 'WARN'
+    return _sample_cache['samples']
 
-        f.write('\nSearch Domain Result: {0}\n'.format(search_domain_result))
-        f.write('Options Result: {0}\n\n'.format(options_result))
-        if search_domain_result == 'FAIL':
-            overall_result = 'FAIL'
 
-        if overall_result == 'PASS' and options_result == 'WARN':
-            overall_result = 'WARN'
+def gather_pressure(system_info, args):
+    if not args.sample_window:
+        return None
 
-        f.write('---------------------------------------------------------\n')
+    return shared_sample(args)['pressure']
 
-        # Ports
-        ports = system_info['ports']
-        f.write('\nPort Check\n')
-        f.write(
-            'Note: This test will check all interfaces for open ports and '
-            'each interface may not apply to the installation\n'
+
+def gather_cpu_steal(system_info, args):
+    if not args.sample_window:
+        return None
+
+    return shared_sample(args)['cpu_steal']
+
+
+def gather_nic(system_info, args):
+    if not args.sample_window:
+        return None
+
+    return shared_sample(args)['nic']
+
+
+def gather_memory_performance(system_info, args):
+    if not args.memory_probe:
+        return None
+
+    return memory_performance(
+        None,
+        {
+            'copy_bandwidth': {'minimum': args.min_copy_bandwidth},
+            'all_core_bandwidth': {'minimum': args.min_all_core_bandwidth},
+            'latency': {'maximum': args.max_memory_latency}
+        },
+        args.verbose
+    )
+
+
+def gather_performance_mode(system_info, args):
+    return performance_mode(args.verbose)
+
+
+def gather_mounts(system_info, args):
+    return mounts_check(args.verbose)
+
+
+def gather_overlay(system_info, args):
+    if args.overlay_probe is None:
+        return None
+
+    return overlayprobe.overlay_probe(args.verbose, args.overlay_probe)
+
+
+def gather_selinux(system_info, args):
+    if (system_info.profile.based_on or '').lower() != 'rhel':
+        return None
+
+    return selinux(
+        root_path(args, '/etc/selinux/config'),
+        args.verbose,
+        not offline(args)
+    )
+
+
+def gather_resolv(system_info, args):
+    resolv_conf = root_path(args, '/etc/resolv.conf')
+    if offline(args) and not os.path.isfile(resolv_conf):
+        return None
+
+    return inspect_resolv_conf(resolv_conf, args.verbose)
+
+
+def gather_dns(system_info, args):
+    if args.dns_probe is None:
+        return None
+
+    return dns_probe(
+        system_info.get('resolv'),
+        args.dns_probe or [socket.getfqdn()],
+        args.verbose
+    )
+
+
+def gather_ports(system_info, args):
+    return check_open_ports(args.interface, args.verbose)
+
+
+def gather_port_plan(system_info, args):
+    return port_plan(args.verbose, proc_path(args))
+
+
+def gather_agents(system_info, args):
+    agents = check_for_agents(args.verbose)
+    if args.agent_window:
+        agents['window'] = procwatch.watch_for_agents(
+            args.agent_window,
+            RUNNING_AGENTS,
+            args.verbose
         )
-        for interface, interface_data in ports.items():
-            interface_result = 'PASS'
-            f.write('\nInterface {0}:\n'.format(interface))
-            for port, port_status in interface_data.items():
-                f.write(
-                    'Port: {0} - {1}\n'.format(
-                        port,
-                        port_status.title()
-                    )
-                )
-                if port_status == 'closed':
-                    interface_result = 'WARN'
 
-            f.write(
-                '\n{0} Result: {1}\n\n'.format(
-                    interface,
-                    interface_result
-                )
-            )
-            if overall_result == 'PASS' and interface_result == 'WARN':
-                overall_result = 'WARN'
+    return agents
 
-        f.write('---------------------------------------------------------\n')
 
-        # Agents
-        agents = system_info['agents']
-        agent_result = 'PASS'
-        f.write('\nAgent Checks\n')
-        if len(agents.get('running', [])) > 0:
-            agent_result = 'WARN'
-            for agent in agents.get('running'):
-                f.write('Running: {0}\n'.format(agent))
+def gather_conntrack(system_info, args):
+    memory, cores = detected_size(system_info)
+    return conntrack_check(args.verbose, memory, cores, proc_path(args))
 
-            f.write(
-                'WARNING: These agents have been known to cause issues with '
-                'the system as it could block traffic, or change settings '
-                'that are needed by Anaconda Enterprise to function properly\n'
-            )
-        else:
-            f.write('No running agents found\n')
 
-        f.write('\nAgent Result: {0}\n\n'.format(agent_result))
-        if overall_result == 'PASS' and agent_result == 'WARN':
-            overall_result = 'WARN'
+def gather_modules(system_info, args):
+    return check_modules(
+        system_info.profile.distribution,
+        system_info.profile.version,
+        args.verbose,
+        proc_path(args)
+    )
 
-        f.write('---------------------------------------------------------\n')
 
-        # Modules
-        modules = system_info['modules']
-        module_result = 'PASS'
-        f.write('\nModule Checks\n')
-        f.write('Enabled:\n')
-        for module in modules.get('enabled', []):
-            f.write('{0}\n'.format(module))
+def gather_infinity_set(system_info, args):
+    if (system_info.profile.distribution or '').lower() != 'sles':
+        return None
 
-        if len(modules.get('missing', [])) > 0:
-            module_result = 'FAIL'
-            f.write('\nMissing:\n')
-            for module in modules.get('missing'):
-                f.write('{0}\n'.format(module))
+    return suse_infinity_check(
+        root_path(args, '/etc/systemd/system.conf'),
+        args.verbose
+    )
 
-            f.write(
-                '\nHOW TO\nTo enable a module you can do the following as '
-                'root:\nmodprobe MODULE_NAME\n\nTo persist through a reboot '
-                'do the following as root:\necho -e "MODULE_NAME" > '
-                '/etc/modules-load.d/MODULE_NAME.conf\n'
-            )
-
-        f.write('\nModule Result: {0}\n\n'.format(module_result))
-        f.write('---------------------------------------------------------\n')
-
-        # Suse Infinity
-        if system_info.get('profile').get('distribution').lower() == 'sles':
-            infinity = system_info['infinity_set']
-            infinity_result = 'FAIL'
-            f.write('\nInfinty Max Tasks\n')
-            if infinity:
-                infinity_result = 'PASS'
-
-            f.write('Result: {0}\n\n'.format(infinity_result))
-            if infinity_result == 'FAIL':
-                overall_result = 'FAIL'
-                f.write(
-                    'HOW TO\nTo enable infinity on SUSE then add the '
-                    'following to /etc/systemd/system.conf:\n'
-                    'DefaultTasksMax=infinity\n\n'
-                )
 
-            f.write(
-                '---------------------------------------------------------\n'
-            )
+def gather_sysctl(system_info, args):
+    memory, cores = detected_size(system_info)
+    return check_sysctl(
+        args.verbose,
+        memory,
+        cores,
+        os.path.join(proc_path(args), 'sys')
+    )
 
-        # sysctl
-        sysctl = system_info['sysctl']
-        sysctl_result = 'PASS'
-        f.write('\nSysctl Settings\n')
-        f.write('Enabled:\n')
-        for setting in sysctl.get('enabled', []):
-            f.write('{0}\n'.format(setting))
 
-        if len(sysctl.get('disabled', [])) > 0:
-            sysctl_result = 'FAIL'
-            f.write('\nDisabled:\n')
-            for setting in sysctl.get('disabled'):
-                f.write('{0}\n'.format(setting))
+# Built in checks in the order they are reported
+CHECKS = [
+    plugins.Check(
+        'profile',
+        gather_profile,
+        report_profile,
+        source=plugins.SOURCE_FILES,
+        category=plugins.CATEGORY_OS
+    ),
+    plugins.Check(
+        'compatability',
+        gather_compatability,
+        report_compatability,
+        requires=['profile'],
+        source=plugins.SOURCE_FILES,
+        category=plugins.CATEGORY_OS,
+        disqualifying=True
+    ),
+    plugins.Check(
+        'resources',
+        gather_resources,
+        report_resources,
+        cost=plugins.COST_MEDIUM,
+        source=plugins.SOURCE_PROC,
+        category=plugins.CATEGORY_RESOURCES,
+        disqualifying=True
+    ),
+    plugins.Check(
+        'capacity',
+        gather_capacity,
+        report_capacity,
+        requires=['resources'],
+        source=plugins.SOURCE_PROC,
+        category=plugins.CATEGORY_RESOURCES
+    ),
+    plugins.Check(
+        'pressure',
+        gather_pressure,
+        report_pressure,
+        cost=plugins.COST_SLOW,
+        category=plugins.CATEGORY_RESOURCES
+    ),
+    plugins.Check(
+        'cpu_steal',
+        gather_cpu_steal,
+        report_cpu_steal,
+        cost=plugins.COST_SLOW,
+        category=plugins.CATEGORY_RESOURCES
+    ),
+    plugins.Check(
+        'nic',
+        gather_nic,
+        report_nic,
+        cost=plugins.COST_SLOW,
+        category=plugins.CATEGORY_NETWORK
+    ),
+    plugins.Check(
+        'memory_performance',
+        gather_memory_performance,
+        report_memory_performance,
+        cost=plugins.COST_SLOW,
+        category=plugins.CATEGORY_RESOURCES
+    ),
+    plugins.Check(
+        'performance_mode',
+        gather_performance_mode,
+        report_performance_mode
+    ),
+    plugins.Check(
+        'mounts',
+        gather_mounts,
+        report_mounts,
+        cost=plugins.COST_MEDIUM,
+        category=plugins.CATEGORY_STORAGE
+    ),
+    plugins.Check(
+        'overlay',
+        gather_overlay,
+        report_overlay,
+        cost=plugins.COST_SLOW,
+        category=plugins.CATEGORY_STORAGE
+    ),
+    plugins.Check(
+        'selinux',
+        gather_selinux,
+        report_selinux,
+        cost=plugins.COST_MEDIUM,
+        requires=['profile'],
+        source=plugins.SOURCE_FILES
+    ),
+    plugins.Check(
+        'resolv',
+        gather_resolv,
+        report_resolv,
+        source=plugins.SOURCE_FILES,
+        category=plugins.CATEGORY_NETWORK
+    ),
+    plugins.Check(
+        'dns',
+        gather_dns,
+        report_dns,
+        cost=plugins.COST_SLOW,
+        requires=['resolv'],
+        category=plugins.CATEGORY_NETWORK
+    ),
+    plugins.Check(
+        'ports',
+        gather_ports,
+        report_ports,
+        cost=plugins.COST_SLOW,
+        category=plugins.CATEGORY_NETWORK
+    ),
+    plugins.Check(
+        'port_plan',
+        gather_port_plan,
+        report_port_plan,
+        source=plugins.SOURCE_PROC,
+        category=plugins.CATEGORY_NETWORK
+    ),
+    plugins.Check(
+        'conntrack',
+        gather_conntrack,
+        report_conntrack,
+        requires=['resources'],
+        source=plugins.SOURCE_PROC,
+        category=plugins.CATEGORY_NETWORK
+    ),
+    plugins.Check(
+        'agents',
+        gather_agents,
+        report_agents,
+        cost=plugins.COST_SLOW
+    ),
+    # Missing modules are reported but have never failed the overall result
+    plugins.Check(
+        'modules',
+        gather_modules,
+        report_modules,
+        cost=plugins.COST_MEDIUM,
+        requires=['profile'],
+        affects_overall=False,
+        source=plugins.SOURCE_PROC
+    ),
+    plugins.Check(
+        'infinity_set',
+        gather_infinity_set,
+        report_infinity_set,
+        requires=['profile'],
+        source=plugins.SOURCE_FILES
+    ),
+    plugins.Check(
+        'sysctl',
+        gather_sysctl,
+        report_sysctl,
+        requires=['resources'],
+        cost=plugins.COST_MEDIUM,
+        source=plugins.SOURCE_PROC
+    )
+]
+
 
-        f.write('\nSysctl Result: {0}\n\n'.format(sysctl_result))
-        if sysctl_result == 'FAIL':
-            overall_result = 'FAIL'
-            f.write(
-                'HOW TO\nTo enable a setting you can do the following as root:'
-                '\nsysctl -w SYSCTL_SETTING=1\n\nTo persist through a reboot '
-                'do the following as root:\necho -e "SYSCTL_SETTING = 1" '
-                '>> /etc/sysctl.d/10-SYSCTL_SETTING.conf"\n\n'
+def get_checks(selected_plugins=None):
+    """
+    Built in checks followed by the installed check plugins. Plugins are
+    loaded here, so only the plugins that are going to run get imported
+    """
+    checks = list(CHECKS)
+    discovered = plugins.discover_plugins()
+    if selected_plugins is None:
+        selected_plugins = sorted(discovered.keys())
+
+    built_in = [check.name for check in CHECKS]
+    for name in selected_plugins:
+        if name in built_in:
+            continue
+
+        if name not in discovered:
+            raise plugins.PluginError(
+                'Check plugin {0} is not installed'.format(name)
             )
 
-        f.write('=========================================================\n')
+        checks.append(plugins.load_plugin(name, discovered[name]))
+
+    return checks
+
+
+def render_section(check, system_info):
+    """
+    Run the rule for a check and return the section text and its verdict
+    """
+    section = StringIO()
+    verdict = check.rule(section, system_info[check.name], system_info)
+    return section.getvalue(), verdict
+
+
+def write_atomic(path, content):
+    """
+    Write the content to a temporary file next to path and rename it into
+    place, so a reader never sees a partially written file
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    handle, temp_path = tempfile.mkstemp(
+        dir=directory,
+        prefix='.{0}.'.format(os.path.basename(path))
+    )
+    try:
+        with os.fdopen(handle, 'w') as f:
+            f.write(content)
+
+        # mkstemp only gives the owner access, results are meant to be shared
+        os.chmod(temp_path, 0o644)
+        os.rename(temp_path, path)
+    except Exception:
+        os.remove(temp_path)
+        raise
+
+
+class Progress(object):
+    """
+    Report each section as soon as its check completes. The verdict is
+    printed to the terminal and the section is appended to a partial results
+    file, with a live status line of pending, running and done checks when
+    the output is a terminal
+    """
+    def __init__(self, checks, partial_file, live=True):
+        self.pending = [check.name for check in checks]
+        self.running = None
+        self.done = []
+        self.partial_file = partial_file
+        self.live = live and sys.stdout.isatty()
+        self.status_length = 0
+        self.f = open(partial_file, 'w')
+
+    def _status(self):
+        if not self.live:
+            return
+
+        status = 'Checks: {0} pending, {1} running, {2} done {3}'.format(
+            len(self.pending),
+            1 if self.running else 0,
+            len(self.done),
+            '({0})'.format(self.running) if self.running else ''
+        ).rstrip()
+        padding = max(self.status_length - len(status), 0)
+        sys.stdout.write('\r{0}{1}'.format(status, ' ' * padding))
+        sys.stdout.flush()
+        self.status_length = len(status)
+
+    def _clear_status(self):
+        if self.live and self.status_length:
+            sys.stdout.write('\r{0}\r'.format(' ' * self.status_length))
+            self.status_length = 0
+
+    def start(self, check):
+        self.pending.remove(check.name)
+        self.running = check.name
+        self._status()
+
+    def finish(self, check, section, verdict):
+        self.running = None
+        self.done.append(check.name)
+        self._clear_status()
+        if verdict is not None:
+            print('{0:<20} {1}'.format(check.name, verdict))
+
+        if section:
+            self.f.write(section)
+            self.f.write(SEPARATOR)
+            self.f.flush()
+
+        self._status()
+
+    def close(self):
+        """
+        Close the partial results file. It is kept, so the sections that
+        completed are still there when a check raised
+        """
+        self._clear_status()
+        self.f.close()
+
+    def remove(self):
+        """
+        Remove the partial results once the full results have been written
+        """
+        if os.path.isfile(self.partial_file):
+            os.remove(self.partial_file)
+
+
+def process_results(system_info, checks=None, skipped=None):
+    """
+    Layout the report file and print out an overall pass/warn/fail for each
+    section that was checked. The checks named in skipped are listed as
+    SKIPPED
+    """
+    if checks is None:
+        checks = CHECKS
+
+    if skipped is None:
+        skipped = []
+
+    if not isinstance(system_info, model.HostResult):
+        system_info = model.HostResult.from_dict(system_info)
+
+    overall_result = 'PASS'
+    f = StringIO()
+    f.write('=========================================================\n')
+    f.write('                SYSTEM PROFILE RESULTS                   \n')
+    f.write('=========================================================\n')
+
+    first_section = True
+    for check in checks:
+        if check.name in skipped:
+            section, verdict = skipped_section(check), model.SKIPPED
+        elif check.name not in system_info:
+            continue
+        else:
+            section, verdict = render_section(check, system_info)
 
-        f.write('\nOverall Result: {0}\n\n'.format(overall_result))
+        if check.affects_overall:
+            overall_result = plugins.merge_verdicts(overall_result, verdict)
 
-        f.write('=========================================================\n')
+        if not section:
+            continue
 
+        if not first_section:
+            f.write(SEPARATOR)
+
+        f.write(section)
+        first_section = False
+
+    f.write('=========================================================\n')
+
+    f.write('\nOverall Result: {0}\n\n'.format(overall_result))
+
+    f.write('=========================================================\n')
+    write_atomic('results.txt', f.getvalue())
     return overall_result
 
 
-def handle_arguments():
+def argument_parser():
     description = (
         'System checks and tests to ensure system meets the installation '
         'requirements defined here: https://enterprise-docs.anaconda.com/e'
@@ -816,55 +3586,331 @@ def handle_arguments():
         action='count',
         help='Enable verbosity'
     )
-    args = parser.parse_args()
-    return args
+    parser.add_argument(
+        '--root',
+        required=False,
+        help=(
+            'Check the files of an offline root such as a mounted image or '
+            'a container root filesystem instead of this host, checks that '
+            'need the running system are skipped'
+        )
+    )
+    parser.add_argument(
+        '--proc',
+        required=False,
+        help=(
+            'Read /proc from this path, i.e. a captured copy, so the checks '
+            'of kernel settings and usage also run against --root'
+        )
+    )
+    parser.add_argument(
+        '--sample-window',
+        required=False,
+        type=float,
+        default=SAMPLE_WINDOW,
+        help=(
+            'Seconds to sample pressure stalls, reclaim, CPU steal and '
+            'interface counters for, 0 turns the sampling off'
+        )
+    )
+    parser.add_argument(
+        '--memory-probe',
+        required=False,
+        action='store_true',
+        help='Measure memory bandwidth and latency in addition to the size'
+    )
+    parser.add_argument(
+        '--min-copy-bandwidth',
+        required=False,
+        type=float,
+        default=MEMORY_PERFORMANCE['copy_bandwidth']['minimum'],
+        help='Minimum single core copy bandwidth in GB/s for --memory-probe'
+    )
+    parser.add_argument(
+        '--min-all-core-bandwidth',
+        required=False,
+        type=float,
+        default=MEMORY_PERFORMANCE['all_core_bandwidth']['minimum'],
+        help='Minimum all core copy bandwidth in GB/s for --memory-probe'
+    )
+    parser.add_argument(
+        '--max-memory-latency',
+        required=False,
+        type=float,
+        default=MEMORY_PERFORMANCE['latency']['maximum'],
+        help='Maximum random access latency in ns for --memory-probe'
+    )
+    parser.add_argument(
+        '--overlay-probe',
+        required=False,
+        nargs='?',
+        const=overlayprobe.OVERLAY_DIR,
+        metavar='DIR',
+        help=(
+            'Mount an overlay on the filesystem of this directory and measure '
+            'copy up and small file performance, {0} by default'.format(
+                overlayprobe.OVERLAY_DIR
+            )
+        )
+    )
+    parser.add_argument(
+        '--dns-probe',
+        required=False,
+        nargs='*',
+        metavar='NAME',
+        help=(
+            'Measure lookup latency against the nameservers in resolv.conf '
+            'for the names, the FQDN of the host when no names are given'
+        )
+    )
+    parser.add_argument(
+        '--agent-window',
+        required=False,
+        type=float,
+        help=(
+            'Also watch for config management agents being started for this '
+            'many seconds, i.e. 1800 to cover agents run from cron'
+        )
+    )
+    parser.add_argument(
+        '--only',
+        required=False,
+        nargs='+',
+        metavar='CHECK',
+        help=(
+            'Only run and report these checks, along with the checks they '
+            'depend on. See --list-checks for the names'
+        )
+    )
+    parser.add_argument(
+        '--skip',
+        required=False,
+        nargs='+',
+        metavar='CHECK',
+        help=(
+            'Do not report these checks, they are still run when a reported '
+            'check depends on them'
+        )
+    )
+    parser.add_argument(
+        '--fail-fast',
+        required=False,
+        action='store_true',
+        help=(
+            'Run the cheapest checks first and stop as soon as the host is '
+            'disqualified by an unsupported OS or too little memory or cores'
+        )
+    )
+    parser.add_argument(
+        '--plugin',
+        required=False,
+        action='append',
+        help=(
+            'Name of an installed check plugin to run, can be given more '
+            'than once. All installed plugins are run by default'
+        )
+    )
+    parser.add_argument(
+        '--store',
+        required=False,
+        help=(
+            'Path to a SQLite results store to keep the history of runs in. '
+            'Use "ae-profile query --help" to query it'
+        )
+    )
+    parser.add_argument(
+        '--output-json',
+        required=False,
+        help=(
+            'Also write the gathered results as JSON to this path, for use '
+            'with "ae-profile diff"'
+        )
+    )
+    parser.add_argument(
+        '--upload',
+        required=False,
+        metavar='URL',
+        help=(
+            'Also upload the results to a collector started with '
+            'ae-profile collect, i.e. http://collector:8080/results'
+        )
+    )
+    parser.add_argument(
+        '--export-prometheus',
+        required=False,
+        help=(
+            'Write the results as gauges to this path for the node_exporter '
+            'textfile collector, i.e. /var/lib/node_exporter/ae_preflight.prom'
+        )
+    )
+    parser.add_argument(
+        '--list-checks',
+        required=False,
+        action='store_true',
+        help='List the built in checks and installed check plugins'
+    )
+    return parser
 
 
 def main():
     """
     Run each of the functions and store the results to be reported on in a
-    results file
-    """
-    system_info = {}
-    args = handle_arguments()
-    system_info['profile'] = get_os_info(args.verbose)
-    system_info['compatability'] = check_system_type(
-        system_info.get('profile').get('based_on'),
-        system_info.get('profile').get('version'),
-        args.verbose
-    )
-    system_info['resources'] = system_requirements(args.verbose)
-    system_info['mounts'] = mounts_check(args.verbose)
-    system_info['resolv'] = inspect_resolv_conf(
-        '/etc/resolv.conf',
-        args.verbose
-    )
-    system_info['ports'] = check_open_ports(args.interface, args.verbose)
-    system_info['agents'] = check_for_agents(args.verbose)
-    system_info['modules'] = check_modules(
-        system_info.get('profile').get('distribution'),
-        system_info.get('profile').get('version'),
-        args.verbose
+    results file. Returns the exit code, which with --fail-fast has the bits
+    of plugins.exit_code and is otherwise 0 like before
+    """
+    # Files read by the checks are only cached for the length of a run
+    scanner.clear_cache()
+    osrelease.clear_cache()
+    _sample_cache.clear()
+
+    # Subcommands that work on stored results instead of running the checks
+    if sys.argv[1:2] == ['query']:
+        store.query_main(sys.argv[2:])
+        return
+
+    if sys.argv[1:2] == ['diff']:
+        diff.diff_main(sys.argv[2:])
+        return
+
+    if sys.argv[1:2] == ['collect']:
+        # The collector uses asyncio, so it is only imported when it is run
+        from system_profile import collector
+        collector.collect_main(sys.argv[2:])
+        return
+
+    system_info = model.HostResult()
+    verdicts = {}
+    durations = {}
+    skipped = []
+    stopped = None
+    parser = argument_parser()
+    args = parser.parse_args()
+    if args.list_checks:
+        for check in CHECKS:
+            print('{0} ({1})'.format(check.name, check.cost))
+
+        for name in sorted(plugins.discover_plugins().keys()):
+            print('{0} (plugin)'.format(name))
+
+        return
+
+    selected_plugins = args.plugin
+    if selected_plugins is None and args.only:
+        # Plugins named with --only are loaded without loading the others
+        selected_plugins = args.only
+
+    try:
+        checks = get_checks(selected_plugins)
+        checks, reported = plugins.select_checks(
+            checks,
+            args.only,
+            args.skip
+        )
+    except plugins.PluginError as e:
+        # A plugin that can not be used is a usage error, exit 2 like one
+        parser.error(str(e))
+    if args.fail_fast:
+        checks = plugins.tiered(checks)
+
+    progress = Progress(
+        checks,
+        'results.txt.partial',
+        live=not args.verbose
     )
+    try:
+        for check in checks:
+            progress.start(check)
+            if not can_run(check, args):
+                if check not in reported:
+                    progress.finish(check, '', None)
+                    continue
+
+                skipped.append(check.name)
+                verdicts[check.name] = model.SKIPPED
+                progress.finish(check, skipped_section(check), model.SKIPPED)
+                continue
+
+            started = time.time()
+            system_info[check.name] = check.gather(system_info, args)
+            durations[check.name] = time.time() - started
+            if check not in reported:
+                # Only gathered for the checks that require it
+                progress.finish(check, '', None)
+                continue
+
+            section, verdict = render_section(check, system_info)
+            verdicts[check.name] = verdict
+            progress.finish(check, section, verdict)
+            if args.fail_fast and check.disqualifying and verdict == 'FAIL':
+                stopped = check
+                break
+    finally:
+        progress.close()
 
-    if system_info.get('profile').get('based_on').lower() == 'rhel':
-        system_info['selinux'] = selinux('/etc/selinux/config', args.verbose)
+    if stopped is not None:
+        print(
+            '\n{0} failed, the remaining checks were not run '
+            '(--fail-fast)'.format(stopped.name)
+        )
 
-    system_info['infinity_set'] = None
-    if system_info.get('profile').get('distribution').lower() == 'sles':
-        system_info['infinity_set'] = suse_infinity_check(
-            '/etc/systemd/system.conf',
-            args.verbose
+    overall_result = process_results(system_info, reported, skipped)
+    progress.remove()
+    if args.output_json:
+        write_atomic(
+            args.output_json,
+            json.dumps(system_info.to_dict(), sort_keys=True, indent=2)
+        )
+
+    if args.export_prometheus:
+        write_atomic(
+            args.export_prometheus,
+            prometheus.render(
+                system_info,
+                verdicts,
+                durations,
+                overall_result,
+                time.time()
+            )
+        )
+
+    if args.store:
+        store.record_run(
+            args.store,
+            socket.gethostname(),
+            time.time(),
+            system_info.to_dict(),
+            verdicts,
+            overall_result
         )
 
-    system_info['sysctl'] = check_sysctl(args.verbose)
-    overall_result = process_results(system_info)
+    if args.upload:
+        try:
+            upload.upload_results(
+                args.upload,
+                {
+                    'host': socket.gethostname(),
+                    'timestamp': time.time(),
+                    'results': system_info.to_dict(),
+                    'verdicts': verdicts,
+                    'overall': overall_result
+                },
+                args.verbose
+            )
+        except upload.UploadError as error:
+            # The results are still in results.txt, so the run is not lost
+            print('\nWARNING: {0}'.format(error))
+
     print('\nOverall Result: {0}'.format(overall_result))
     print(
         'To view details about the results a results.txt file has been '
         'generated in the current directory\n'
     )
+    if not args.fail_fast:
+        # Scripts that run without --fail-fast expect the run to exit 0
+        return 0
+
+    return plugins.exit_code(reported, verdicts)
 
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
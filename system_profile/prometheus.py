@@ -0,0 +1,157 @@
+"""
+Prometheus textfile collector output for preflight results
+
+Writes gauges in the text exposition format for node_exporter's textfile
+collector. Verdicts are exported as 0 for PASS, 1 for WARN and 2 for FAIL.
+"""
+
+
+PREFIX = 'ae_preflight'
+VERDICT_VALUES = {'PASS': 0, 'WARN': 1, 'FAIL': 2}
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace(
+        '"',
+        '\\"'
+    )
+
+
+class Metrics(object):
+    """
+    Collects samples per metric name so each metric gets one HELP and TYPE
+    header no matter how many label sets it has
+    """
+    def __init__(self):
+        self.order = []
+        self.help = {}
+        self.samples = {}
+
+    def add(self, name, help_text, value, labels=None):
+        if value is None:
+            return
+
+        name = '{0}_{1}'.format(PREFIX, name)
+        if name not in self.samples:
+            self.order.append(name)
+            self.help[name] = help_text
+            self.samples[name] = []
+
+        label_text = ''
+        if labels:
+            label_text = '{{{0}}}'.format(
+                ','.join(
+                    '{0}="{1}"'.format(key, _escape(labels[key]))
+                    for key in sorted(labels.keys())
+                )
+            )
+
+        self.samples[name].append(
+            '{0}{1} {2}'.format(name, label_text, float(value))
+        )
+
+    def render(self):
+        lines = []
+        for name in self.order:
+            lines.append('# HELP {0} {1}'.format(name, self.help[name]))
+            lines.append('# TYPE {0} gauge'.format(name))
+            lines.extend(self.samples[name])
+
+        return '\n'.join(lines) + '\n'
+
+
+def render(system_info, verdicts, durations, overall, timestamp):
+    """
+    Build the textfile content from a HostResult, the verdict and duration of
+    each check and the overall result
+    """
+    metrics = Metrics()
+    resources = system_info.get('resources')
+    if resources is not None:
+        for name, requirement in [
+            ('memory_gb', resources.memory),
+            ('cpu_cores', resources.cpu_cores)
+        ]:
+            metrics.add(
+                name,
+                'Actual value and the minimum required',
+                requirement.get('actual'),
+                {'kind': 'actual'}
+            )
+            metrics.add(
+                name,
+                'Actual value and the minimum required',
+                requirement.minimum,
+                {'kind': 'minimum'}
+            )
+
+    for mount in system_info.get('mounts') or ():
+        labels = {'mountpoint': mount.mountpoint}
+        metrics.add(
+            'mount_free_gb',
+            'Free space on the mount in GB',
+            mount.get('free'),
+            labels
+        )
+        metrics.add(
+            'mount_total_gb',
+            'Total size of the mount in GB',
+            mount.get('total'),
+            labels
+        )
+        metrics.add(
+            'mount_recommended_gb',
+            'Recommended free space on the mount in GB',
+            mount.get('recommended'),
+            labels
+        )
+        metrics.add(
+            'mount_inodes_free',
+            'Free inodes on the mount',
+            mount.get('inodes_free'),
+            labels
+        )
+        metrics.add(
+            'mount_inodes_total',
+            'Total inodes on the mount',
+            mount.get('inodes_total'),
+            labels
+        )
+
+    for interface in system_info.get('ports') or ():
+        for port, status in interface.ports:
+            metrics.add(
+                'port_open',
+                '1 when the port is open on the interface, 0 when closed',
+                1 if status == 'open' else 0,
+                {'interface': interface.interface, 'port': port}
+            )
+
+    for name in sorted(verdicts.keys()):
+        if verdicts[name] in VERDICT_VALUES:
+            metrics.add(
+                'section_verdict',
+                'Verdict of the section, 0 PASS, 1 WARN, 2 FAIL',
+                VERDICT_VALUES[verdicts[name]],
+                {'section': name}
+            )
+
+    for name in sorted(durations.keys()):
+        metrics.add(
+            'check_duration_seconds',
+            'Time taken to gather the check',
+            durations[name],
+            {'check': name}
+        )
+
+    metrics.add(
+        'overall_result',
+        'Overall result of the run, 0 PASS, 1 WARN, 2 FAIL',
+        VERDICT_VALUES.get(overall)
+    )
+    metrics.add(
+        'last_run_timestamp_seconds',
+        'Time the preflight checks last ran',
+        timestamp
+    )
+    return metrics.render()
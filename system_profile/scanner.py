@@ -0,0 +1,111 @@
+"""
+Shared scanner for line based config files
+
+A file is read with a single buffered read and all of the named patterns of a
+ConfigScanner are applied to it in one pass using a single precompiled
+alternation. Each pattern either keeps the first match (FIRST) or collects
+every match (ALL). Files read by more than one check are cached for the run.
+"""
+
+import re
+
+
+FIRST = 'first'
+ALL = 'all'
+
+_file_cache = {}
+
+
+def read_file(path, cache=True):
+    """
+    Read the whole file in one call. Cached files are only read once per run,
+    live files such as the ones in /proc should pass cache=False
+    """
+    if cache and path in _file_cache:
+        return _file_cache[path]
+
+    with open(path) as f:
+        content = f.read()
+
+    if cache:
+        _file_cache[path] = content
+
+    return content
+
+
+def read_values(paths, cache=False):
+    """
+    Read a batch of small files such as the ones in /proc/sys or /sys in one
+    pass. Returns the stripped content of each path, or None when it could
+    not be read
+    """
+    values = {}
+    for path in paths:
+        try:
+            values[path] = read_file(path, cache).strip()
+        except (IOError, OSError):
+            values[path] = None
+
+    return values
+
+
+def clear_cache():
+    _file_cache.clear()
+
+
+class ConfigScanner(object):
+    """
+    Patterns are (name, regex, mode) tuples. The regex is matched per line
+    (^ and $ match at line boundaries) and the value of a match is its first
+    capture group, or the whole match when the regex has no groups
+    """
+    def __init__(self, patterns):
+        self.names = []
+        self.modes = {}
+        self.groups = {}
+        alternatives = []
+        group_index = 1
+        for name, regex, mode in patterns:
+            if mode not in [FIRST, ALL]:
+                raise ValueError('Unknown scan mode {0}'.format(mode))
+
+            self.names.append(name)
+            self.modes[name] = mode
+            inner_groups = re.compile(regex).groups
+            # The outer group identifies the pattern, the value is the first
+            # group of the pattern itself
+            self.groups[group_index] = (
+                name,
+                group_index + 1 if inner_groups else group_index
+            )
+            alternatives.append('({0})'.format(regex))
+            group_index += inner_groups + 1
+
+        self.pattern = re.compile('|'.join(alternatives), re.MULTILINE)
+        self.all_first = ALL not in self.modes.values()
+
+    def scan(self, content):
+        """
+        Scan the content in one pass. FIRST patterns give the first value or
+        None, ALL patterns give a list of every value in file order
+        """
+        results = {}
+        for name in self.names:
+            results[name] = [] if self.modes[name] == ALL else None
+
+        remaining = len(self.names)
+        for match in self.pattern.finditer(content):
+            name, value_group = self.groups[match.lastindex]
+            if self.modes[name] == ALL:
+                results[name].append(match.group(value_group))
+            elif results[name] is None:
+                results[name] = match.group(value_group)
+                remaining -= 1
+                # Nothing left to find once every first match is known
+                if self.all_first and remaining == 0:
+                    break
+
+        return results
+
+    def scan_file(self, path, cache=True):
+        return self.scan(read_file(path, cache))
@@ -0,0 +1,16 @@
+"""
+Small statistics helpers shared by the probes
+"""
+
+import math
+
+
+def percentile(values, percent):
+    """
+    Nearest rank percentile of a sorted list
+    """
+    if not values:
+        return None
+
+    rank = int(math.ceil(percent / 100.0 * len(values)))
+    return values[min(max(rank, 1), len(values)) - 1]
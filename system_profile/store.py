@@ -0,0 +1,459 @@
+"""
+Local history of preflight runs kept in SQLite
+
+Every run is stored in the runs table, with each section of the results kept
+as JSON along with a hash of its content in the sections table. Each value in
+the results is also flattened into one row of the metrics table per host,
+check and metric, i.e. check mounts and metric /var.free. The metrics table is
+indexed on host, check and timestamp so that trend and worst host queries stay
+fast with hundreds of thousands of runs stored.
+"""
+
+from system_profile import model
+
+
+import argparse
+import sqlite3
+import json
+import time
+import re
+
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS runs (
+        id INTEGER PRIMARY KEY,
+        host TEXT NOT NULL,
+        timestamp REAL NOT NULL,
+        overall TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS sections (
+        run_id INTEGER NOT NULL REFERENCES runs (id),
+        check_name TEXT NOT NULL,
+        hash TEXT NOT NULL,
+        content TEXT NOT NULL,
+        PRIMARY KEY (run_id, check_name)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS metrics (
+        run_id INTEGER NOT NULL REFERENCES runs (id),
+        host TEXT NOT NULL,
+        timestamp REAL NOT NULL,
+        check_name TEXT NOT NULL,
+        metric TEXT NOT NULL,
+        value REAL,
+        text TEXT
+    )
+    """,
+    'CREATE INDEX IF NOT EXISTS runs_host ON runs (host, timestamp)',
+    'CREATE INDEX IF NOT EXISTS runs_timestamp ON runs (timestamp)',
+    """
+    CREATE INDEX IF NOT EXISTS metrics_check ON metrics
+        (check_name, metric, timestamp, host, value)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS metrics_host ON metrics
+        (host, check_name, metric, timestamp)
+    """,
+    'CREATE INDEX IF NOT EXISTS metrics_run ON metrics (run_id, metric)'
+]
+DURATIONS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+
+def connect(path):
+    """
+    Open the store and create the tables when needed. WAL mode lets queries
+    run while another run is being written
+    """
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    with conn:
+        for statement in SCHEMA:
+            conn.execute(statement)
+
+    return conn
+
+
+def flatten(value, prefix=''):
+    """
+    Flatten a section of the results into (metric, value, text) rows. Numbers
+    and booleans go in value, everything else is kept as text
+    """
+    rows = []
+    if isinstance(value, dict):
+        for key in sorted(value.keys()):
+            metric = key if not prefix else '{0}.{1}'.format(prefix, key)
+            rows.extend(flatten(value[key], metric))
+    elif isinstance(value, bool):
+        rows.append((prefix, float(value), None))
+    elif isinstance(value, (int, float)):
+        rows.append((prefix, float(value), None))
+    elif isinstance(value, (list, tuple)):
+        rows.append((prefix, float(len(value)), json.dumps(list(value))))
+    elif value is not None:
+        rows.append((prefix, None, str(value)))
+
+    return rows
+
+
+def _run_rows(run_id, host, timestamp, system_info, verdicts, overall):
+    rows = [(run_id, host, timestamp, 'overall', 'verdict', None, overall)]
+    for check_name in sorted(system_info.keys()):
+        for metric, value, text in flatten(system_info[check_name]):
+            rows.append(
+                (run_id, host, timestamp, check_name, metric, value, text)
+            )
+
+    for check_name, verdict in verdicts.items():
+        if verdict is not None:
+            rows.append(
+                (run_id, host, timestamp, check_name, 'verdict', None, verdict)
+            )
+
+    return rows
+
+
+def record_runs(conn, runs):
+    """
+    Store a batch of runs in one transaction. Each run is a tuple of
+    (host, timestamp, system_info, verdicts, overall) where system_info is in
+    the dict layout. Returns the ids of the stored runs
+    """
+    run_ids = []
+    with conn:
+        for host, timestamp, system_info, verdicts, overall in runs:
+            cursor = conn.execute(
+                'INSERT INTO runs (host, timestamp, overall) VALUES (?, ?, ?)',
+                (host, timestamp, overall)
+            )
+            run_ids.append(cursor.lastrowid)
+            conn.executemany(
+                'INSERT INTO sections VALUES (?, ?, ?, ?)',
+                [
+                    (
+                        cursor.lastrowid,
+                        check_name,
+                        model.section_hash(data),
+                        json.dumps(data, sort_keys=True)
+                    )
+                    for check_name, data in system_info.items()
+                ]
+            )
+            conn.executemany(
+                'INSERT INTO metrics VALUES (?, ?, ?, ?, ?, ?, ?)',
+                _run_rows(
+                    cursor.lastrowid,
+                    host,
+                    timestamp,
+                    system_info,
+                    verdicts or {},
+                    overall
+                )
+            )
+
+    return run_ids
+
+
+def record_run(path, host, timestamp, system_info, verdicts, overall):
+    conn = connect(path)
+    try:
+        return record_runs(
+            conn,
+            [(host, timestamp, system_info, verdicts, overall)]
+        )[0]
+    finally:
+        conn.close()
+
+
+def get_run(conn, run_id):
+    """
+    Return (host, timestamp, overall, system_info) for a stored run
+    """
+    row = conn.execute(
+        'SELECT host, timestamp, overall FROM runs WHERE id = ?',
+        (run_id,)
+    ).fetchone()
+    if row is None:
+        return None
+
+    return row[0], row[1], row[2], load_sections(conn, run_id)
+
+
+def section_hashes(conn, run_id):
+    """
+    Content hash of each section of a stored run
+    """
+    return dict(
+        conn.execute(
+            'SELECT check_name, hash FROM sections WHERE run_id = ?',
+            (run_id,)
+        ).fetchall()
+    )
+
+
+def load_sections(conn, run_id, names=None):
+    """
+    Load the sections of a stored run, or only the named ones
+    """
+    query = 'SELECT check_name, content FROM sections WHERE run_id = ?'
+    params = [run_id]
+    if names is not None:
+        names = list(names)
+        if not names:
+            return {}
+
+        query += ' AND check_name IN ({0})'.format(
+            ', '.join(['?'] * len(names))
+        )
+        params.extend(names)
+
+    return dict(
+        (check_name, json.loads(content))
+        for check_name, content in conn.execute(query, params).fetchall()
+    )
+
+
+def latest_run(conn, host):
+    row = conn.execute(
+        'SELECT id FROM runs WHERE host = ? ORDER BY timestamp DESC LIMIT 1',
+        (host,)
+    ).fetchone()
+    if row is None:
+        return None
+
+    return row[0]
+
+
+def latest_runs(conn, since=None):
+    """
+    The latest run of every host as (run id, host, timestamp, overall) rows
+    """
+    query = (
+        'SELECT runs.id, runs.host, runs.timestamp, runs.overall FROM runs '
+        'JOIN (SELECT host, MAX(timestamp) AS latest FROM runs GROUP BY host) '
+        'AS latest ON runs.host = latest.host '
+        'AND runs.timestamp = latest.latest'
+    )
+    params = []
+    if since is not None:
+        query += ' WHERE runs.timestamp >= ?'
+        params.append(since)
+
+    latest = {}
+    for row in conn.execute(query + ' ORDER BY runs.id', params).fetchall():
+        # Runs uploaded with the same timestamp keep the last one stored
+        latest[row[1]] = row
+
+    return [latest[host] for host in sorted(latest.keys())]
+
+
+def cluster_summary(conn, since=None):
+    """
+    Summary of the latest run of every host. Counts the overall results and
+    the verdicts of each check, and lists the hosts that failed a check
+    """
+    runs = latest_runs(conn, since)
+    summary = {'hosts': len(runs), 'overall': {}, 'checks': {}, 'failing': {}}
+    for _, host, _, overall in runs:
+        summary['overall'][overall] = summary['overall'].get(overall, 0) + 1
+
+    run_ids = [run[0] for run in runs]
+    # Stay under the SQLite limit on the number of parameters
+    for start in range(0, len(run_ids), 500):
+        batch = run_ids[start:start + 500]
+        for host, check_name, verdict in conn.execute(
+            'SELECT host, check_name, text FROM metrics '
+            'WHERE run_id IN ({0}) AND metric = ? AND check_name != ?'.format(
+                ', '.join(['?'] * len(batch))
+            ),
+            batch + ['verdict', 'overall']
+        ).fetchall():
+            counts = summary['checks'].setdefault(check_name, {})
+            counts[verdict] = counts.get(verdict, 0) + 1
+            if verdict == 'FAIL':
+                summary['failing'].setdefault(check_name, []).append(host)
+
+    for hosts in summary['failing'].values():
+        hosts.sort()
+
+    return summary
+
+
+def parse_since(since, now=None):
+    """
+    Turn 7d, 12h, 30m or an epoch timestamp into an epoch timestamp
+    """
+    if since is None:
+        return None
+
+    if now is None:
+        now = time.time()
+
+    found = re.search(r'^(\d+(?:\.\d+)?)([smhdw])$', since)
+    if found:
+        return now - float(found.group(1)) * DURATIONS[found.group(2)]
+
+    return float(since)
+
+
+def trend(conn, check_name, metric, host=None, since=None):
+    """
+    Values of a metric over time as (host, timestamp, value, text) rows
+    """
+    query = (
+        'SELECT host, timestamp, value, text FROM metrics '
+        'WHERE check_name = ? AND metric = ?'
+    )
+    params = [check_name, metric]
+    if host:
+        query += ' AND host = ?'
+        params.append(host)
+
+    if since is not None:
+        query += ' AND timestamp >= ?'
+        params.append(since)
+
+    query += ' ORDER BY host, timestamp'
+    return conn.execute(query, params).fetchall()
+
+
+def worst(
+    conn,
+    check_name,
+    metric,
+    limit=10,
+    since=None,
+    highest=False,
+    below=None,
+    above=None
+):
+    """
+    Hosts with the lowest (or highest) value of a metric within the window
+    as (host, value, timestamp of the last run) rows. below and above only
+    count values past the threshold, i.e. free space under 100 GB
+    """
+    aggregate = 'MAX' if highest else 'MIN'
+    query = (
+        'SELECT host, {0}(value), MAX(timestamp) FROM metrics '
+        'WHERE check_name = ? AND metric = ? AND value IS NOT NULL'
+    ).format(aggregate)
+    params = [check_name, metric]
+    if since is not None:
+        query += ' AND timestamp >= ?'
+        params.append(since)
+
+    if below is not None:
+        query += ' AND value < ?'
+        params.append(below)
+
+    if above is not None:
+        query += ' AND value > ?'
+        params.append(above)
+
+    query += ' GROUP BY host ORDER BY 2 {0}, 1 LIMIT ?'.format(
+        'DESC' if highest else 'ASC'
+    )
+    params.append(limit)
+    return conn.execute(query, params).fetchall()
+
+
+def format_timestamp(timestamp):
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp))
+
+
+def handle_query_arguments(argv):
+    parser = argparse.ArgumentParser(
+        prog='ae-profile query',
+        description='Query the history of stored preflight runs'
+    )
+    parser.add_argument(
+        '--store',
+        required=True,
+        help='Path to the SQLite results store'
+    )
+    parser.add_argument(
+        'query',
+        choices=['trend', 'worst'],
+        help='trend lists values over time, worst lists the worst hosts'
+    )
+    parser.add_argument('check', help='Check name i.e. mounts')
+    parser.add_argument('metric', help='Metric name i.e. /var.free')
+    parser.add_argument('--host', required=False, help='Only this host')
+    parser.add_argument(
+        '--since',
+        required=False,
+        help='Only runs since 7d, 12h, 30m or an epoch timestamp'
+    )
+    parser.add_argument(
+        '-n',
+        '--limit',
+        required=False,
+        type=int,
+        default=10,
+        help='Number of hosts for worst'
+    )
+    parser.add_argument(
+        '--highest',
+        required=False,
+        action='store_true',
+        help='Worst means the highest value instead of the lowest'
+    )
+    parser.add_argument(
+        '--below',
+        required=False,
+        type=float,
+        help='Only count values below this threshold'
+    )
+    parser.add_argument(
+        '--above',
+        required=False,
+        type=float,
+        help='Only count values above this threshold'
+    )
+    return parser.parse_args(argv)
+
+
+def query_main(argv):
+    args = handle_query_arguments(argv)
+    conn = connect(args.store)
+    try:
+        since = parse_since(args.since)
+        if args.query == 'trend':
+            for host, timestamp, value, text in trend(
+                conn,
+                args.check,
+                args.metric,
+                args.host,
+                since
+            ):
+                print(
+                    '{0}  {1}  {2}'.format(
+                        format_timestamp(timestamp),
+                        host,
+                        text if value is None else value
+                    )
+                )
+        else:
+            for host, value, timestamp in worst(
+                conn,
+                args.check,
+                args.metric,
+                args.limit,
+                since,
+                args.highest,
+                args.below,
+                args.above
+            ):
+                print(
+                    '{0}  {1}  (last run {2})'.format(
+                        host,
+                        value,
+                        format_timestamp(timestamp)
+                    )
+                )
+    finally:
+        conn.close()
@@ -0,0 +1,108 @@
+"""
+Push the results of a run to a collector
+
+The results are sent as gzip compressed JSON in a single POST. Connection
+errors, timeouts and 5xx responses are retried with exponential backoff and
+jitter so a fleet of nodes finishing at the same time does not retry in step.
+Other responses mean the collector refused the results and are not retried.
+"""
+
+import random
+import socket
+import json
+import gzip
+import time
+import io
+
+
+try:
+    from urllib.request import urlopen, Request
+    from urllib.error import HTTPError, URLError
+except ImportError:
+    from urllib2 import urlopen, Request, HTTPError, URLError
+
+
+RETRIES = 5
+BACKOFF = 0.5
+MAX_BACKOFF = 30.0
+TIMEOUT = 10.0
+
+
+class UploadError(Exception):
+    pass
+
+
+def compress(payload):
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode='wb') as f:
+        f.write(json.dumps(payload, sort_keys=True).encode('utf-8'))
+
+    return buffer.getvalue()
+
+
+def backoff_delay(attempt, backoff=BACKOFF):
+    """
+    Full jitter, a random delay up to the exponential backoff for the attempt
+    """
+    return random.uniform(0, min(MAX_BACKOFF, backoff * 2 ** attempt))
+
+
+def upload_results(
+    url,
+    payload,
+    verbose,
+    retries=RETRIES,
+    backoff=BACKOFF,
+    timeout=TIMEOUT
+):
+    """
+    POST the payload to the collector and return its decoded response.
+    Raises UploadError once the retries are used up or the collector refuses
+    the results
+    """
+    body = compress(payload)
+    attempt = 0
+    while True:
+        request = Request(
+            url,
+            data=body,
+            headers={
+                'Content-Type': 'application/json',
+                'Content-Encoding': 'gzip'
+            }
+        )
+        try:
+            response = urlopen(request, timeout=timeout)
+            try:
+                return json.loads(response.read().decode('utf-8'))
+            finally:
+                response.close()
+        except HTTPError as error:
+            if error.code < 500:
+                raise UploadError(
+                    'Collector refused the results: {0} {1}'.format(
+                        error.code,
+                        error.read().decode('utf-8', 'replace').strip()
+                    )
+                )
+
+            reason = 'HTTP {0}'.format(error.code)
+        except (URLError, socket.error) as error:
+            # socket.timeout is a socket.error
+            reason = str(getattr(error, 'reason', error))
+
+        if attempt >= retries:
+            raise UploadError(
+                'Could not upload results to {0} after {1} attempts: '
+                '{2}'.format(url, attempt + 1, reason)
+            )
+
+        delay = backoff_delay(attempt, backoff)
+        if verbose:
+            print(
+                'Upload to {0} failed ({1}), retrying in {2:.1f} '
+                'seconds'.format(url, reason, delay)
+            )
+
+        time.sleep(delay)
+        attempt += 1
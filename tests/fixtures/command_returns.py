@@ -13,38 +13,6 @@ def ip_addr_show():
     return ip_show
 
 
-def distro_release_info(os):
-    return_value = {}
-    if os == 'centos':
-        return_value = {
-            'codename': 'Core',
-            'name': 'CentOS Linux',
-            'version_id': '7.5.1804',
-            'id': 'centos'
-        }
-    elif os == 'ubuntu':
-        return_value = {
-            'codename': 'Xenial Xerus',
-            'name': 'Ubuntu',
-            'version_id': '16.04.4',
-            'id': 'ec2'
-        }
-    elif os == 'suse':
-        return_value = {
-            'name': 'SLES',
-            'version': '15',
-            'codename': '',
-            'version_id': '15',
-            'pretty_name': 'SUSE Linux Enterprise Server 15',
-            'id': 'sles',
-            'id_like': 'suse',
-            'ansi_color': '0;32',
-            'cpe_name': 'cpe:/o:suse:sles:15'
-        }
-
-    return return_value
-
-
 def proc_meminfo():
     return (
         'MemTotal:       264119388 kB\n'
@@ -79,15 +47,16 @@ def psutil_disk_partitions():
     ]
 
 
-def psutil_disk_usage():
-    class DiskUsageTest():
-        def __init__(self, total, used, free, percent):
-            self.total = total
-            self.used = used
-            self.free = free
-            self.percent = percent
+def statvfs():
+    class StatvfsTest():
+        def __init__(self, frsize, blocks, bavail, files, favail):
+            self.f_frsize = frsize
+            self.f_blocks = blocks
+            self.f_bavail = bavail
+            self.f_files = files
+            self.f_favail = favail
 
-    return DiskUsageTest(214422237184, 1679187968, 212743049216, 0.8)
+    return StatvfsTest(4096, 52349179, 51939221, 13087744, 13000000)
 
 
 def xfs_info():
@@ -150,3 +119,62 @@ def get_pid(pid, name):
             return self.process_name
 
     return PidInfoTest(pid, name)
+
+
+def pressure(some_total, full_total):
+    return (
+        'some avg10=0.00 avg60=0.00 avg300=0.00 total={0}\n'
+        'full avg10=0.00 avg60=0.00 avg300=0.00 total={1}\n'
+    ).format(some_total, full_total)
+
+
+def vmstat(scanned, swapped, oom_kills):
+    return (
+        'nr_free_pages 123456\n'
+        'pswpin {1}\n'
+        'pswpout {1}\n'
+        'allocstall_normal 0\n'
+        'allocstall_movable 0\n'
+        'pgmajfault 337\n'
+        'pgscan_kswapd {0}\n'
+        'pgscan_direct {0}\n'
+        'pgscan_direct_throttle 5\n'
+        'oom_kill {2}\n'
+    ).format(scanned, swapped, oom_kills)
+
+
+def proc_stat(steal, iowait):
+    # cpu1 is offline so it has no line
+    return (
+        'cpu  {0} 0 {0} {0} {1} 0 0 {2} 0 0\n'
+        'cpu0 {0} 0 {0} {0} {1} 0 0 {2} 0 0\n'
+        'cpu2 {0} 0 {0} {0} 0 0 0 0 0 0\n'
+        'intr 1234 0 0\n'
+        'ctxt 5678\n'
+    ).format(1000 + steal, iowait, steal)
+
+
+def cpu_stat(periods, throttled, throttled_usec):
+    return (
+        'usage_usec 1000000\n'
+        'nr_periods {0}\n'
+        'nr_throttled {1}\n'
+        'throttled_usec {2}\n'
+    ).format(periods, throttled, throttled_usec)
+
+
+def net_dev(rx_bytes, tx_bytes, rx_dropped):
+    return (
+        'Inter-|   Receive                                                |  '
+        'Transmit\n'
+        ' face |bytes    packets errs drop fifo frame compressed multicast|'
+        'bytes    packets errs drop fifo colls carrier compressed\n'
+        '    lo: 5644358    6093    0    0    0     0          0         0 '
+        '5644358    6093    0    0    0     0       0          0\n'
+        '  eth0: {0}     234    0    {2}    0     0          0         0 '
+        '{1}     233    0    0    0     0       0          0\n'
+        'docker0: 0       0    0    0    0     0          0         0 '
+        '0       0    0    0    0     0       0          0\n'
+        '  eth1: 0       0    0    0    0     0          0         0 '
+        '0       0    0    0    0     0       0          0\n'
+    ).format(rx_bytes, tx_bytes, rx_dropped)
@@ -1,3 +1,33 @@
+import argparse
+
+
+def arguments(**kwargs):
+    values = {
+        'interface': None,
+        'verbose': None,
+        'memory_probe': False,
+        'min_copy_bandwidth': 4.0,
+        'min_all_core_bandwidth': 16.0,
+        'max_memory_latency': 150.0,
+        'overlay_probe': None,
+        'dns_probe': None,
+        'agent_window': None,
+        'sample_window': 5.0,
+        'root': None,
+        'proc': None,
+        'only': None,
+        'skip': None,
+        'fail_fast': False,
+        'plugin': None,
+        'store': None,
+        'output_json': None,
+        'export_prometheus': None,
+        'upload': None,
+        'list_checks': False
+    }
+    values.update(kwargs)
+    return argparse.Namespace(**values)
+
 
 def os_return(distro):
     if distro == 'rhel':
@@ -63,6 +93,149 @@ def memory_cpu(test_pass=True):
     }
 
 
+def capacity(test_pass=True):
+    capacity = {
+        'file_handles': {
+            'used': 9216,
+            'limit': 1048576,
+            'headroom': 99.12,
+            'recommended': 1048576
+        },
+        'processes': {
+            'used': 310,
+            'limit': 4194304,
+            'headroom': 99.99,
+            'recommended': 131072
+        },
+        'threads': {
+            'used': 950,
+            'limit': 2061167,
+            'headroom': 99.95,
+            'recommended': 262144
+        },
+        'systemd_nofile': {'soft': 1024, 'hard': 524288},
+        'limits': [],
+        'recommended': {'nofile': 65536, 'nproc': 32768}
+    }
+    if not test_pass:
+        capacity['threads']['limit'] = 1000
+        capacity['threads']['headroom'] = 5.0
+        capacity['limits'] = [
+            {
+                'domain': '@ae',
+                'type': 'hard',
+                'item': 'nofile',
+                'value': 8192,
+                'file': '/etc/security/limits.d/90-ae.conf'
+            }
+        ]
+
+    return capacity
+
+
+def pressure(test_pass=True):
+    pressure = {
+        'window': 5.0,
+        'stall': {
+            'cpu': {'some': 0.24, 'full': 0.0},
+            'memory': {'some': 0.0, 'full': 0.0},
+            'io': {'some': 0.12, 'full': 0.05}
+        },
+        'reclaim': {
+            'kswapd_scan': 0.0,
+            'direct_scan': 0.0,
+            'allocstall': 0.0,
+            'swap_in': 0.0,
+            'swap_out': 0.0,
+            'major_faults': 0.4
+        },
+        'oom_kills': {'window': 0, 'since_boot': 0}
+    }
+    if not test_pass:
+        pressure['stall']['memory'] = {'some': 12.5, 'full': 3.1}
+        pressure['reclaim']['direct_scan'] = 2048.0
+        pressure['oom_kills'] = {'window': 1, 'since_boot': 4}
+
+    return pressure
+
+
+def cpu_steal(test_pass=True):
+    steal = {
+        'window': 5.0,
+        'cpus': 2,
+        'aggregate': {'steal': 0.2, 'iowait': 0.1, 'irq': 0.0, 'softirq': 0.3},
+        'cores': {
+            'steal': [0.4, 0.0],
+            'iowait': [0.2, 0.0],
+            'irq': [0.0, 0.0],
+            'softirq': [0.5, 0.1]
+        },
+        'throttling': {
+            'cgroup': '/sys/fs/cgroup/cpu',
+            'periods': 50,
+            'throttled': 0,
+            'throttled_percent': 0.0,
+            'throttled_seconds': 0.0
+        }
+    }
+    if not test_pass:
+        steal['aggregate']['steal'] = 15.5
+        steal['cores']['steal'] = [31.0, 0.0]
+        steal['throttling']['throttled'] = 20
+        steal['throttling']['throttled_percent'] = 40.0
+        steal['throttling']['throttled_seconds'] = 1.2
+
+    return steal
+
+
+def nic(test_pass=True):
+    rates = {
+        'rx_errors': 0.0,
+        'rx_dropped': 0.0,
+        'rx_fifo': 0.0,
+        'rx_frame': 0.0,
+        'tx_errors': 0.0,
+        'tx_dropped': 0.0,
+        'tx_fifo': 0.0,
+        'tx_carrier': 0.0
+    }
+    nic = {
+        'window': 5.0,
+        'interfaces': {
+            'eth0': {
+                'speed_mbps': 10000,
+                'rx_mbps': 12.5,
+                'tx_mbps': 3.2,
+                'utilization': 0.13,
+                'rates': dict(rates),
+                'since_boot': dict((name, 0) for name in rates)
+            }
+        }
+    }
+    if not test_pass:
+        eth0 = nic['interfaces']['eth0']
+        eth0['utilization'] = 72.4
+        eth0['rates']['rx_dropped'] = 14.2
+        eth0['since_boot']['rx_dropped'] = 52000
+
+    return nic
+
+
+def performance_mode(test_pass=True):
+    performance = {
+        'transparent_hugepage': {'enabled': 'madvise', 'defrag': 'madvise'},
+        'hugepages': {'2048kB': {'total': 0, 'free': 0}},
+        'fragmentation': {'free_pages': 945545, 'high_order_percent': 96.49},
+        'governors': {'performance': 64},
+        'pstate': {'driver': 'intel_pstate', 'status': 'active'}
+    }
+    if not test_pass:
+        performance['transparent_hugepage']['enabled'] = 'always'
+        performance['governors'] = {'performance': 16, 'powersave': 48}
+
+    return performance
+
+
 def mounts(test_pass=True):
     if test_pass:
         return {
@@ -72,14 +245,24 @@ def mounts(test_pass=True):
                 'total': 499.7,
                 'mount_options': 'rw,inode64,noquota',
                 'file_system': 'xfs',
-                'ftype': '1'
+                'ftype': '1',
+                'inodes_total': 261619712,
+                'inodes_free': 261500000,
+                'bytes_per_inode': 2050,
+                'files_per_gb': 524963,
+                'recommended_inodes': 4259840
             },
             '/tmp': {
                 'recommended': 30.0,
                 'free': 39.13,
                 'total': 39.7,
                 'mount_options': 'rw,inode64,noquota',
-                'file_system': 'ext4'
+                'file_system': 'ext4',
+                'inodes_total': 2600960,
+                'inodes_free': 2590000,
+                'bytes_per_inode': 16384,
+                'files_per_gb': 66189,
+                'recommended_inodes': 983040
             },
         }
 
@@ -90,28 +273,48 @@ def mounts(test_pass=True):
             'total': 19.7,
             'mount_options': 'rw,inode64,noquota',
             'file_system': 'xfs',
-            'ftype': '0'
+            'ftype': '0',
+            'inodes_total': 5160960,
+            'inodes_free': 5150000,
+            'bytes_per_inode': 4098,
+            'files_per_gb': 269210,
+            'recommended_inodes': 0
         },
         '/tmp': {
             'recommended': 30.0,
             'free': 19.13,
             'total': 19.7,
             'mount_options': 'rw,inode64,noquota',
-            'file_system': 'ext4'
+            'file_system': 'ext4',
+            'inodes_total': 1290240,
+            'inodes_free': 1280000,
+            'bytes_per_inode': 16394,
+            'files_per_gb': 66910,
+            'recommended_inodes': 983040
         },
         '/opt/anaconda': {
             'recommended': 100.0,
             'free': 98.13,
             'total': 99.7,
             'mount_options': 'rw,inode64,noquota',
-            'file_system': 'ext4'
+            'file_system': 'ext4',
+            'inodes_total': 6533120,
+            'inodes_free': 6500000,
+            'bytes_per_inode': 16386,
+            'files_per_gb': 66238,
+            'recommended_inodes': 3276800
         },
         '/var': {
             'recommended': 100.0,
             'free': 98.13,
             'total': 99.7,
             'mount_options': 'rw,inode64,noquota',
-            'file_system': 'ext4'
+            'file_system': 'ext4',
+            'inodes_total': 102080,
+            'inodes_free': 101000,
+            'bytes_per_inode': 1048741,
+            'files_per_gb': 1029,
+            'recommended_inodes': 3276800
         }
     }
 
@@ -141,6 +344,59 @@ def resolv_conf_warn():
     }
 
 
+def dns(test_pass=True):
+    dns = {
+        'rounds': 5,
+        'lookups': {
+            'repo.example.com': {
+                'expanded': [
+                    'repo.example.com.test.domain',
+                    'repo.example.com'
+                ],
+                'queries': 2
+            }
+        },
+        'servers': {
+            '10.0.0.2': {
+                'sent': 10,
+                'answered': 10,
+                'timeouts': 0,
+                'errors': {},
+                'p50_ms': 0.8,
+                'p90_ms': 1.5,
+                'p99_ms': 2.1,
+                'max_ms': 2.1
+            }
+        }
+    }
+    if not test_pass:
+        dns['lookups']['registry'] = {
+            'expanded': [
+                'registry.default.svc.cluster.local',
+                'registry.svc.cluster.local',
+                'registry.cluster.local',
+                'registry.test.domain',
+                'registry'
+            ],
+            'queries': 5
+        }
+        dns['servers']['10.0.0.2'].update(
+            {'timeouts': 2, 'answered': 8, 'p90_ms': 250.0}
+        )
+        dns['servers']['10.0.0.3'] = {
+            'sent': 10,
+            'answered': 0,
+            'timeouts': 10,
+            'errors': {},
+            'p50_ms': None,
+            'p90_ms': None,
+            'p99_ms': None,
+            'max_ms': None
+        }
+
+    return dns
+
+
 def ports(test_pass=True):
     if test_pass:
         return {
@@ -164,6 +420,29 @@ def ports(test_pass=True):
     }
 
 
+def conntrack(test_pass=True):
+    if test_pass:
+        return {
+            'count': 1520,
+            'max': 262144,
+            'utilization': 0.58,
+            'buckets': 262144,
+            'recommended_max': 262144,
+            'recommended_buckets': 65536,
+            'stats': {'drop': 0, 'early_drop': 0, 'insert_failed': 0}
+        }
+
+    return {
+        'count': 120000,
+        'max': 131072,
+        'utilization': 91.55,
+        'buckets': 16384,
+        'recommended_max': 262144,
+        'recommended_buckets': 65536,
+        'stats': {'drop': 16, 'early_drop': 0, 'insert_failed': 3}
+    }
+
+
 def agents(test_pass=True):
     if test_pass:
         return {'running': []}
@@ -195,6 +474,40 @@ def modules(test_pass=True):
     }
 
 
+def sysctl_tuning(test_pass=True):
+    tuning = {
+        'fs.inotify.max_user_watches': {
+            'subsystem': 'filesystem',
+            'rule': 'minimum',
+            'minimum': 524288,
+            'maximum': None,
+            'actual': 1048576,
+            'result': 'PASS'
+        },
+        'vm.max_map_count': {
+            'subsystem': 'memory',
+            'rule': 'minimum',
+            'minimum': 262144,
+            'maximum': None,
+            'actual': 262144,
+            'result': 'PASS'
+        },
+        'net.core.somaxconn': {
+            'subsystem': 'network',
+            'rule': 'minimum',
+            'minimum': 1024,
+            'maximum': None,
+            'actual': 4096,
+            'result': 'PASS'
+        }
+    }
+    if not test_pass:
+        tuning['vm.max_map_count']['actual'] = 65530
+        tuning['vm.max_map_count']['result'] = 'WARN'
+
+    return tuning
+
+
 def sysctl(test_pass=True):
     if test_pass:
         return {
@@ -204,7 +517,8 @@ def sysctl(test_pass=True):
                 'fs.may_detach_mounts',
                 'net.ipv4.ip_forward'
             ],
-            'disabled': []
+            'disabled': [],
+            'tuning': sysctl_tuning()
         }
 
     return {
@@ -213,7 +527,8 @@ def sysctl(test_pass=True):
             'net.bridge.bridge-nf-call-ip6tables',
             'net.bridge.bridge-nf-call-iptables',
             'fs.may_detach_mounts'
-        ]
+        ],
+        'tuning': sysctl_tuning(False)
     }
 
 
@@ -235,3 +550,106 @@ def infinity(test_pass=True):
         return True
 
     return False
+
+
+def memory_performance(test_pass=True):
+    if test_pass:
+        return {
+            'buffer_size': 600.0,
+            'copy_bandwidth': {'minimum': 4.0, 'actual': 9.12},
+            'all_core_bandwidth': {
+                'minimum': 16.0,
+                'actual': 88.4,
+                'workers': 64
+            },
+            'latency': {'maximum': 150.0, 'actual': 92.5}
+        }
+
+    return {
+        'buffer_size': 600.0,
+        'copy_bandwidth': {'minimum': 4.0, 'actual': 2.3},
+        'all_core_bandwidth': {
+            'minimum': 16.0,
+            'actual': 6.1,
+            'workers': 8
+        },
+        'latency': {'maximum': 150.0, 'actual': 212.75}
+    }
+
+
+def overlay(test_pass=True):
+    if test_pass:
+        return {
+            'directory': '/var/lib/gravity',
+            'd_type': True,
+            'mounted': True,
+            'error': None,
+            'copy_up': {
+                'files': 200,
+                'size': 65536,
+                'p50_ms': 0.15,
+                'p99_ms': 0.23,
+                'max_ms': 0.49
+            },
+            'small_files': {
+                'files': 2000,
+                'size': 4096,
+                'create_per_second': 41115,
+                'read_per_second': 98847
+            }
+        }
+
+    return {
+        'directory': '/var/lib',
+        'd_type': False,
+        'mounted': True,
+        'error': None,
+        'copy_up': {
+            'files': 200,
+            'size': 65536,
+            'p50_ms': 4.2,
+            'p99_ms': 38.5,
+            'max_ms': 61.0
+        },
+        'small_files': {
+            'files': 2000,
+            'size': 4096,
+            'create_per_second': 850,
+            'read_per_second': 12000
+        }
+    }
+
+
+def port_plan(test_pass=True):
+    if test_pass:
+        return {
+            'planned': {'tcp': 2801, 'udp': 2},
+            'ephemeral': '32768-60999',
+            'reserved': None,
+            'conflicts': {},
+            'ephemeral_overlap': {},
+            'recommended_reserved': None
+        }
+
+    return {
+        'planned': {'tcp': 2801, 'udp': 2},
+        'ephemeral': '20000-60999',
+        'reserved': '30000-32000',
+        'conflicts': {
+            'tcp/80': {
+                'services': ['Ingress'],
+                'listeners': ['[::]:80']
+            },
+            'tcp/2379-2380': {
+                'services': ['etcd'],
+                'listeners': ['0.0.0.0:2380', '127.0.0.1:2379']
+            }
+        },
+        'ephemeral_overlap': {
+            '32001-32767': {
+                'services': ['Gravity Hub', 'Kubernetes NodePort range'],
+                'listeners': []
+            }
+        },
+        'recommended_reserved': '30000-32767'
+    }
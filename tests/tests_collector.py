@@ -0,0 +1,150 @@
+from __future__ import absolute_import
+from .fixtures import reporting_returns
+from system_profile import upload
+from system_profile import store
+
+
+import threading
+import tempfile
+import shutil
+import sys
+import os
+
+
+if sys.version_info[:2] >= (2, 7):
+    from unittest import TestCase, skipIf
+else:
+    from unittest2 import TestCase, skipIf
+
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+
+try:
+    from urllib.request import urlopen
+    from concurrent.futures import ThreadPoolExecutor
+    from system_profile import collector
+    import asyncio
+except (ImportError, SyntaxError):
+    collector = None
+
+
+def payload(host, timestamp, overall):
+    return {
+        'host': host,
+        'timestamp': timestamp,
+        'results': {'profile': reporting_returns.os_return('rhel')},
+        'verdicts': {'profile': None, 'mounts': overall},
+        'overall': overall
+    }
+
+
+@skipIf(collector is None, 'The collector needs Python 3.5 or later')
+class TestCollector(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'cluster.db')
+        self.loop = asyncio.new_event_loop()
+        self.collector = collector.Collector(self.path, flush_interval=0.2)
+        port = self.loop.run_until_complete(
+            self.collector.start('127.0.0.1', 0)
+        )
+        self.url = 'http://127.0.0.1:{0}'.format(port)
+        self.thread = threading.Thread(target=self.loop.run_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        asyncio.run_coroutine_threadsafe(
+            self.collector.stop(),
+            self.loop
+        ).result(10)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+        shutil.rmtree(self.directory)
+
+    def test_concurrent_uploads_are_batched(self):
+        runs = [
+            payload('node{0}'.format(index), 1000.0 + index, 'PASS')
+            for index in range(20)
+        ]
+        runs.append(payload('node3', 2000.0, 'FAIL'))
+        with mock.patch(
+            'system_profile.collector.store.record_runs',
+            wraps=store.record_runs
+        ) as record_runs:
+            with ThreadPoolExecutor(max_workers=len(runs)) as pool:
+                responses = list(
+                    pool.map(
+                        lambda run: upload.upload_results(
+                            self.url + '/results',
+                            run,
+                            False
+                        ),
+                        runs
+                    )
+                )
+
+        self.assertEquals(
+            len(runs),
+            len(set(response['run_id'] for response in responses)),
+            'Every upload did not get its own run'
+        )
+        self.assertTrue(
+            record_runs.call_count < len(runs),
+            'Uploads were not written in batches'
+        )
+
+        summary = urlopen(self.url + '/summary', timeout=10)
+        try:
+            returns = upload.json.loads(summary.read().decode('utf-8'))
+        finally:
+            summary.close()
+
+        self.assertEquals(
+            {
+                'hosts': 20,
+                'overall': {'PASS': 19, 'FAIL': 1},
+                'checks': {'mounts': {'PASS': 19, 'FAIL': 1}},
+                'failing': {'mounts': ['node3']}
+            },
+            returns,
+            'Summary did not match the latest run of each host'
+        )
+
+    def test_bad_results_are_refused(self):
+        run = payload('node1', 1000.0, 'PASS')
+        del run['host']
+        with self.assertRaises(upload.UploadError) as raised:
+            upload.upload_results(self.url + '/results', run, False)
+
+        self.assertTrue(
+            'Missing host' in str(raised.exception),
+            'Reason was not returned'
+        )
+
+    def test_bad_timestamp_is_refused(self):
+        run = payload('node1', 'yesterday', 'PASS')
+        with self.assertRaises(upload.UploadError) as raised:
+            upload.upload_results(self.url + '/results', run, False)
+
+        self.assertTrue(
+            'Timestamp is not a number' in str(raised.exception),
+            'Bad timestamp was not refused as a client error'
+        )
+
+    def test_unknown_path(self):
+        with self.assertRaises(upload.UploadError) as raised:
+            upload.upload_results(
+                self.url + '/other',
+                payload('node1', 1000.0, 'PASS'),
+                False
+            )
+
+        self.assertTrue(
+            '404' in str(raised.exception),
+            'Unknown path was not a 404'
+        )
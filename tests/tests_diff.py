@@ -0,0 +1,181 @@
+
+from __future__ import absolute_import
+from .fixtures import reporting_returns
+from system_profile import store
+from system_profile import diff
+
+
+import tempfile
+import shutil
+import json
+import sys
+import os
+
+
+if sys.version_info[:2] >= (2, 7):
+    from unittest import TestCase
+else:
+    from unittest2 import TestCase
+
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+
+def system_info(test_pass):
+    return {
+        'profile': reporting_returns.os_return('rhel'),
+        'mounts': reporting_returns.mounts(test_pass),
+        'agents': reporting_returns.agents(test_pass),
+        'modules': reporting_returns.modules(test_pass),
+        'sysctl': reporting_returns.sysctl(test_pass)
+    }
+
+
+class TestDiff(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_diff_values(self):
+        expected_output = [
+            {'path': 'running', 'change': 'removed', 'old': 'puppet-agent'}
+        ]
+        returns = diff.diff_values(
+            reporting_returns.agents(False),
+            reporting_returns.agents()
+        )
+        self.assertEquals(
+            expected_output,
+            returns,
+            'Returned values did not match expected output'
+        )
+
+    def test_diff_values_nested(self):
+        expected_output = [
+            {
+                'path': '/tmp.free',
+                'change': 'changed',
+                'old': 19.13,
+                'new': 39.13
+            },
+            {'path': '/var', 'change': 'added', 'new': {'free': 1.0}}
+        ]
+        returns = diff.diff_values(
+            {'/tmp': {'free': 19.13}},
+            {'/tmp': {'free': 39.13}, '/var': {'free': 1.0}}
+        )
+        self.assertEquals(
+            expected_output,
+            returns,
+            'Returned values did not match expected output'
+        )
+
+    def test_unchanged_sections_skipped(self):
+        old = system_info(False)
+        new = system_info(False)
+        new['agents'] = reporting_returns.agents()
+        with mock.patch(
+            'system_profile.diff.diff_values',
+            wraps=diff.diff_values
+        ) as walk:
+            returns = diff.diff_results(old, new)
+
+        self.assertEquals(['agents'], list(returns.keys()))
+        self.assertEquals(
+            [old['agents'], old['agents']['running']],
+            [call[0][0] for call in walk.call_args_list],
+            'Unchanged sections were walked'
+        )
+
+    def test_diff_stored_runs(self):
+        conn = store.connect(os.path.join(self.directory, 'history.db'))
+        old_run, new_run = store.record_runs(
+            conn,
+            [
+                ('node1', 1000.0, system_info(False), {}, 'FAIL'),
+                ('node1', 2000.0, system_info(True), {}, 'PASS')
+            ]
+        )
+        with mock.patch(
+            'system_profile.store.load_sections',
+            wraps=store.load_sections
+        ) as load:
+            returns = diff.diff_stored_runs(conn, old_run, new_run)
+
+        conn.close()
+        self.assertEquals(
+            ['agents', 'modules', 'mounts', 'sysctl'],
+            sorted(returns.keys()),
+            'Changed sections did not match'
+        )
+        self.assertEquals(
+            ['agents', 'modules', 'mounts', 'sysctl'],
+            load.call_args[0][2],
+            'Unchanged sections were loaded'
+        )
+        self.assertTrue(
+            {
+                'path': 'enabled',
+                'change': 'added',
+                'new': 'br_netfilter'
+            } in returns['modules'],
+            'Enabled module was not found in the changes'
+        )
+
+    def test_format_diff(self):
+        expected_output = (
+            '--- a.json\n'
+            '+++ b.json\n'
+            'agents\n'
+            '  - running: puppet-agent\n'
+            'mounts\n'
+            '  ~ /tmp.free: 19.13 -> 39.13'
+        )
+        returns = diff.format_diff(
+            {
+                'agents': [
+                    {
+                        'path': 'running',
+                        'change': 'removed',
+                        'old': 'puppet-agent'
+                    }
+                ],
+                'mounts': [
+                    {
+                        'path': '/tmp.free',
+                        'change': 'changed',
+                        'old': 19.13,
+                        'new': 39.13
+                    }
+                ]
+            },
+            'a.json',
+            'b.json'
+        )
+        self.assertEquals(
+            expected_output,
+            returns,
+            'Returned values did not match expected output'
+        )
+
+    def test_diff_main_files(self):
+        paths = []
+        for name, test_pass in [('a.json', False), ('b.json', False)]:
+            paths.append(os.path.join(self.directory, name))
+            with open(paths[-1], 'w') as f:
+                json.dump(system_info(test_pass), f)
+
+        with mock.patch('system_profile.diff.print', create=True) as out:
+            returns = diff.diff_main(paths + ['--json'])
+
+        self.assertEquals({}, returns, 'Identical runs returned changes')
+        self.assertEquals(
+            {},
+            json.loads(out.call_args[0][0])['sections'],
+            'JSON output did not match'
+        )
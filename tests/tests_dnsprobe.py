@@ -0,0 +1,206 @@
+from __future__ import absolute_import
+from system_profile import dnsprobe
+
+
+import threading
+import socket
+import struct
+import sys
+
+
+if sys.version_info[:2] >= (2, 7):
+    from unittest import TestCase
+else:
+    from unittest2 import TestCase
+
+
+def query_name(data):
+    labels = []
+    offset = dnsprobe.HEADER.size
+    while True:
+        length = struct.unpack_from('!B', data, offset)[0]
+        if not length:
+            break
+
+        labels.append(data[offset + 1:offset + 1 + length].decode('utf-8'))
+        offset += length + 1
+
+    return '.'.join(labels)
+
+
+class Responder(threading.Thread):
+    """
+    Stand in nameserver on localhost. Names in known get NOERROR, names in
+    failing get SERVFAIL, names in dropped get no answer and anything else
+    gets NXDOMAIN
+    """
+    def __init__(self, known=(), failing=(), dropped=()):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.known = known
+        self.failing = failing
+        self.dropped = dropped
+        self.queries = []
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.settimeout(0.1)
+        self.port = self.sock.getsockname()[1]
+        self.running = True
+
+    def run(self):
+        while self.running:
+            try:
+                data, address = self.sock.recvfrom(4096)
+            except socket.timeout:
+                continue
+
+            name = query_name(data)
+            self.queries.append(name)
+            if name in self.dropped:
+                continue
+
+            rcode = 3
+            if name in self.known:
+                rcode = 0
+            elif name in self.failing:
+                rcode = 2
+
+            query_id = struct.unpack_from('!H', data)[0]
+            header = dnsprobe.HEADER.pack(
+                query_id,
+                dnsprobe.FLAG_RESPONSE | rcode,
+                1,
+                0,
+                0,
+                0
+            )
+            self.sock.sendto(header + data[dnsprobe.HEADER.size:], address)
+
+    def stop(self):
+        self.running = False
+        self.join()
+        self.sock.close()
+
+
+class TestDnsProbe(TestCase):
+    def test_expand_name_below_ndots(self):
+        self.assertEquals(
+            [
+                'registry.svc.cluster.local',
+                'registry.cluster.local',
+                'registry'
+            ],
+            dnsprobe.expand_name(
+                'registry',
+                ['svc.cluster.local', 'cluster.local.'],
+                5
+            ),
+            'Search domains were not tried first'
+        )
+
+    def test_expand_name_at_ndots(self):
+        self.assertEquals(
+            ['repo.example.com', 'repo.example.com.test.domain'],
+            dnsprobe.expand_name('repo.example.com', ['test.domain'], 2),
+            'Name with enough dots was not tried first'
+        )
+        self.assertEquals(
+            ['repo.example.com'],
+            dnsprobe.expand_name('repo.example.com.', ['test.domain'], 5),
+            'Absolute name was expanded'
+        )
+
+    def test_build_and_parse(self):
+        query = dnsprobe.build_query(4660, 'repo.example.com')
+        self.assertEquals(
+            'repo.example.com',
+            query_name(query),
+            'Query did not hold the name'
+        )
+        self.assertEquals(
+            None,
+            dnsprobe.parse_response(query),
+            'Query was parsed as a response'
+        )
+        response = dnsprobe.HEADER.pack(4660, 0x8183, 1, 0, 0, 0)
+        self.assertEquals(
+            (4660, 'NXDOMAIN'),
+            dnsprobe.parse_response(response),
+            'Response code was not parsed'
+        )
+
+    def test_probe_nameservers(self):
+        responder = Responder(
+            known=['repo.example.com'],
+            failing=['repo.example.com.bad.domain']
+        )
+        responder.start()
+        try:
+            returns = dnsprobe.probe_nameservers(
+                ['127.0.0.1'],
+                ['repo.example.com'],
+                ['test.domain', 'bad.domain'],
+                5,
+                2,
+                3,
+                True,
+                port=responder.port
+            )
+        finally:
+            responder.stop()
+
+        self.assertEquals(
+            {
+                'repo.example.com': {
+                    'expanded': [
+                        'repo.example.com.test.domain',
+                        'repo.example.com.bad.domain',
+                        'repo.example.com'
+                    ],
+                    'queries': 3
+                }
+            },
+            returns['lookups'],
+            'Lookup was not expanded with the search domains'
+        )
+        self.assertEquals(9, len(responder.queries), 'Queries were not sent')
+        server = returns['servers']['127.0.0.1']
+        self.assertEquals(
+            (9, 6, 0, {'SERVFAIL': 3}),
+            (
+                server['sent'],
+                server['answered'],
+                server['timeouts'],
+                server['errors']
+            ),
+            'Answers were not counted'
+        )
+        for percent in ['p50_ms', 'p90_ms', 'p99_ms', 'max_ms']:
+            self.assertTrue(
+                0 <= server[percent] < 2000,
+                'Latency {0} was not measured'.format(percent)
+            )
+
+    def test_probe_timeouts(self):
+        responder = Responder(dropped=['slow.example.com'])
+        responder.start()
+        try:
+            returns = dnsprobe.probe_nameservers(
+                ['127.0.0.1'],
+                ['fast.example.com.', 'slow.example.com.'],
+                [],
+                1,
+                0.3,
+                1,
+                False,
+                port=responder.port
+            )
+        finally:
+            responder.stop()
+
+        server = returns['servers']['127.0.0.1']
+        self.assertEquals(
+            (2, 1, 1),
+            (server['sent'], server['answered'], server['timeouts']),
+            'Dropped query was not a timeout'
+        )
@@ -0,0 +1,163 @@
+
+from __future__ import absolute_import
+from .fixtures import reporting_returns
+from system_profile import model
+
+
+import sys
+
+
+if sys.version_info[:2] >= (2, 7):
+    from unittest import TestCase
+else:
+    from unittest2 import TestCase
+
+
+def system_info():
+    return {
+        'profile': reporting_returns.os_return('rhel'),
+        'compatability': reporting_returns.system_compatability(False),
+        'resources': reporting_returns.memory_cpu(),
+        'memory_performance': reporting_returns.memory_performance(),
+        'mounts': reporting_returns.mounts(False),
+        'selinux': reporting_returns.selinux(),
+        'resolv': reporting_returns.resolv_conf(False),
+        'ports': reporting_returns.ports(False),
+        'agents': reporting_returns.agents(False),
+        'modules': reporting_returns.modules(False),
+        'infinity_set': None,
+        'sysctl': reporting_returns.sysctl(False)
+    }
+
+
+def deep_size(value, seen=None):
+    if seen is None:
+        seen = set()
+
+    if id(value) in seen:
+        return 0
+
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        for key, item in value.items():
+            size += deep_size(key, seen) + deep_size(item, seen)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            size += deep_size(item, seen)
+    elif hasattr(value, '__slots__'):
+        for name in value.__slots__:
+            size += deep_size(getattr(value, name, None), seen)
+
+    return size
+
+
+class TestModel(TestCase):
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_round_trip(self):
+        expected_output = system_info()
+        result = model.HostResult.from_dict(expected_output)
+        self.assertEquals(
+            expected_output,
+            result.to_dict(),
+            'Dict layout was not kept through the model'
+        )
+
+    def test_missing_fields_round_trip(self):
+        expected_output = {
+            'mounts': {
+                '/tmp': {
+                    'recommended': 30.0,
+                    'free': 39.13,
+                    'total': 39.7,
+                    'mount_options': 'rw',
+                    'file_system': 'ext4'
+                }
+            }
+        }
+        result = model.HostResult.from_dict(expected_output)
+        self.assertFalse(
+            hasattr(result.mounts[0], 'ftype'),
+            'Missing field was set on the record'
+        )
+        self.assertEquals(
+            expected_output,
+            result.to_dict(),
+            'Dict layout was not kept through the model'
+        )
+
+    def test_attribute_access(self):
+        result = model.HostResult.from_dict(system_info())
+        self.assertEquals('rhel', result.profile.based_on)
+        self.assertEquals(16.0, result.resources.memory.minimum)
+        self.assertEquals('FAIL', result.compatability.version)
+        self.assertEquals(
+            ('net.ipv4.ip_forward',),
+            result.sysctl.enabled,
+            'Sysctl lists were not kept'
+        )
+        self.assertEquals(
+            ['/', '/tmp', '/opt/anaconda', '/var'],
+            [mount.mountpoint for mount in result.mounts],
+            'Mount order was not kept'
+        )
+
+    def test_dict_style_access(self):
+        result = model.HostResult.from_dict(system_info())
+        self.assertEquals(
+            'rhel',
+            result.get('profile').get('based_on'),
+            'Dict style get did not match'
+        )
+        self.assertEquals(
+            'FAIL',
+            result['compatability']['version'],
+            'Dict style item access did not match'
+        )
+        self.assertEquals(
+            'PASS',
+            result['compatability']['OS'],
+            'Mapped key did not match'
+        )
+        self.assertTrue('sysctl' in result, 'Section was not found')
+        self.assertFalse('extras' in result, 'extras is not a section')
+
+    def test_verdicts_interned(self):
+        first = model.HostResult.from_dict(system_info())
+        second = model.HostResult.from_dict(system_info())
+        self.assertTrue(
+            first.ports[0].ports[1][1] is second.ports[0].ports[1][1],
+            'Port states were not interned'
+        )
+        self.assertTrue(
+            first.compatability.os is model.PASS,
+            'Verdict was not interned'
+        )
+
+    def test_extras(self):
+        data = system_info()
+        data['storage'] = {'arrays': ['array01']}
+        result = model.HostResult.from_dict(data)
+        self.assertEquals(
+            {'arrays': ['array01']},
+            result['storage'],
+            'Plugin section was not kept'
+        )
+        self.assertEquals(
+            data,
+            result.to_dict(),
+            'Dict layout was not kept through the model'
+        )
+
+    def test_smaller_than_dicts(self):
+        data = system_info()
+        result = model.HostResult.from_dict(data)
+        self.assertTrue(
+            deep_size(result) < deep_size(data),
+            'Model does not use less memory than the dict layout'
+        )
@@ -0,0 +1,97 @@
+from __future__ import absolute_import
+from system_profile import osrelease
+
+
+import sys
+
+
+if sys.version_info[:2] >= (2, 7):
+    from unittest import TestCase
+else:
+    from unittest2 import TestCase
+
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+
+class TestOsRelease(TestCase):
+    def setUp(self):
+        osrelease.clear_cache()
+
+    def tearDown(self):
+        osrelease.clear_cache()
+
+    def test_parse_os_release(self):
+        content = (
+            '# Comment\n'
+            'NAME="Example \\"Linux\\""\n'
+            "ID='example'\n"
+            'ID_LIKE=ubuntu debian\n'
+            '\n'
+            'VERSION_ID="22.04"\n'
+        )
+        self.assertEquals(
+            {
+                'name': 'Example "Linux"',
+                'id': 'example',
+                'id_like': 'ubuntu debian',
+                'version_id': '22.04'
+            },
+            osrelease.parse_os_release(content),
+            'os-release was not unquoted'
+        )
+
+    def test_parse_release_file(self):
+        self.assertEquals(
+            {
+                'name': 'Red Hat Enterprise Linux Server',
+                'version_id': '7.5',
+                'codename': 'Maipo'
+            },
+            osrelease.parse_release_file(
+                'Red Hat Enterprise Linux Server release 7.5 (Maipo)\n'
+            ),
+            'Release file was not parsed'
+        )
+        self.assertEquals(
+            {},
+            osrelease.parse_release_file('not a release\n'),
+            'Unknown release file was parsed'
+        )
+
+    def test_family(self):
+        for info, expected in [
+            ({'id': 'centos', 'id_like': 'rhel fedora'}, 'rhel'),
+            ({'id': 'linuxmint', 'id_like': 'ubuntu debian'}, 'debian'),
+            ({'id': 'opensuse-leap', 'id_like': 'suse opensuse'}, 'suse'),
+            ({'id': 'amzn', 'id_like': 'centos rhel fedora'}, 'rhel'),
+            ({'id': 'arch'}, None),
+            ({}, None)
+        ]:
+            self.assertEquals(
+                expected,
+                osrelease.family(info),
+                'Wrong family for {0}'.format(info)
+            )
+
+    def test_release_info_cached(self):
+        root = 'tests/fixtures/releases/centos'
+        first = osrelease.release_info(root)
+        with mock.patch('system_profile.osrelease.scanner') as scanner:
+            second = osrelease.release_info(root)
+
+        self.assertFalse(scanner.read_file.called, 'Root was parsed again')
+        self.assertEquals(first, second, 'Cached info did not match')
+        self.assertEquals(
+            ('centos', '7.5.1804', 'Core', 'rhel'),
+            (
+                first['id'],
+                first['version_id'],
+                first['codename'],
+                first['family']
+            ),
+            'Release file did not give the full version'
+        )
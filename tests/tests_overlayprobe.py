@@ -0,0 +1,130 @@
+from __future__ import absolute_import
+from system_profile import overlayprobe
+
+
+import tempfile
+import shutil
+import sys
+import os
+
+
+if sys.version_info[:2] >= (2, 7):
+    from unittest import TestCase, skipIf
+else:
+    from unittest2 import TestCase, skipIf
+
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+
+def overlay_available():
+    if os.geteuid() != 0:
+        return False
+
+    try:
+        with open('/proc/filesystems') as f:
+            return 'overlay' in f.read().split()
+    except IOError:
+        return False
+
+
+class TestOverlayProbe(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_backing_directory(self):
+        self.assertEquals(
+            self.directory,
+            overlayprobe.backing_directory(
+                os.path.join(self.directory, 'var', 'lib', 'gravity')
+            ),
+            'Nearest existing directory was not used'
+        )
+
+    def test_d_type_supported(self):
+        self.assertTrue(
+            overlayprobe.d_type_supported(self.directory),
+            'Temporary directory does not return file types'
+        )
+        self.assertEquals(
+            {'directory', 'file'},
+            set(
+                overlayprobe.entry_types(
+                    os.path.join(self.directory, 'd_type')
+                ).keys()
+            ),
+            'Directory entries were not read'
+        )
+
+    def test_d_type_unknown(self):
+        with mock.patch(
+            'system_profile.overlayprobe.entry_types',
+            return_value={'directory': 0, 'file': 0}
+        ):
+            self.assertFalse(
+                overlayprobe.d_type_supported(self.directory),
+                'DT_UNKNOWN entries were reported as supported'
+            )
+
+    def test_not_root(self):
+        with mock.patch('system_profile.overlayprobe.os.geteuid') as euid:
+            euid.return_value = 1000
+            returns = overlayprobe.overlay_probe(False, self.directory)
+
+        self.assertEquals(None, returns['mounted'], 'Mount was attempted')
+        self.assertEquals(
+            [],
+            os.listdir(self.directory),
+            'Scratch directory was created without root'
+        )
+
+    def test_mount_fails(self):
+        with mock.patch('system_profile.overlayprobe.os.geteuid') as euid:
+            euid.return_value = 0
+            with mock.patch('system_profile.overlayprobe._run') as run:
+                run.return_value = (32, 'mount: unknown filesystem type')
+                returns = overlayprobe.overlay_probe(
+                    False,
+                    self.directory,
+                    copy_up_files=5,
+                    small_files=5
+                )
+
+        self.assertFalse(returns['mounted'], 'Failed mount was reported')
+        self.assertEquals(
+            'mount: unknown filesystem type',
+            returns['error'],
+            'Mount error was not returned'
+        )
+        self.assertEquals(
+            [],
+            os.listdir(self.directory),
+            'Scratch directory was not removed'
+        )
+
+    @skipIf(not overlay_available(), 'Mounting an overlay needs root')
+    def test_overlay_probe(self):
+        returns = overlayprobe.overlay_probe(
+            False,
+            self.directory,
+            copy_up_files=20,
+            small_files=50
+        )
+
+        self.assertTrue(returns['mounted'], returns['error'])
+        self.assertEquals(20, returns['copy_up']['files'], 'Files not copied')
+        self.assertTrue(
+            returns['small_files']['create_per_second'] > 0,
+            'Small files were not measured'
+        )
+        self.assertEquals(
+            [],
+            os.listdir(self.directory),
+            'Overlay was not cleaned up'
+        )
@@ -0,0 +1,328 @@
+
+from __future__ import absolute_import
+from .fixtures import reporting_returns
+from system_profile import plugins
+from system_profile import profile
+
+
+import glob
+import sys
+import os
+
+
+if sys.version_info[:2] >= (2, 7):
+    from unittest import TestCase
+else:
+    from unittest2 import TestCase
+
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+
+def storage_gather(system_info, args):
+    return {'arrays': ['array01']}
+
+
+def storage_rule(f, data, system_info):
+    f.write('\nStorage Arrays\n')
+    f.write('Result: PASS\n\n')
+    return 'PASS'
+
+
+class EntryPointTest(object):
+    def __init__(self, name, plugin):
+        self.name = name
+        self.plugin = plugin
+        self.loaded = False
+
+    def load(self):
+        self.loaded = True
+        if isinstance(self.plugin, Exception):
+            raise self.plugin
+
+        return self.plugin
+
+
+class TestPlugins(TestCase):
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        files = glob.glob('results.txt')
+        for item in files:
+            os.remove(item)
+
+    def test_check_unknown_cost(self):
+        with self.assertRaises(plugins.PluginError):
+            plugins.Check('test', storage_gather, storage_rule, cost='free')
+
+    def test_merge_verdicts(self):
+        self.assertEquals(
+            plugins.merge_verdicts('PASS', 'WARN'),
+            'WARN',
+            'WARN did not override PASS'
+        )
+        self.assertEquals(
+            plugins.merge_verdicts('FAIL', 'WARN'),
+            'FAIL',
+            'WARN overrode FAIL'
+        )
+        self.assertEquals(
+            plugins.merge_verdicts('WARN', 'SKIPPED'),
+            'WARN',
+            'SKIPPED changed the result'
+        )
+        self.assertEquals(
+            plugins.merge_verdicts('PASS', None),
+            'PASS',
+            'No verdict changed the result'
+        )
+
+    def test_discover_does_not_load(self):
+        storage = EntryPointTest(
+            'storage',
+            plugins.Check('storage', storage_gather, storage_rule)
+        )
+        with mock.patch(
+            'system_profile.plugins._entry_points'
+        ) as entry_points:
+            entry_points.return_value = [storage]
+            returns = plugins.discover_plugins()
+
+        self.assertEquals(
+            {'storage': storage},
+            returns,
+            'Returned values did not match expected output'
+        )
+        self.assertFalse(
+            storage.loaded,
+            'Plugin was imported during discovery'
+        )
+
+    def test_load_plugin(self):
+        storage = EntryPointTest(
+            'storage_array',
+            plugins.Check(
+                'storage',
+                storage_gather,
+                storage_rule,
+                cost=plugins.COST_SLOW
+            )
+        )
+        returns = plugins.load_plugin('storage_array', storage)
+        self.assertEquals(
+            'storage_array',
+            returns.name,
+            'Plugin name did not come from the entry point'
+        )
+        self.assertEquals(
+            plugins.COST_SLOW,
+            returns.cost,
+            'Plugin cost was not kept'
+        )
+
+    def test_load_plugin_factory(self):
+        def factory():
+            return plugins.Check('storage', storage_gather, storage_rule)
+
+        returns = plugins.load_plugin(
+            'storage',
+            EntryPointTest('storage', factory)
+        )
+        self.assertTrue(
+            isinstance(returns, plugins.Check),
+            'Factory was not called to create the check'
+        )
+
+    def test_load_plugin_missing_rule(self):
+        class Incomplete(object):
+            gather = staticmethod(storage_gather)
+            cost = plugins.COST_FAST
+
+        with self.assertRaises(plugins.PluginError):
+            plugins.load_plugin(
+                'storage',
+                EntryPointTest('storage', Incomplete())
+            )
+
+    def test_load_plugin_default_source(self):
+        class Storage(object):
+            gather = staticmethod(storage_gather)
+            rule = staticmethod(storage_rule)
+            cost = plugins.COST_FAST
+
+        returns = plugins.load_plugin(
+            'storage',
+            EntryPointTest('storage', Storage())
+        )
+        self.assertEquals(
+            plugins.SOURCE_LIVE,
+            returns.source,
+            'Plugin without a source was not treated as a live check'
+        )
+
+    def test_load_plugin_unknown_source(self):
+        class Storage(object):
+            gather = staticmethod(storage_gather)
+            rule = staticmethod(storage_rule)
+            cost = plugins.COST_FAST
+            source = 'snapshot'
+
+        with self.assertRaises(plugins.PluginError):
+            plugins.load_plugin(
+                'storage',
+                EntryPointTest('storage', Storage())
+            )
+
+    def test_load_plugin_import_error(self):
+        with self.assertRaises(plugins.PluginError):
+            plugins.load_plugin(
+                'storage',
+                EntryPointTest('storage', ImportError('No module'))
+            )
+
+    def test_get_checks_selected_only(self):
+        storage = EntryPointTest(
+            'storage',
+            plugins.Check('storage', storage_gather, storage_rule)
+        )
+        unused = EntryPointTest(
+            'unused',
+            plugins.Check('unused', storage_gather, storage_rule)
+        )
+        with mock.patch(
+            'system_profile.plugins._entry_points'
+        ) as entry_points:
+            entry_points.return_value = [storage, unused]
+            returns = profile.get_checks(['storage'])
+
+        self.assertEquals(
+            [check.name for check in profile.CHECKS] + ['storage'],
+            [check.name for check in returns],
+            'Returned checks did not match expected output'
+        )
+        self.assertTrue(storage.loaded, 'Selected plugin was not loaded')
+        self.assertFalse(unused.loaded, 'Unselected plugin was loaded')
+
+    def test_get_checks_not_installed(self):
+        with mock.patch(
+            'system_profile.plugins._entry_points'
+        ) as entry_points:
+            entry_points.return_value = []
+            with self.assertRaises(plugins.PluginError):
+                profile.get_checks(['storage'])
+
+    def test_select_checks_dependencies(self):
+        run, reported = plugins.select_checks(
+            profile.CHECKS,
+            ['sysctl', 'selinux'],
+            None
+        )
+        self.assertEquals(
+            ['profile', 'resources', 'selinux', 'sysctl'],
+            [check.name for check in run],
+            'Checks the selection depends on were not run'
+        )
+        self.assertEquals(
+            ['selinux', 'sysctl'],
+            [check.name for check in reported],
+            'Only the selected checks should be reported'
+        )
+
+    def test_select_checks_skip(self):
+        run, reported = plugins.select_checks(
+            profile.CHECKS,
+            None,
+            ['profile', 'ports', 'agents']
+        )
+        names = [check.name for check in run]
+        self.assertTrue('profile' in names, 'Required check was not run')
+        self.assertFalse('ports' in names, 'Skipped check was run')
+        self.assertEquals(
+            [
+                check.name for check in profile.CHECKS
+                if check.name not in ['profile', 'ports', 'agents']
+            ],
+            [check.name for check in reported],
+            'Skipped checks were reported'
+        )
+
+    def test_select_checks_unknown(self):
+        with self.assertRaises(plugins.PluginError):
+            plugins.select_checks(profile.CHECKS, ['sysctls'], None)
+
+    def test_check_unknown_category(self):
+        with self.assertRaises(plugins.PluginError):
+            plugins.Check(
+                'test',
+                storage_gather,
+                storage_rule,
+                category='hardware'
+            )
+
+    def test_tiered(self):
+        returns = [check.name for check in plugins.tiered(profile.CHECKS)]
+        costs = [
+            plugins.COSTS.index(check.cost)
+            for check in plugins.tiered(profile.CHECKS)
+            if not check.requires
+        ]
+        self.assertEquals(
+            sorted(costs),
+            costs,
+            'Cheap checks did not run first'
+        )
+        for check in profile.CHECKS:
+            for required in check.requires:
+                self.assertTrue(
+                    returns.index(required) < returns.index(check.name),
+                    '{0} ran before {1}'.format(check.name, required)
+                )
+
+        self.assertEquals(
+            ['profile', 'compatability'],
+            returns[:2],
+            'OS checks were not run first'
+        )
+
+    def test_exit_code(self):
+        verdicts = {
+            'compatability': 'FAIL',
+            'capacity': 'WARN',
+            'mounts': 'FAIL',
+            'ports': 'PASS',
+            'modules': 'FAIL'
+        }
+        self.assertEquals(
+            plugins.EXIT_CODES[plugins.CATEGORY_OS] |
+            plugins.EXIT_CODES[plugins.CATEGORY_STORAGE],
+            plugins.exit_code(profile.CHECKS, verdicts),
+            'Exit code did not match the failing categories'
+        )
+        self.assertEquals(
+            0,
+            plugins.exit_code(profile.CHECKS, {'capacity': 'WARN'}),
+            'Warnings should not fail the run'
+        )
+
+    def test_plugin_reported(self):
+        storage = plugins.Check('storage', storage_gather, storage_rule)
+        system_info = {
+            'profile': reporting_returns.os_return('ubuntu'),
+            'storage': storage_gather({}, None)
+        }
+        returns = profile.process_results(
+            system_info,
+            [profile.CHECKS[0], storage]
+        )
+        with open('results.txt', 'r') as results:
+            lines = results.readlines()
+
+        self.assertEquals('PASS', returns, 'Overall result was not PASS')
+        self.assertTrue(
+            'Storage Arrays\n' in lines,
+            'Plugin section was not found in the results'
+        )
@@ -0,0 +1,117 @@
+from __future__ import absolute_import
+from system_profile import portplan
+
+
+import sys
+
+
+if sys.version_info[:2] >= (2, 7):
+    from unittest import TestCase
+else:
+    from unittest2 import TestCase
+
+
+class TestPortPlan(TestCase):
+    def test_parse_ranges(self):
+        self.assertEquals(
+            [(2379, 2380), (6443, 6443), (30000, 32767)],
+            portplan.parse_ranges('2379-2380, 6443,30000-32767'),
+            'Ranges were not parsed'
+        )
+        self.assertEquals([], portplan.parse_ranges(''), 'Empty was parsed')
+
+    def test_bitmap_round_trip(self):
+        ranges = [
+            (0, 0),
+            (53, 53),
+            (2379, 2380),
+            (30000, 32767),
+            (65535, 65535)
+        ]
+        bitmap = portplan.to_bitmap(ranges)
+
+        self.assertEquals(
+            1 + 1 + 2 + 2768 + 1,
+            bin(bitmap).count('1'),
+            'Wrong number of ports set'
+        )
+        self.assertEquals(
+            ranges,
+            portplan.to_ranges(bitmap),
+            'Ranges did not survive the bitmap'
+        )
+
+    def test_adjacent_ranges_merge(self):
+        self.assertEquals(
+            '3008-3025',
+            portplan.format_ranges(
+                portplan.to_ranges(
+                    portplan.to_bitmap([(3008, 3012), (3013, 3025)])
+                )
+            ),
+            'Adjacent ranges were not merged'
+        )
+
+    def test_plan_bitmaps(self):
+        bitmaps = portplan.plan_bitmaps(
+            [
+                ('tcp', '2379-2380', 'etcd'),
+                ('tcp', '6443', 'Kubernetes API server'),
+                ('udp', '8472', 'VXLAN overlay network')
+            ]
+        )
+        self.assertEquals(
+            [(2379, 2380), (6443, 6443)],
+            portplan.to_ranges(bitmaps['tcp']),
+            'TCP plan did not match'
+        )
+        self.assertEquals(
+            [(8472, 8472)],
+            portplan.to_ranges(bitmaps['udp']),
+            'UDP plan did not match'
+        )
+
+    def test_services(self):
+        self.assertEquals(
+            ['Gravity Hub', 'Kubernetes NodePort range'],
+            portplan.services(portplan.PLAN, 'tcp', 32000, 32100),
+            'Services in the range did not match'
+        )
+        self.assertEquals(
+            [],
+            portplan.services(portplan.PLAN, 'udp', 32000, 32100),
+            'Services of another protocol matched'
+        )
+
+    def test_decode_address(self):
+        self.assertEquals(
+            ('127.0.0.1', 53),
+            portplan.decode_address('0100007F:0035'),
+            'IPv4 address was not decoded'
+        )
+        self.assertEquals(
+            ('[::]', 80),
+            portplan.decode_address('0' * 32 + ':0050'),
+            'IPv6 address was not decoded'
+        )
+
+    def test_plan_listeners(self):
+        self.assertEquals(
+            [('0.0.0.0', 53), ('127.0.0.1', 2379)],
+            portplan.plan_listeners(
+                [
+                    ('127.0.0.53', 53),
+                    ('[::1]', 53),
+                    ('0.0.0.0', 53),
+                    ('127.0.0.1', 2379)
+                ]
+            ),
+            'Loopback DNS listener was not left out'
+        )
+
+    def test_sort_key(self):
+        self.assertEquals(
+            ['tcp/80', 'tcp/6443', 'udp/53'],
+            sorted(['udp/53', 'tcp/6443', 'tcp/80'], key=portplan.sort_key),
+            'Ranges were not ordered by protocol and port'
+        )
@@ -0,0 +1,168 @@
+from __future__ import absolute_import
+from system_profile import procwatch
+
+
+import tempfile
+import shutil
+import socket
+import struct
+import sys
+import os
+
+
+if sys.version_info[:2] >= (2, 7):
+    from unittest import TestCase
+else:
+    from unittest2 import TestCase
+
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+
+AGENTS = ['salt', 'puppet']
+
+
+def proc_message(what, data):
+    event = procwatch.PROC_EVENT.pack(what, 0, 0) + data
+    cn_msg = procwatch.CN_MSG.pack(
+        procwatch.CN_IDX_PROC,
+        procwatch.CN_VAL_PROC,
+        0,
+        0,
+        len(event),
+        0
+    )
+    length = procwatch.NLMSGHDR.size + len(cn_msg) + len(event)
+    message = procwatch.NLMSGHDR.pack(
+        length,
+        procwatch.NLMSG_DONE,
+        0,
+        0,
+        0
+    ) + cn_msg + event
+    return message + b'\0' * (-len(message) % 4)
+
+
+class TestProcWatch(TestCase):
+    def setUp(self):
+        self.proc = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.proc)
+
+    def add_process(self, pid, name):
+        os.mkdir(os.path.join(self.proc, str(pid)))
+        with open(os.path.join(self.proc, str(pid), 'comm'), 'w') as f:
+            f.write('{0}\n'.format(name))
+
+    def test_parse_events(self):
+        data = (
+            proc_message(procwatch.PROC_EVENT_EXEC, struct.pack('=ii', 5, 5)) +
+            proc_message(
+                procwatch.PROC_EVENT_COMM,
+                struct.pack('=ii16s', 6, 6, b'salt-minion')
+            ) +
+            proc_message(
+                procwatch.PROC_EVENT_COMM,
+                struct.pack('=ii16s', 8, 6, b'salt-worker')
+            ) +
+            proc_message(1, struct.pack('=iiii', 1, 1, 7, 7))
+        )
+        expected_output = [
+            (procwatch.PROC_EVENT_EXEC, 5, None),
+            (procwatch.PROC_EVENT_COMM, 6, 'salt-minion')
+        ]
+        returns = list(procwatch.parse_events(data))
+
+        self.assertEquals(
+            expected_output,
+            returns,
+            'Returned values did not match expected output'
+        )
+
+    def test_agent_counter(self):
+        counter = procwatch.AgentCounter(AGENTS)
+        counter.exec_seen(10, 'ruby')
+        counter.name_seen(10, 'puppet agent')
+        counter.name_seen(10, 'puppet agent')
+        counter.exec_seen(11, 'salt-call')
+        counter.exec_seen(11, 'salt-call')
+        counter.exec_seen(12, None)
+
+        self.assertEquals(
+            {'puppet agent': 1, 'salt-call': 2},
+            counter.seen,
+            'Returned values did not match expected output'
+        )
+
+    def test_watch_proc(self):
+        self.add_process(1, 'systemd')
+        self.add_process(2, 'puppet')
+        starts = [(3, 'salt-call'), (4, 'bash'), (5, 'salt-call')]
+
+        def start_process(interval):
+            if starts:
+                pid, name = starts.pop(0)
+                self.add_process(pid, name)
+                # Short lived run that is gone before the next listing
+                if pid == 3:
+                    shutil.rmtree(os.path.join(self.proc, str(pid)))
+
+        with mock.patch('system_profile.procwatch.time') as mock_time:
+            mock_time.time.side_effect = [0, 0, 1, 2, 3, 4]
+            mock_time.sleep.side_effect = start_process
+            returns = procwatch.watch_proc(4, AGENTS, 1, self.proc)
+
+        # Pid 2 was already running and pid 3 was missed
+        self.assertEquals(
+            {'salt-call': 1},
+            returns,
+            'Returned values did not match expected output'
+        )
+
+    def test_watch_falls_back_to_proc(self):
+        with mock.patch(
+            'system_profile.procwatch.open_connector'
+        ) as connector:
+            connector.side_effect = socket.error(1, 'Operation not permitted')
+            with mock.patch(
+                'system_profile.procwatch.watch_proc'
+            ) as watch_proc:
+                watch_proc.return_value = {'puppet': 1}
+                returns = procwatch.watch_for_agents(5, AGENTS, False)
+
+        self.assertEquals(
+            {'seconds': 5, 'method': 'proc', 'seen': {'puppet': 1}},
+            returns,
+            'Returned values did not match expected output'
+        )
+
+    def test_watch_connector(self):
+        sock = mock.Mock()
+        sock.recv.return_value = proc_message(
+            procwatch.PROC_EVENT_EXEC,
+            struct.pack('=ii', 7, 7)
+        )
+        self.add_process(7, 'puppet')
+        with mock.patch('system_profile.procwatch.time') as mock_time:
+            mock_time.time.side_effect = [0, 0, 1, 2]
+            with mock.patch('system_profile.procwatch.select') as mock_select:
+                mock_select.select.side_effect = [
+                    ([sock], [], []),
+                    ([], [], [])
+                ]
+                returns = procwatch.watch_connector(
+                    sock,
+                    2,
+                    AGENTS,
+                    self.proc
+                )
+
+        self.assertEquals(
+            {'puppet': 1},
+            returns,
+            'Returned values did not match expected output'
+        )
@@ -0,0 +1,110 @@
+
+from __future__ import absolute_import
+from .fixtures import reporting_returns
+from system_profile import prometheus
+from system_profile import model
+
+
+import sys
+
+
+if sys.version_info[:2] >= (2, 7):
+    from unittest import TestCase
+else:
+    from unittest2 import TestCase
+
+
+class TestPrometheus(TestCase):
+    def setUp(self):
+        self.system_info = model.HostResult.from_dict({
+            'profile': reporting_returns.os_return('rhel'),
+            'resources': reporting_returns.memory_cpu(),
+            'mounts': reporting_returns.mounts(),
+            'ports': reporting_returns.ports(False)
+        })
+
+    def tearDown(self):
+        pass
+
+    def render(self):
+        return prometheus.render(
+            self.system_info,
+            {'profile': None, 'mounts': 'PASS', 'ports': 'WARN'},
+            {'mounts': 0.25, 'ports': 10.0},
+            'WARN',
+            1500000000.0
+        ).splitlines()
+
+    def test_memory_and_cores(self):
+        lines = self.render()
+        self.assertTrue(
+            'ae_preflight_memory_gb{kind="actual"} 251.88' in lines,
+            'Actual memory was not exported'
+        )
+        self.assertTrue(
+            'ae_preflight_cpu_cores{kind="minimum"} 8.0' in lines,
+            'Minimum cores were not exported'
+        )
+
+    def test_mounts(self):
+        lines = self.render()
+        self.assertTrue(
+            'ae_preflight_mount_free_gb{mountpoint="/tmp"} 39.13' in lines,
+            'Free space was not exported'
+        )
+        self.assertTrue(
+            'ae_preflight_mount_recommended_gb{mountpoint="/"} 130.0' in lines,
+            'Recommended space was not exported'
+        )
+        self.assertTrue(
+            'ae_preflight_mount_inodes_free{mountpoint="/tmp"} 2590000.0' in
+            lines,
+            'Free inodes were not exported'
+        )
+
+    def test_ports(self):
+        lines = self.render()
+        self.assertTrue(
+            'ae_preflight_port_open{interface="eth0",port="80"} 1.0' in lines,
+            'Open port was not exported'
+        )
+        self.assertTrue(
+            'ae_preflight_port_open{interface="eth0",port="443"} 0.0' in lines,
+            'Closed port was not exported'
+        )
+
+    def test_verdicts_and_durations(self):
+        lines = self.render()
+        self.assertTrue(
+            'ae_preflight_section_verdict{section="ports"} 1.0' in lines,
+            'Section verdict was not exported'
+        )
+        self.assertFalse(
+            [line for line in lines if 'section="profile"' in line],
+            'Section without a verdict was exported'
+        )
+        self.assertTrue(
+            'ae_preflight_check_duration_seconds{check="ports"} 10.0' in lines,
+            'Check duration was not exported'
+        )
+        self.assertTrue(
+            'ae_preflight_overall_result 1.0' in lines,
+            'Overall result was not exported'
+        )
+
+    def test_single_header_per_metric(self):
+        lines = self.render()
+        self.assertEquals(
+            1,
+            lines.count('# TYPE ae_preflight_mount_free_gb gauge'),
+            'Metric header was repeated'
+        )
+
+    def test_escape_labels(self):
+        metrics = prometheus.Metrics()
+        metrics.add('test', 'Test', 1, {'name': 'a"b\\c'})
+        self.assertEquals(
+            'ae_preflight_test{name="a\\"b\\\\c"} 1.0',
+            metrics.render().splitlines()[-1],
+            'Label value was not escaped'
+        )
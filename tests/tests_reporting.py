@@ -1,6 +1,7 @@
 
 from __future__ import absolute_import
 from .fixtures import reporting_returns
+from system_profile import plugins
 from system_profile import profile
 
 
@@ -23,15 +24,49 @@ except ImportError:
 
 class TestReporting(TestCase):
     def setUp(self):
-        pass
+        # Checks that every report runs with the same results
+        self.patches = [
+            mock.patch(
+                'system_profile.profile.sample_counters',
+                return_value={
+                    'pressure': reporting_returns.pressure(),
+                    'cpu_steal': reporting_returns.cpu_steal(),
+                    'nic': reporting_returns.nic()
+                }
+            ),
+            mock.patch(
+                'system_profile.profile.port_plan',
+                return_value=reporting_returns.port_plan()
+            ),
+            mock.patch(
+                'system_profile.profile.conntrack_check',
+                return_value=reporting_returns.conntrack()
+            ),
+            mock.patch(
+                'system_profile.profile.capacity_check',
+                return_value=reporting_returns.capacity()
+            ),
+            mock.patch(
+                'system_profile.profile.performance_mode',
+                return_value=reporting_returns.performance_mode()
+            )
+        ]
+        for patch in self.patches:
+            patch.start()
 
     def tearDown(self):
-        files = glob.glob('results.txt')
+        for patch in self.patches:
+            patch.stop()
+
+        files = glob.glob('results.txt*') + glob.glob('.results.txt.*')
         for item in files:
             os.remove(item)
 
     @mock.patch('system_profile.profile.argparse')
     def test_reporting_ubuntu(self, mock_args):
+        mock_args.ArgumentParser.return_value.parse_args.return_value = (
+            reporting_returns.arguments()
+        )
         with mock.patch('system_profile.profile.get_os_info') as os:
             os.return_value = reporting_returns.os_return('ubuntu')
             with mock.patch(
@@ -103,6 +138,9 @@ class TestReporting(TestCase):
 
     @mock.patch('system_profile.profile.argparse')
     def test_reporting_suse(self, mock_args):
+        mock_args.ArgumentParser.return_value.parse_args.return_value = (
+            reporting_returns.arguments()
+        )
         with mock.patch('system_profile.profile.get_os_info') as os:
             os.return_value = reporting_returns.os_return('suse')
             with mock.patch(
@@ -181,6 +219,9 @@ class TestReporting(TestCase):
 
     @mock.patch('system_profile.profile.argparse')
     def test_reporting_rhel(self, mock_args):
+        mock_args.ArgumentParser.return_value.parse_args.return_value = (
+            reporting_returns.arguments()
+        )
         with mock.patch('system_profile.profile.get_os_info') as os:
             os.return_value = reporting_returns.os_return('rhel')
             with mock.patch(
@@ -258,6 +299,9 @@ class TestReporting(TestCase):
 
     @mock.patch('system_profile.profile.argparse')
     def test_reporting_fail_suse(self, mock_args):
+        mock_args.ArgumentParser.return_value.parse_args.return_value = (
+            reporting_returns.arguments()
+        )
         test_pass = False
         with mock.patch('system_profile.profile.get_os_info') as os:
             os.return_value = reporting_returns.os_return('suse')
@@ -347,6 +391,9 @@ class TestReporting(TestCase):
 
     @mock.patch('system_profile.profile.argparse')
     def test_reporting_fail_rhel(self, mock_args):
+        mock_args.ArgumentParser.return_value.parse_args.return_value = (
+            reporting_returns.arguments()
+        )
         test_pass = False
         with mock.patch('system_profile.profile.get_os_info') as os:
             os.return_value = reporting_returns.os_return('rhel')
@@ -435,6 +482,9 @@ class TestReporting(TestCase):
 
     @mock.patch('system_profile.profile.argparse')
     def test_reporting_ubuntu_trigger_warn_on_fs(self, mock_args):
+        mock_args.ArgumentParser.return_value.parse_args.return_value = (
+            reporting_returns.arguments()
+        )
         with mock.patch('system_profile.profile.get_os_info') as os:
             os.return_value = reporting_returns.os_return('ubuntu')
             with mock.patch(
@@ -508,6 +558,9 @@ class TestReporting(TestCase):
 
     @mock.patch('system_profile.profile.argparse')
     def test_reporting_ubuntu_trigger_warn_resolve(self, mock_args):
+        mock_args.ArgumentParser.return_value.parse_args.return_value = (
+            reporting_returns.arguments()
+        )
         with mock.patch('system_profile.profile.get_os_info') as os:
             os.return_value = reporting_returns.os_return('ubuntu')
             with mock.patch(
@@ -579,6 +632,9 @@ class TestReporting(TestCase):
 
     @mock.patch('system_profile.profile.argparse')
     def test_reporting_ubuntu_trigger_warn_on_interface(self, mock_args):
+        mock_args.ArgumentParser.return_value.parse_args.return_value = (
+            reporting_returns.arguments()
+        )
         with mock.patch('system_profile.profile.get_os_info') as os:
             os.return_value = reporting_returns.os_return('ubuntu')
             with mock.patch(
@@ -650,6 +706,9 @@ class TestReporting(TestCase):
 
     @mock.patch('system_profile.profile.argparse')
     def test_reporting_ubuntu_trigger_warn_on_agents(self, mock_args):
+        mock_args.ArgumentParser.return_value.parse_args.return_value = (
+            reporting_returns.arguments()
+        )
         with mock.patch('system_profile.profile.get_os_info') as os:
             os.return_value = reporting_returns.os_return('ubuntu')
             with mock.patch(
@@ -720,3 +779,601 @@ class TestReporting(TestCase):
             [],
             'Differences were found in the results from what is expected'
         )
+
+    @mock.patch('system_profile.profile.memory_performance')
+    @mock.patch('system_profile.profile.argparse')
+    def test_reporting_ubuntu_trigger_warn_on_memory_probe(
+        self,
+        mock_args,
+        mock_performance
+    ):
+        mock_args.ArgumentParser.return_value.parse_args.return_value = (
+            reporting_returns.arguments(memory_probe=True)
+        )
+        mock_performance.return_value = (
+            reporting_returns.memory_performance(False)
+        )
+        with mock.patch('system_profile.profile.get_os_info') as os:
+            os.return_value = reporting_returns.os_return('ubuntu')
+            with mock.patch(
+                'system_profile.profile.check_system_type'
+            ) as system:
+                system.return_value = reporting_returns.system_compatability()
+                with mock.patch(
+                    'system_profile.profile.system_requirements'
+                ) as req:
+                    req.return_value = reporting_returns.memory_cpu()
+                    with mock.patch(
+                        'system_profile.profile.mounts_check'
+                    ) as mount:
+                        mount.return_value = reporting_returns.mounts()
+                        with mock.patch(
+                            'system_profile.profile.inspect_resolv_conf'
+                        ) as resolv:
+                            resolv.return_value = (
+                                reporting_returns.resolv_conf()
+                            )
+                            with mock.patch(
+                                'system_profile.profile.check_open_ports'
+                            ) as port:
+                                port.return_value = (
+                                    reporting_returns.ports()
+                                )
+                                with mock.patch(
+                                    'system_profile.profile.check_for_agents'
+                                ) as agent:
+                                    agent.return_value = (
+                                        reporting_returns.agents()
+                                    )
+                                    with mock.patch(
+                                        'system_profile.profile.check_modules'
+                                    ) as module:
+                                        module.return_value = (
+                                            reporting_returns.modules()
+                                        )
+                                        with mock.patch(
+                                            'system_profile.profile.'
+                                            'check_sysctl'
+                                        ) as sysctl:
+                                            sysctl.return_value = (
+                                                reporting_returns.sysctl()
+                                            )
+                                            profile.main()
+
+        results_file = glob.glob('results.txt')
+        self.assertEqual(
+            len(results_file),
+            1,
+            'Did not find results file'
+        )
+        expected = []
+        with open('tests/fixtures/memory_warn.txt', 'r') as ubuntu:
+            expected = ubuntu.readlines()
+
+        differences = []
+        with open('results.txt', 'r') as results:
+            for line in results:
+                if line not in expected:
+                    differences.append(line)
+
+        self.assertEquals(
+            differences,
+            [],
+            'Differences were found in the results from what is expected'
+        )
+
+    @mock.patch('system_profile.profile.argparse')
+    def test_reporting_offline_root(self, mock_args):
+        mock_args.ArgumentParser.return_value.parse_args.return_value = (
+            reporting_returns.arguments(root='tests/fixtures/rootfs')
+        )
+        with mock.patch('system_profile.profile.execute_command') as cmd:
+            with mock.patch('system_profile.profile.mounts_check') as mount:
+                with mock.patch(
+                    'system_profile.profile.check_open_ports'
+                ) as port:
+                    with mock.patch('system_profile.profile.print'):
+                        profile.main()
+
+        for live in [cmd, mount, port]:
+            self.assertFalse(live.called, 'Live check ran for offline root')
+
+        with open('results.txt', 'r') as results:
+            content = results.read()
+
+        for line in [
+            'Version:  7.9\n',
+            'Current Status: Permissive\n',
+            '/etc/resolv.conf Result: SKIPPED\n'
+        ]:
+            self.assertIn(line, content, 'Offline root was not checked')
+
+        for line in [
+            'mounts Result: SKIPPED\n',
+            'ports Result: SKIPPED\n',
+            'resources Result: SKIPPED\n\n'
+            'NOTE: Not run against the offline root, the check needs --proc\n'
+        ]:
+            self.assertIn(line, content, 'Skipped check was not reported')
+
+        for section in ['Memory\n', 'Port Check', 'Mount Point']:
+            self.assertNotIn(
+                section,
+                content,
+                'Check that needs /proc or the live system was reported'
+            )
+
+    @mock.patch('system_profile.profile.argparse')
+    def test_reporting_offline_root_unknown_family(self, mock_args):
+        mock_args.ArgumentParser.return_value.parse_args.return_value = (
+            reporting_returns.arguments(root='tests/fixtures/rootfs_alpine')
+        )
+        with mock.patch('system_profile.profile.print'):
+            returns = profile.main()
+
+        with open('results.txt', 'r') as results:
+            content = results.read()
+
+        for line in [
+            'Name:     Alpine\n',
+            'Based On: None\n',
+            'Supported OS:      FAIL\n',
+            'Selinux Result: SKIPPED\n'
+        ]:
+            self.assertIn(line, content, 'Unknown family was not reported')
+
+        self.assertEquals(
+            0,
+            returns,
+            'Exit code was not 0 without --fail-fast'
+        )
+
+    @mock.patch('system_profile.profile.argparse')
+    def test_reporting_check_raised(self, mock_args):
+        mock_args.ArgumentParser.return_value.parse_args.return_value = (
+            reporting_returns.arguments(only=['compatability', 'sysctl'])
+        )
+        with mock.patch('system_profile.profile.get_os_info') as os_info:
+            os_info.return_value = reporting_returns.os_return('rhel')
+            with mock.patch(
+                'system_profile.profile.check_system_type'
+            ) as system:
+                system.return_value = reporting_returns.system_compatability()
+                with mock.patch(
+                    'system_profile.profile.system_requirements'
+                ) as req:
+                    req.side_effect = OSError('lsmod not found')
+                    with mock.patch('system_profile.profile.print'):
+                        with self.assertRaises(OSError):
+                            profile.main()
+
+        with open('results.txt.partial', 'r') as partial:
+            content = partial.read()
+
+        self.assertIn(
+            'Supported Version: PASS\n',
+            content,
+            'Completed sections were not kept after a check raised'
+        )
+
+    @mock.patch('system_profile.profile.argparse')
+    def test_reporting_only(self, mock_args):
+        mock_args.ArgumentParser.return_value.parse_args.return_value = (
+            reporting_returns.arguments(only=['sysctl'])
+        )
+        with mock.patch('system_profile.profile.system_requirements') as req:
+            req.return_value = reporting_returns.memory_cpu()
+            with mock.patch('system_profile.profile.check_sysctl') as sysctl:
+                sysctl.return_value = reporting_returns.sysctl()
+                with mock.patch(
+                    'system_profile.profile.check_open_ports'
+                ) as port:
+                    with mock.patch(
+                        'system_profile.profile.get_os_info'
+                    ) as os_info:
+                        with mock.patch('system_profile.profile.print'):
+                            profile.main()
+
+        self.assertFalse(port.called, 'Unselected check was run')
+        self.assertFalse(os_info.called, 'Unneeded dependency was run')
+        self.assertTrue(req.called, 'Required resources check was not run')
+        with open('results.txt', 'r') as results:
+            content = results.read()
+
+        self.assertIn('Sysctl Settings\n', content, 'Check was not reported')
+        self.assertNotIn(
+            'Memory\n',
+            content,
+            'Dependency of the selected check was reported'
+        )
+
+    @mock.patch('system_profile.profile.argparse')
+    def test_reporting_plugin_error(self, mock_args):
+        parser = mock_args.ArgumentParser.return_value
+        parser.parse_args.return_value = reporting_returns.arguments(
+            only=['storage']
+        )
+        parser.error.side_effect = SystemExit(2)
+        with mock.patch(
+            'system_profile.plugins._entry_points',
+            return_value=[]
+        ):
+            with self.assertRaises(SystemExit) as raised:
+                profile.main()
+
+        self.assertEquals(2, raised.exception.code, 'Exit code was not 2')
+        parser.error.assert_called_once_with(
+            'Check plugin storage is not installed'
+        )
+        self.assertFalse(
+            os.path.isfile('results.txt.partial'),
+            'Checks ran after a plugin error'
+        )
+
+    @mock.patch('system_profile.profile.argparse')
+    def test_reporting_fail_fast(self, mock_args):
+        mock_args.ArgumentParser.return_value.parse_args.return_value = (
+            reporting_returns.arguments(fail_fast=True)
+        )
+        with mock.patch('system_profile.profile.get_os_info') as os_info:
+            os_info.return_value = reporting_returns.os_return('rhel')
+            with mock.patch(
+                'system_profile.profile.check_system_type'
+            ) as system:
+                system.return_value = reporting_returns.system_compatability(
+                    test_pass=False
+                )
+                with mock.patch(
+                    'system_profile.profile.system_requirements'
+                ) as req:
+                    with mock.patch(
+                        'system_profile.profile.check_open_ports'
+                    ) as port:
+                        with mock.patch('system_profile.profile.print'):
+                            returns = profile.main()
+
+        self.assertEquals(
+            plugins.EXIT_CODES[plugins.CATEGORY_OS],
+            returns,
+            'Exit code was not for a failed OS check'
+        )
+        for expensive in [req, port]:
+            self.assertFalse(
+                expensive.called,
+                'Check ran after the host was disqualified'
+            )
+
+        with open('results.txt', 'r') as results:
+            content = results.read()
+
+        self.assertIn(
+            'Overall Result: FAIL\n',
+            content,
+            'Disqualified host did not fail'
+        )
+
+    def test_write_atomic(self):
+        with open('results.txt', 'w') as f:
+            f.write('old results\n')
+
+        profile.write_atomic('results.txt', 'new results\n')
+        with open('results.txt', 'r') as results:
+            content = results.read()
+
+        self.assertEquals(
+            'new results\n',
+            content,
+            'Results file was not replaced'
+        )
+        self.assertEquals(
+            [],
+            glob.glob('.results.txt.*'),
+            'Temporary file was left behind'
+        )
+
+    def test_progress(self):
+        check = plugins.Check('resolv', None, profile.report_resolv)
+        progress = profile.Progress([check], 'results.txt.partial')
+        progress.start(check)
+        self.assertEquals(
+            'resolv',
+            progress.running,
+            'Check was not marked as running'
+        )
+        with mock.patch('system_profile.profile.print', create=True):
+            progress.finish(check, 'Resolv section\n', 'PASS')
+
+        with open('results.txt.partial', 'r') as partial:
+            lines = partial.readlines()
+
+        self.assertEquals(
+            ['Resolv section\n', profile.SEPARATOR],
+            lines,
+            'Section was not written to the partial results'
+        )
+        self.assertEquals(['resolv'], progress.done, 'Check was not done')
+        progress.close()
+        self.assertEquals(
+            ['results.txt.partial'],
+            glob.glob('results.txt.partial'),
+            'Partial results file was removed before the results were written'
+        )
+        progress.remove()
+        self.assertEquals(
+            [],
+            glob.glob('results.txt.partial'),
+            'Partial results file was not removed'
+        )
+
+    def test_report_agent_window(self):
+        agents = profile.model.Agents.from_dict(
+            {
+                'running': [],
+                'window': {
+                    'seconds': 60.0,
+                    'method': 'proc',
+                    'seen': {'puppet': 2}
+                }
+            }
+        )
+        output = profile.StringIO()
+        returns = profile.report_agents(output, agents, None)
+
+        self.assertEquals('WARN', returns, 'Agent result was not WARN')
+        self.assertIn(
+            'Started: puppet (2 times)\n',
+            output.getvalue(),
+            'Agent frequency was not reported'
+        )
+
+    def test_report_performance_mode_deviations(self):
+        performance = profile.model.PerformanceMode.from_dict(
+            reporting_returns.performance_mode(False)
+        )
+        output = profile.StringIO()
+        returns = profile.report_performance_mode(output, performance, None)
+
+        self.assertEquals('WARN', returns, 'Performance result was not WARN')
+        self.assertIn(
+            '48 of 64 CPUs use the powersave governor, recommended '
+            'performance\n',
+            output.getvalue(),
+            'Governor deviation was not reported'
+        )
+
+    def test_report_capacity_recommendations(self):
+        capacity = profile.model.Capacity.from_dict(
+            reporting_returns.capacity(False)
+        )
+        output = profile.StringIO()
+        returns = profile.report_capacity(output, capacity, None)
+
+        self.assertEquals('WARN', returns, 'Capacity result was not WARN')
+        for line in [
+            'Threads:      950 of 1000 used, 5.0% headroom\n',
+            'kernel.threads-max = 262144\n',
+            '@ae hard nofile 65536 in /etc/security/limits.d/90-ae.conf\n'
+        ]:
+            self.assertIn(
+                line,
+                output.getvalue(),
+                'Recommendation was not reported'
+            )
+
+    def test_report_capacity_sysctl_tuned(self):
+        data = reporting_returns.capacity()
+        data['file_handles']['limit'] = 65536
+        capacity = profile.model.Capacity.from_dict(data)
+        output = profile.StringIO()
+        returns = profile.report_capacity(output, capacity, None)
+
+        self.assertEquals('WARN', returns, 'Capacity result was not WARN')
+        self.assertIn(
+            'Note: The recommended fs.file-max is under Kernel Tuning in the '
+            'Sysctl Settings section\n',
+            output.getvalue(),
+            'Sysctl section was not pointed to'
+        )
+        self.assertNotIn(
+            'fs.file-max = ',
+            output.getvalue(),
+            'Sysctl recommendation was repeated'
+        )
+
+    def test_report_capacity_sysctl_tuned_plural(self):
+        data = reporting_returns.capacity()
+        data['file_handles']['limit'] = 65536
+        data['processes']['limit'] = 32768
+        capacity = profile.model.Capacity.from_dict(data)
+        output = profile.StringIO()
+        profile.report_capacity(output, capacity, None)
+
+        self.assertIn(
+            'Note: The recommended fs.file-max and kernel.pid_max are under '
+            'Kernel Tuning in the Sysctl Settings section\n',
+            output.getvalue(),
+            'Sysctl section was not pointed to for both settings'
+        )
+
+    def test_report_conntrack_drops(self):
+        conntrack = profile.model.Conntrack.from_dict(
+            reporting_returns.conntrack(False)
+        )
+        output = profile.StringIO()
+        returns = profile.report_conntrack(output, conntrack, None)
+
+        self.assertEquals('WARN', returns, 'Conntrack result was not WARN')
+        for line in [
+            'Entries:  120000 of 131072 (91.55% used)\n',
+            'Drop: 16\n',
+            'Note: The recommended net.netfilter.nf_conntrack_max is under '
+            'Kernel Tuning in the Sysctl Settings section\n',
+            'options nf_conntrack hashsize=65536\n'
+        ]:
+            self.assertIn(
+                line,
+                output.getvalue(),
+                'Conntrack usage was not reported'
+            )
+
+        for line in [
+            'net.netfilter.nf_conntrack_max = 262144\n',
+            'sysctl -w net.netfilter.nf_conntrack_max'
+        ]:
+            self.assertNotIn(
+                line,
+                output.getvalue(),
+                'Sysctl recommendation was repeated'
+            )
+
+    def test_report_dns_failures(self):
+        dns = profile.model.Dns.from_dict(reporting_returns.dns(False))
+        output = profile.StringIO()
+        returns = profile.report_dns(output, dns, None)
+
+        self.assertEquals('FAIL', returns, 'DNS result was not FAIL')
+        for line in [
+            'Lookup registry: 5 names, 5 queries\n',
+            'Nameserver 10.0.0.3: no answers to 10 queries\n',
+            'WARNING: a lookup of registry sends 5 queries, lower ndots or '
+            'use fewer search domains\n',
+            'WARNING: 10.0.0.2 p90 latency of 250.0 ms is over 100.0 ms\n',
+            'WARNING: 10.0.0.2 did not answer 2 of 10 queries\n'
+        ]:
+            self.assertIn(
+                line,
+                output.getvalue(),
+                'DNS problem was not reported'
+            )
+
+    def test_report_overlay(self):
+        overlay = profile.model.Overlay.from_dict(reporting_returns.overlay())
+        output = profile.StringIO()
+        returns = profile.report_overlay(output, overlay, None)
+
+        self.assertEquals('PASS', returns, 'Overlay result was not PASS')
+        self.assertIn(
+            'Copy Up:            p50 0.15 ms, p99 0.23 ms, max 0.49 ms '
+            '(200 files of 64 KB)\n',
+            output.getvalue(),
+            'Copy up latency was not reported'
+        )
+
+    def test_report_overlay_failures(self):
+        overlay = profile.model.Overlay.from_dict(
+            reporting_returns.overlay(False)
+        )
+        output = profile.StringIO()
+        returns = profile.report_overlay(output, overlay, None)
+
+        self.assertEquals('FAIL', returns, 'Overlay result was not FAIL')
+        for line in [
+            'd_type:             Not Supported\n',
+            'WARNING: p99 copy up latency of 38.5 ms is over 10.0 ms\n',
+            'WARNING: only 850 small files were created per second, the '
+            'minimum is 2000\n'
+        ]:
+            self.assertIn(
+                line,
+                output.getvalue(),
+                'Overlay problem was not reported'
+            )
+
+    def test_report_overlay_not_root(self):
+        overlay = profile.model.Overlay.from_dict(
+            {
+                'directory': '/var/lib',
+                'd_type': None,
+                'mounted': None,
+                'error': 'Mounting an overlay needs root',
+                'copy_up': None,
+                'small_files': None
+            }
+        )
+        output = profile.StringIO()
+        returns = profile.report_overlay(output, overlay, None)
+
+        self.assertEquals(
+            profile.model.SKIPPED,
+            returns,
+            'Overlay probe without root was not SKIPPED'
+        )
+
+    def test_report_port_plan_conflicts(self):
+        plan = profile.model.PortPlan.from_dict(
+            reporting_returns.port_plan(False)
+        )
+        output = profile.StringIO()
+        returns = profile.report_port_plan(output, plan, None)
+
+        self.assertEquals('FAIL', returns, 'Port plan result was not FAIL')
+        for line in [
+            'In Use tcp/80: Ingress (listening on [::]:80)\n',
+            'In Use tcp/2379-2380: etcd (listening on 0.0.0.0:2380, '
+            '127.0.0.1:2379)\n',
+            'Ephemeral 32001-32767: Gravity Hub, Kubernetes NodePort range\n',
+            'sysctl -w net.ipv4.ip_local_reserved_ports=30000-32767\n'
+        ]:
+            self.assertIn(
+                line,
+                output.getvalue(),
+                'Port plan problem was not reported'
+            )
+
+    def test_report_nic_drops(self):
+        nic = profile.model.Nic.from_dict(reporting_returns.nic(False))
+        output = profile.StringIO()
+        returns = profile.report_nic(output, nic, None)
+
+        self.assertEquals('FAIL', returns, 'NIC result was not FAIL')
+        for line in [
+            'Since Boot: 52000 rx_dropped\n',
+            'WARNING: eth0 is using 72.4% of its link speed\n',
+            'WARNING: eth0 rx dropped at 14.2/s during the window\n'
+        ]:
+            self.assertIn(
+                line,
+                output.getvalue(),
+                'NIC problem was not reported'
+            )
+
+    def test_report_cpu_steal_warnings(self):
+        steal = profile.model.CpuSteal.from_dict(
+            reporting_returns.cpu_steal(False)
+        )
+        output = profile.StringIO()
+        returns = profile.report_cpu_steal(output, steal, None)
+
+        self.assertEquals('WARN', returns, 'CPU steal result was not WARN')
+        for line in [
+            'Worst Core Steal: cpu0 31.0%\n',
+            'WARNING: steal of 15.5% is over 10.0%\n',
+            'WARNING: 1 CPUs lost over 25.0% to steal\n',
+            'WARNING: cgroup /sys/fs/cgroup/cpu was throttled in 40.0% of '
+            'periods\n'
+        ]:
+            self.assertIn(
+                line,
+                output.getvalue(),
+                'CPU steal warning was not reported'
+            )
+
+    def test_report_pressure_warnings(self):
+        pressure = profile.model.Pressure.from_dict(
+            reporting_returns.pressure(False)
+        )
+        output = profile.StringIO()
+        returns = profile.report_pressure(output, pressure, None)
+
+        self.assertEquals('WARN', returns, 'Pressure result was not WARN')
+        for line in [
+            'WARNING: memory some stall of 12.5% is over 5.0%\n',
+            'WARNING: memory full stall of 3.1% is over 1.0%\n',
+            'WARNING: direct scan of 2048.0 pages/s is over 1000.0\n',
+            'WARNING: processes were OOM killed during the window\n'
+        ]:
+            self.assertIn(
+                line,
+                output.getvalue(),
+                'Pressure warning was not reported'
+            )
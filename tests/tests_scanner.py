@@ -0,0 +1,114 @@
+from __future__ import absolute_import
+from system_profile import scanner
+
+
+import tempfile
+import sys
+import os
+
+
+if sys.version_info[:2] >= (2, 7):
+    from unittest import TestCase
+else:
+    from unittest2 import TestCase
+
+
+CONFIG = (
+    'search first.domain\n'
+    'options timeout:2\n'
+    'search second.domain other.domain\n'
+    'options rotate\n'
+    'nameserver 8.8.8.8\n'
+)
+
+
+class TestScanner(TestCase):
+    def setUp(self):
+        scanner.clear_cache()
+        handle, self.path = tempfile.mkstemp()
+        with os.fdopen(handle, 'w') as f:
+            f.write(CONFIG)
+
+    def tearDown(self):
+        scanner.clear_cache()
+        os.remove(self.path)
+
+    def test_scan_modes(self):
+        config_scanner = scanner.ConfigScanner(
+            [
+                ('search', r'^search\s(.*)$', scanner.FIRST),
+                ('options', r'^options\s(.*)$', scanner.ALL),
+                ('nameserver', r'^nameserver\s(\S+)$', scanner.FIRST),
+                ('domain', r'^domain\s(.*)$', scanner.FIRST),
+                ('all_search', r'^search\s(.*)$', scanner.ALL)
+            ]
+        )
+        expected_output = {
+            'search': 'first.domain',
+            'options': ['timeout:2', 'rotate'],
+            'nameserver': '8.8.8.8',
+            'domain': None,
+            'all_search': []
+        }
+        returns = config_scanner.scan(CONFIG)
+
+        # The first pattern that matches a line takes it
+        self.assertEquals(
+            expected_output,
+            returns,
+            'Returned values did not match expected output'
+        )
+
+    def test_scan_groups(self):
+        config_scanner = scanner.ConfigScanner(
+            [
+                ('pair', r'^(search|options)\s(\S+)', scanner.ALL),
+                ('nameserver', r'^nameserver', scanner.FIRST)
+            ]
+        )
+        expected_output = {
+            'pair': ['search', 'options', 'search', 'options'],
+            'nameserver': 'nameserver'
+        }
+        returns = config_scanner.scan(CONFIG)
+
+        self.assertEquals(
+            expected_output,
+            returns,
+            'Returned values did not match expected output'
+        )
+
+    def test_bad_mode(self):
+        self.assertRaises(
+            ValueError,
+            scanner.ConfigScanner,
+            [('search', r'^search', 'every')]
+        )
+
+    def test_read_cache(self):
+        self.assertEquals(
+            CONFIG,
+            scanner.read_file(self.path),
+            'Returned values did not match expected output'
+        )
+
+        with open(self.path, 'w') as f:
+            f.write('changed\n')
+
+        self.assertEquals(
+            CONFIG,
+            scanner.read_file(self.path),
+            'Cached content was not returned'
+        )
+        self.assertEquals(
+            'changed\n',
+            scanner.read_file(self.path, cache=False),
+            'Uncached read did not return the new content'
+        )
+
+        scanner.clear_cache()
+        self.assertEquals(
+            'changed\n',
+            scanner.read_file(self.path),
+            'Cache was not cleared'
+        )
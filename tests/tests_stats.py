@@ -0,0 +1,20 @@
+from __future__ import absolute_import
+from system_profile import stats
+
+
+import sys
+
+
+if sys.version_info[:2] >= (2, 7):
+    from unittest import TestCase
+else:
+    from unittest2 import TestCase
+
+
+class TestStats(TestCase):
+    def test_percentile(self):
+        values = [float(value) for value in range(1, 11)]
+        self.assertEquals(5.0, stats.percentile(values, 50), 'p50')
+        self.assertEquals(9.0, stats.percentile(values, 90), 'p90')
+        self.assertEquals(10.0, stats.percentile(values, 99), 'p99')
+        self.assertEquals(None, stats.percentile([], 50), 'empty')
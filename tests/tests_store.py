@@ -0,0 +1,212 @@
+
+from __future__ import absolute_import
+from .fixtures import reporting_returns
+from system_profile import store
+
+
+import tempfile
+import shutil
+import sys
+import os
+
+
+if sys.version_info[:2] >= (2, 7):
+    from unittest import TestCase
+else:
+    from unittest2 import TestCase
+
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+
+def system_info(free):
+    mounts = reporting_returns.mounts()
+    mounts['/var'] = {
+        'recommended': 100.0,
+        'free': free,
+        'total': 499.7,
+        'mount_options': 'rw',
+        'file_system': 'xfs',
+        'ftype': '1'
+    }
+    return {
+        'profile': reporting_returns.os_return('rhel'),
+        'mounts': mounts,
+        'agents': reporting_returns.agents(False),
+        'infinity_set': None
+    }
+
+
+class TestStore(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'history.db')
+        self.conn = store.connect(self.path)
+        store.record_runs(
+            self.conn,
+            [
+                ('node1', 1000.0, system_info(250.0), {'mounts': 'PASS'},
+                 'PASS'),
+                ('node1', 2000.0, system_info(90.0), {'mounts': 'WARN'},
+                 'WARN'),
+                ('node2', 1500.0, system_info(120.0), {'mounts': 'PASS'},
+                 'PASS'),
+                ('node3', 2500.0, system_info(40.0), {'mounts': 'WARN'},
+                 'WARN')
+            ]
+        )
+
+    def tearDown(self):
+        self.conn.close()
+        shutil.rmtree(self.directory)
+
+    def test_wal_mode(self):
+        mode = self.conn.execute('PRAGMA journal_mode').fetchone()[0]
+        self.assertEquals('wal', mode, 'Store is not in WAL mode')
+
+    def test_flatten(self):
+        expected_output = [
+            ('/tmp.free', 39.13, None),
+            ('/tmp.ftype', None, '1'),
+            ('running', 1.0, '["puppet-agent"]'),
+            ('set', 1.0, None)
+        ]
+        returns = store.flatten({
+            '/tmp': {'free': 39.13, 'ftype': '1'},
+            'running': ['puppet-agent'],
+            'set': True,
+            'missing': None
+        })
+        self.assertEquals(
+            expected_output,
+            returns,
+            'Returned values did not match expected output'
+        )
+
+    def test_normalized_rows(self):
+        rows = self.conn.execute(
+            'SELECT value FROM metrics WHERE host = ? AND check_name = ? '
+            'AND metric = ? ORDER BY timestamp',
+            ('node1', 'mounts', '/var.free')
+        ).fetchall()
+        self.assertEquals(
+            [(250.0,), (90.0,)],
+            rows,
+            'Did not find one row per run for the metric'
+        )
+
+    def test_indexes_used(self):
+        plan = self.conn.execute(
+            'EXPLAIN QUERY PLAN SELECT host, MIN(value) FROM metrics '
+            'WHERE check_name = ? AND metric = ? AND timestamp >= ? '
+            'GROUP BY host',
+            ('mounts', '/var.free', 0)
+        ).fetchall()
+        self.assertTrue(
+            'metrics_check' in ' '.join(str(row) for row in plan),
+            'Query did not use the check index'
+        )
+
+    def test_trend(self):
+        expected_output = [
+            ('node1', 1000.0, 250.0, None),
+            ('node1', 2000.0, 90.0, None)
+        ]
+        returns = store.trend(self.conn, 'mounts', '/var.free', 'node1')
+        self.assertEquals(
+            expected_output,
+            returns,
+            'Returned values did not match expected output'
+        )
+
+    def test_worst(self):
+        expected_output = [
+            ('node3', 40.0, 2500.0),
+            ('node1', 90.0, 2000.0)
+        ]
+        returns = store.worst(self.conn, 'mounts', '/var.free', limit=2)
+        self.assertEquals(
+            expected_output,
+            returns,
+            'Returned values did not match expected output'
+        )
+
+    def test_worst_below_since(self):
+        expected_output = [('node3', 40.0, 2500.0)]
+        returns = store.worst(
+            self.conn,
+            'mounts',
+            '/var.free',
+            since=store.parse_since('1000s', now=3200.0),
+            below=100.0
+        )
+        self.assertEquals(
+            expected_output,
+            returns,
+            'Returned values did not match expected output'
+        )
+
+    def test_verdicts(self):
+        returns = store.trend(self.conn, 'overall', 'verdict', 'node3')
+        self.assertEquals(
+            [('node3', 2500.0, None, 'WARN')],
+            returns,
+            'Overall verdict was not stored'
+        )
+
+    def test_get_run(self):
+        run_id = store.latest_run(self.conn, 'node1')
+        host, timestamp, overall, result = store.get_run(self.conn, run_id)
+        self.assertEquals(system_info(90.0), result, 'Results did not match')
+        self.assertEquals('WARN', overall, 'Overall result did not match')
+
+    def test_cluster_summary(self):
+        store.record_runs(
+            self.conn,
+            [('node2', 3000.0, system_info(10.0), {'mounts': 'FAIL'}, 'FAIL')]
+        )
+        expected_output = {
+            'hosts': 3,
+            'overall': {'WARN': 2, 'FAIL': 1},
+            'checks': {'mounts': {'WARN': 2, 'FAIL': 1}},
+            'failing': {'mounts': ['node2']}
+        }
+        returns = store.cluster_summary(self.conn)
+        self.assertEquals(
+            expected_output,
+            returns,
+            'Summary did not use the latest run of each host'
+        )
+        self.assertEquals(
+            2,
+            store.cluster_summary(self.conn, since=2100.0)['hosts'],
+            'Hosts without a recent run were counted'
+        )
+
+    def test_parse_since(self):
+        self.assertEquals(
+            1000.0 - 7 * 86400,
+            store.parse_since('7d', now=1000.0),
+            'Days were not parsed'
+        )
+        self.assertEquals(
+            1234.5,
+            store.parse_since('1234.5'),
+            'Epoch timestamp was not parsed'
+        )
+
+    def test_query_main(self):
+        with mock.patch('system_profile.store.print', create=True) as out:
+            store.query_main(
+                ['--store', self.path, 'worst', 'mounts', '/var.free', '-n',
+                 '1']
+            )
+
+        self.assertEquals(1, out.call_count, 'Expected a single host')
+        self.assertTrue(
+            out.call_args[0][0].startswith('node3  40.0'),
+            'Worst host was not printed'
+        )
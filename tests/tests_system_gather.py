@@ -148,13 +148,7 @@ class TestSystemProfile(TestCase):
             'dist_name': 'CentOS Linux',
             'based_on': 'rhel'
         }
-        with mock.patch(
-            'system_profile.profile.distro.distro_release_info'
-        ) as os:
-            os.return_value = command_returns.distro_release_info('centos')
-            with mock.patch('system_profile.profile.os.path.isfile') as file:
-                file.return_value = True
-                os_info = profile.get_os_info(True)
+        os_info = profile.get_os_info(True, 'tests/fixtures/releases/centos')
 
         self.assertEquals(
             expected_output,
@@ -169,23 +163,7 @@ class TestSystemProfile(TestCase):
             'dist_name': 'SLES',
             'based_on': 'suse'
         }
-        mock_response = mock.Mock()
-        mock_response.side_effect = [False, False, True]
-        with mock.patch(
-            'system_profile.profile.distro.distro_release_info'
-        ) as os:
-            os.return_value = {}
-            with mock.patch(
-                'system_profile.profile.distro.os_release_info'
-            ) as distro:
-                distro.return_value = (
-                    command_returns.distro_release_info('suse')
-                )
-                with mock.patch(
-                    'system_profile.profile.os.path.isfile',
-                    side_effect=mock_response
-                ):
-                    os_info = profile.get_os_info(True)
+        os_info = profile.get_os_info(True, 'tests/fixtures/releases/sles')
 
         self.assertEquals(
             expected_output,
@@ -195,22 +173,27 @@ class TestSystemProfile(TestCase):
 
     def test_os_info_debian(self):
         expected_output = {
-            'distribution': 'ec2',
+            'distribution': 'ubuntu',
             'version': '16.04',
             'dist_name': 'Ubuntu',
             'based_on': 'debian'
         }
-        mock_response = mock.Mock()
-        mock_response.side_effect = [False, True]
-        with mock.patch(
-            'system_profile.profile.distro.distro_release_info'
-        ) as os:
-            os.return_value = command_returns.distro_release_info('ubuntu')
-            with mock.patch(
-                'system_profile.profile.os.path.isfile',
-                side_effect=mock_response
-            ):
-                os_info = profile.get_os_info(True)
+        os_info = profile.get_os_info(True, 'tests/fixtures/releases/ubuntu')
+
+        self.assertEquals(
+            expected_output,
+            os_info,
+            'OS information returned was not the expected value'
+        )
+
+    def test_os_info_derivative(self):
+        expected_output = {
+            'distribution': 'rocky',
+            'version': '8.9',
+            'dist_name': 'Rocky Linux',
+            'based_on': 'rhel'
+        }
+        os_info = profile.get_os_info(True, 'tests/fixtures/releases/rocky')
 
         self.assertEquals(
             expected_output,
@@ -218,6 +201,21 @@ class TestSystemProfile(TestCase):
             'OS information returned was not the expected value'
         )
 
+    def test_os_info_root(self):
+        expected_output = {
+            'distribution': 'centos',
+            'version': '7.9',
+            'dist_name': 'CentOS Linux',
+            'based_on': 'rhel'
+        }
+        os_info = profile.get_os_info(False, 'tests/fixtures/rootfs')
+
+        self.assertEquals(
+            expected_output,
+            os_info,
+            'OS information was not read from the root'
+        )
+
     # Memory and CPU
     def test_cpu_memory_gets(self):
         expected_value = {
@@ -247,6 +245,25 @@ class TestSystemProfile(TestCase):
             'Returned results do not match expected results'
         )
 
+    def test_cpu_memory_captured_proc(self):
+        expected_value = {
+            'memory': {
+                'minimum': 16.0,
+                'actual': 31.26
+            },
+            'cpu_cores': {
+                'minimum': 8,
+                'actual': 4
+            }
+        }
+        results = profile.system_requirements(False, 'tests/fixtures/procfs')
+
+        self.assertEquals(
+            expected_value,
+            results,
+            'Returned results do not match expected results'
+        )
+
     # Disk space
     def test_disk_space(self):
         expected_output = {
@@ -256,43 +273,63 @@ class TestSystemProfile(TestCase):
                 'total': 199.7,
                 'mount_options': 'rw,inode64,noquota',
                 'file_system': 'xfs',
-                'ftype': '1'
+                'ftype': '1',
+                'inodes_total': 13087744,
+                'inodes_free': 13000000,
+                'bytes_per_inode': 16383,
+                'files_per_gb': 65612,
+                'recommended_inodes': 0
             },
             '/tmp': {
                 'recommended': 30.0,
                 'free': 198.13,
                 'total': 199.7,
                 'mount_options': 'rw,inode64,noquota',
-                'file_system': 'ext4'
+                'file_system': 'ext4',
+                'inodes_total': 13087744,
+                'inodes_free': 13000000,
+                'bytes_per_inode': 16383,
+                'files_per_gb': 65612,
+                'recommended_inodes': 983040
             },
             '/opt/anaconda': {
                 'recommended': 100.0,
                 'free': 198.13,
                 'total': 199.7,
                 'mount_options': 'rw,inode64,noquota',
-                'file_system': 'ext4'
+                'file_system': 'ext4',
+                'inodes_total': 13087744,
+                'inodes_free': 13000000,
+                'bytes_per_inode': 16383,
+                'files_per_gb': 65612,
+                'recommended_inodes': 3276800
             },
             '/var': {
                 'recommended': 100.0,
                 'free': 198.13,
                 'total': 199.7,
                 'mount_options': 'rw,inode64,noquota',
-                'file_system': 'ext4'
+                'file_system': 'ext4',
+                'inodes_total': 13087744,
+                'inodes_free': 13000000,
+                'bytes_per_inode': 16383,
+                'files_per_gb': 65612,
+                'recommended_inodes': 3276800
             }
         }
         mock_response = mock.Mock()
         mock_response.side_effect = [
-            command_returns.psutil_disk_usage(),
-            command_returns.psutil_disk_usage(),
-            command_returns.psutil_disk_usage(),
-            command_returns.psutil_disk_usage(),
+            command_returns.statvfs(),
+            command_returns.statvfs(),
+            command_returns.statvfs(),
+            command_returns.statvfs(),
         ]
         with mock.patch(
             'system_profile.profile.psutil.disk_partitions'
         ) as part:
             part.return_value = command_returns.psutil_disk_partitions()
             with mock.patch(
-                'system_profile.profile.psutil.disk_usage',
+                'system_profile.profile.os.statvfs',
                 side_effect=mock_response
             ):
                 with mock.patch(
@@ -315,43 +352,63 @@ class TestSystemProfile(TestCase):
                 'total': 199.7,
                 'mount_options': 'rw,inode64,noquota',
                 'file_system': 'xfs',
-                'ftype': 'UNK'
+                'ftype': 'UNK',
+                'inodes_total': 13087744,
+                'inodes_free': 13000000,
+                'bytes_per_inode': 16383,
+                'files_per_gb': 65612,
+                'recommended_inodes': 0
             },
             '/tmp': {
                 'recommended': 30.0,
                 'free': 198.13,
                 'total': 199.7,
                 'mount_options': 'rw,inode64,noquota',
-                'file_system': 'ext4'
+                'file_system': 'ext4',
+                'inodes_total': 13087744,
+                'inodes_free': 13000000,
+                'bytes_per_inode': 16383,
+                'files_per_gb': 65612,
+                'recommended_inodes': 983040
             },
             '/opt/anaconda': {
                 'recommended': 100.0,
                 'free': 198.13,
                 'total': 199.7,
                 'mount_options': 'rw,inode64,noquota',
-                'file_system': 'ext4'
+                'file_system': 'ext4',
+                'inodes_total': 13087744,
+                'inodes_free': 13000000,
+                'bytes_per_inode': 16383,
+                'files_per_gb': 65612,
+                'recommended_inodes': 3276800
             },
             '/var': {
                 'recommended': 100.0,
                 'free': 198.13,
                 'total': 199.7,
                 'mount_options': 'rw,inode64,noquota',
-                'file_system': 'ext4'
+                'file_system': 'ext4',
+                'inodes_total': 13087744,
+                'inodes_free': 13000000,
+                'bytes_per_inode': 16383,
+                'files_per_gb': 65612,
+                'recommended_inodes': 3276800
             }
         }
         mock_response = mock.Mock()
         mock_response.side_effect = [
-            command_returns.psutil_disk_usage(),
-            command_returns.psutil_disk_usage(),
-            command_returns.psutil_disk_usage(),
-            command_returns.psutil_disk_usage(),
+            command_returns.statvfs(),
+            command_returns.statvfs(),
+            command_returns.statvfs(),
+            command_returns.statvfs(),
         ]
         with mock.patch(
             'system_profile.profile.psutil.disk_partitions'
         ) as part:
             part.return_value = command_returns.psutil_disk_partitions()
             with mock.patch(
-                'system_profile.profile.psutil.disk_usage',
+                'system_profile.profile.os.statvfs',
                 side_effect=mock_response
             ):
                 with mock.patch(
@@ -397,6 +454,24 @@ class TestSystemProfile(TestCase):
             'Returned values was not expected value'
         )
 
+    def test_modules_captured_proc(self):
+        expected_output = {
+            'missing': ['iptable_filter', 'iptable_nat', 'ebtables'],
+            'enabled': ['br_netfilter', 'overlay']
+        }
+        returns = profile.check_modules(
+            'centos',
+            '7.5',
+            False,
+            'tests/fixtures/procfs'
+        )
+
+        self.assertEquals(
+            expected_output,
+            returns,
+            'Modules were not read from the captured /proc'
+        )
+
     # System Compatability
     def test_system_compatability_fail(self):
         expected_output = {
@@ -438,6 +513,25 @@ class TestSystemProfile(TestCase):
             'Returned values did not match expected output'
         )
 
+    def test_selinux_offline(self):
+        expected_output = {
+            'getenforce': 'permissive',
+            'config': 'permissive'
+        }
+        with mock.patch('system_profile.profile.execute_command') as cmd:
+            returns = profile.selinux(
+                'tests/fixtures/rootfs/etc/selinux/config',
+                True,
+                False
+            )
+
+        self.assertEquals(
+            expected_output,
+            returns,
+            'Returned values did not match expected output'
+        )
+        self.assertFalse(cmd.called, 'getenforce was run for an offline root')
+
     # Agents
     def test_agents(self):
         expected_output = {
@@ -468,7 +562,9 @@ class TestSystemProfile(TestCase):
     def test_resolv_conf(self):
         expected_output = {
             'search_domains': ['test.domain', 'another.domain'],
-            'options': ['timeout:2']
+            'options': ['timeout:2'],
+            'nameservers': ['8.8.8.8'],
+            'resolver': {'ndots': 1, 'timeout': 2, 'attempts': 2}
         }
         returns = profile.inspect_resolv_conf(
             'tests/fixtures/resolv_conf',
@@ -481,6 +577,33 @@ class TestSystemProfile(TestCase):
             'Returned values did not match expected output'
         )
 
+    def test_resolv_conf_no_search(self):
+        expected_output = {
+            'search_domains': [],
+            'options': ['timeout:2', 'attempts:3'],
+            'nameservers': ['8.8.8.8'],
+            'resolver': {'ndots': 1, 'timeout': 2, 'attempts': 3}
+        }
+        returns = profile.inspect_resolv_conf(
+            'tests/fixtures/resolv_conf_no_search',
+            False
+        )
+
+        self.assertEquals(
+            expected_output,
+            returns,
+            'Returned values did not match expected output'
+        )
+
+    def test_resolver_options(self):
+        self.assertEquals(
+            {'ndots': 15, 'timeout': 1, 'attempts': 5},
+            profile.resolver_options(
+                ['ndots:5 timeout:1', 'rotate attempts:9 ndots:20']
+            ),
+            'Resolver options were not capped or the last did not win'
+        )
+
     # Open ports
     def test_open_ports_all(self):
         expected_output = {
@@ -579,18 +702,607 @@ class TestSystemProfile(TestCase):
                 'fs.may_detach_mounts'
             ]
         }
-        mock_response = mock.Mock()
-        mock_response.side_effect = [
-            b'net.bridge.bridge-nf-call-ip6tables = 0',
-            b'net.bridge.bridge-nf-call-iptables = 0',
-            b'',
-            b'net.ipv4.ip_forward = 1'
+        returns = profile.check_sysctl(
+            True,
+            sysctl_dir='tests/fixtures/proc_sys'
+        )
+        tuning = returns.pop('tuning')
+
+        self.assertEquals(
+            expected_output,
+            returns,
+            'Returned values did not match expected output'
+        )
+        self.assertEquals(
+            {
+                'subsystem': 'filesystem',
+                'rule': 'minimum',
+                'minimum': 524288,
+                'maximum': None,
+                'actual': 8192,
+                'result': 'WARN'
+            },
+            tuning['fs.inotify.max_user_watches'],
+            'Returned values did not match expected output'
+        )
+        self.assertEquals(
+            'SKIPPED',
+            tuning['net.netfilter.nf_conntrack_max']['result'],
+            'Missing setting was not skipped'
+        )
+        self.assertEquals(
+            ['PASS', 'PASS', 'WARN'],
+            [
+                tuning['vm.overcommit_memory']['result'],
+                tuning['vm.panic_on_oom']['result'],
+                tuning['vm.swappiness']['result']
+            ],
+            'Range, exact and maximum rules did not match'
+        )
+
+    def test_sysctl_scaled(self):
+        returns = profile.check_sysctl(
+            False,
+            memory=251.88,
+            cores=64,
+            sysctl_dir='tests/fixtures/proc_sys'
+        )['tuning']
+
+        self.assertEquals(
+            [2063400, 1031700, 131072, 8192, 2097152],
+            [
+                returns['fs.file-max']['minimum'],
+                returns['fs.inotify.max_user_watches']['minimum'],
+                returns['kernel.pid_max']['minimum'],
+                returns['net.core.somaxconn']['minimum'],
+                returns['net.netfilter.nf_conntrack_max']['minimum']
+            ],
+            'Recommended values were not scaled by memory and cores'
+        )
+        self.assertEquals(
+            'WARN',
+            returns['net.core.somaxconn']['result'],
+            'Scaled minimum was not applied'
+        )
+
+    # Pressure
+    def test_pressure_delta(self):
+        expected_output = {
+            'window': 2,
+            'stall': {
+                'cpu': {'some': 5.0, 'full': 0.0},
+                'memory': {'some': 10.0, 'full': 2.5}
+            },
+            'reclaim': {
+                'kswapd_scan': 2000.0,
+                'direct_scan': 2000.0,
+                'allocstall': 0.0,
+                'swap_in': 50.0,
+                'swap_out': 50.0,
+                'major_faults': 0.0
+            },
+            'oom_kills': {'window': 1, 'since_boot': 3}
+        }
+        samples = []
+        for cpu, memory, vmstat in [
+            (
+                command_returns.pressure(1000000, 0),
+                command_returns.pressure(2000000, 500000),
+                command_returns.vmstat(1000, 100, 2)
+            ),
+            (
+                command_returns.pressure(1100000, 0),
+                command_returns.pressure(2200000, 550000),
+                command_returns.vmstat(5000, 200, 3)
+            )
+        ]:
+            # No PSI for io, i.e. on an older kernel
+            samples.append(
+                {
+                    '/proc/pressure/cpu': cpu,
+                    '/proc/pressure/memory': memory,
+                    '/proc/pressure/io': None,
+                    '/proc/vmstat': vmstat
+                }
+            )
+
+        with mock.patch('system_profile.profile.time') as mock_time:
+            mock_time.time.side_effect = [10.0, 12.0]
+            with mock.patch(
+                'system_profile.profile.scanner.read_values',
+                side_effect=samples
+            ):
+                start = profile.pressure_snapshot()
+                end = profile.pressure_snapshot()
+
+        returns = profile.pressure_delta(2, start, end)
+
+        self.assertEquals(
+            expected_output,
+            returns,
+            'Returned values did not match expected output'
+        )
+
+    def test_cpu_steal_delta(self):
+        cpu_stat = '/sys/fs/cgroup/cpu/cpu.stat'
+        expected_output = {
+            'window': 2,
+            'cpus': 3,
+            'aggregate': {
+                'steal': 22.22,
+                'iowait': 11.11,
+                'irq': 0.0,
+                'softirq': 0.0
+            },
+            'cores': {
+                'steal': [22.22, None, 0.0],
+                'iowait': [11.11, None, 0.0],
+                'irq': [0.0, None, 0.0],
+                'softirq': [0.0, None, 0.0]
+            },
+            'throttling': {
+                'cgroup': '/sys/fs/cgroup/cpu',
+                'periods': 20,
+                'throttled': 5,
+                'throttled_percent': 25.0,
+                'throttled_seconds': 0.25
+            }
+        }
+        samples = [
+            {
+                '/proc/stat': command_returns.proc_stat(0, 0),
+                cpu_stat: command_returns.cpu_stat(100, 10, 500000)
+            },
+            {
+                '/proc/stat': command_returns.proc_stat(200, 100),
+                cpu_stat: command_returns.cpu_stat(120, 15, 750000)
+            }
+        ]
+        with mock.patch('system_profile.profile.time'):
+            with mock.patch(
+                'system_profile.profile.cgroup_cpu_stat',
+                return_value=cpu_stat
+            ):
+                with mock.patch(
+                    'system_profile.profile.scanner.read_values',
+                    side_effect=samples
+                ):
+                    start = profile.cpu_steal_snapshot()
+                    end = profile.cpu_steal_snapshot()
+
+        returns = profile.cpu_steal_delta(2, start, end)
+
+        self.assertEquals(
+            expected_output,
+            returns,
+            'Returned values did not match expected output'
+        )
+
+    def test_nic_delta(self):
+        no_errors = {
+            'rx_errors': 0.0,
+            'rx_dropped': 0.0,
+            'rx_fifo': 0.0,
+            'rx_frame': 0.0,
+            'tx_errors': 0.0,
+            'tx_dropped': 0.0,
+            'tx_fifo': 0.0,
+            'tx_carrier': 0.0
+        }
+        eth0_rates = dict(no_errors, rx_dropped=2.5)
+        expected_output = {
+            'window': 2,
+            'interfaces': {
+                'eth0': {
+                    'speed_mbps': 1000,
+                    'rx_mbps': 400.0,
+                    'tx_mbps': 40.0,
+                    'utilization': 40.0,
+                    'rates': eth0_rates,
+                    'since_boot': dict(
+                        dict((name, 0) for name in no_errors),
+                        rx_dropped=6
+                    )
+                },
+                'eth1': {
+                    'speed_mbps': None,
+                    'rx_mbps': 0.0,
+                    'tx_mbps': 0.0,
+                    'utilization': None,
+                    'rates': no_errors,
+                    'since_boot': dict(
+                        (name, 0) for name in no_errors
+                    )
+                }
+            }
+        }
+        speeds = {
+            '/sys/class/net/eth0/speed': '1000',
+            '/sys/class/net/eth1/speed': '-1'
+        }
+        samples = [
+            {'/proc/net/dev': command_returns.net_dev(0, 0, 1)},
+            speeds,
+            {
+                '/proc/net/dev': command_returns.net_dev(
+                    100000000,
+                    10000000,
+                    6
+                )
+            },
+            speeds
+        ]
+        with mock.patch('system_profile.profile.time') as mock_time:
+            mock_time.time.side_effect = [10.0, 12.0]
+            with mock.patch(
+                'system_profile.profile.scanner.read_values',
+                side_effect=samples
+            ):
+                start = profile.nic_snapshot()
+                end = profile.nic_snapshot()
+
+        returns = profile.nic_delta(2, start, end)
+        self.assertEquals(
+            expected_output,
+            returns,
+            'Returned values did not match expected output'
+        )
+
+    def test_sample_counters(self):
+        expected_output = {
+            'pressure': {'window': 2, 'stall': {}},
+            'cpu_steal': {'window': 2, 'cpus': 1},
+            'nic': {'window': 2, 'interfaces': {}}
+        }
+        samplers = []
+        for name in ['pressure', 'cpu_steal', 'nic']:
+            samplers.append(
+                mock.patch(
+                    'system_profile.profile.{0}_snapshot'.format(name),
+                    return_value={}
+                )
+            )
+            samplers.append(
+                mock.patch(
+                    'system_profile.profile.{0}_delta'.format(name),
+                    return_value=expected_output[name]
+                )
+            )
+
+        for sampler in samplers:
+            sampler.start()
+
+        try:
+            with mock.patch('system_profile.profile.time') as mock_time:
+                returns = profile.sample_counters(2, True)
+        finally:
+            for sampler in samplers:
+                sampler.stop()
+
+        self.assertEquals(
+            expected_output,
+            returns,
+            'Returned values did not match expected output'
+        )
+        mock_time.sleep.assert_called_once_with(2)
+
+    # Capacity
+    def test_capacity(self):
+        limits_d = 'tests/fixtures/etc/security/limits.d/90-ae.conf'
+        expected_output = {
+            'file_handles': {
+                'used': 9216,
+                'limit': 131072,
+                'headroom': 92.97,
+                'recommended': 1048576
+            },
+            'processes': {
+                'used': 3,
+                'limit': 32768,
+                'headroom': 99.99,
+                'recommended': 65536
+            },
+            'threads': {
+                'used': 950,
+                'limit': 1000,
+                'headroom': 5.0,
+                'recommended': 65536
+            },
+            'systemd_nofile': {'soft': 2048, 'hard': 8192},
+            'limits': [
+                {
+                    'domain': '*',
+                    'type': 'soft',
+                    'item': 'nofile',
+                    'value': 1024,
+                    'file': 'tests/fixtures/etc/security/limits.conf'
+                },
+                {
+                    'domain': '*',
+                    'type': 'soft',
+                    'item': 'nproc',
+                    'value': 4096,
+                    'file': limits_d
+                },
+                {
+                    'domain': 'root',
+                    'type': 'soft',
+                    'item': 'nproc',
+                    'value': None,
+                    'file': limits_d
+                },
+                {
+                    'domain': '@ae',
+                    'type': 'hard',
+                    'item': 'nofile',
+                    'value': 8192,
+                    'file': limits_d
+                }
+            ],
+            'recommended': {'nofile': 65536, 'nproc': 32768}
+        }
+        returns = profile.capacity_check(
+            True,
+            16.0,
+            8,
+            'tests/fixtures/procfs',
+            'tests/fixtures/etc'
+        )
+
+        self.assertEquals(
+            expected_output,
+            returns,
+            'Returned values did not match expected output'
+        )
+
+    def test_capacity_unknown_limits(self):
+        returns = profile.capacity_check(
+            False,
+            16.0,
+            8,
+            'tests/fixtures/procfs',
+            'tests/fixtures/etc_reset'
+        )
+
+        self.assertFalse(
+            'systemd_nofile' in returns,
+            'Reset DefaultLimitNOFILE was kept'
+        )
+        self.assertEquals(
+            [
+                {
+                    'domain': '*',
+                    'type': 'soft',
+                    'item': 'nproc',
+                    'value': 2048,
+                    'file': 'tests/fixtures/etc_reset/security/limits.conf'
+                }
+            ],
+            returns['limits'],
+            'Limit that is not a number was not left out'
+        )
+
+    # Conntrack
+    def test_conntrack(self):
+        expected_output = {
+            'count': 120000,
+            'max': 131072,
+            'utilization': 91.55,
+            'buckets': 16384,
+            'recommended_max': 262144,
+            'recommended_buckets': 65536,
+            'stats': {'drop': 16, 'early_drop': 0, 'insert_failed': 3}
+        }
+        returns = profile.conntrack_check(
+            True,
+            16.0,
+            8,
+            'tests/fixtures/procfs'
+        )
+
+        self.assertEquals(
+            expected_output,
+            returns,
+            'Returned values did not match expected output'
+        )
+
+    # Port plan
+    def test_port_plan(self):
+        plan = [
+            ('tcp', '53', 'Cluster DNS'),
+            ('udp', '53', 'Cluster DNS'),
+            ('tcp', '2379-2380', 'etcd'),
+            ('tcp', '6443', 'Kubernetes API server'),
+            ('tcp', '30000-32767', 'Kubernetes NodePort range'),
+            ('udp', '8472', 'VXLAN overlay network')
+        ]
+        # systemd-resolved on 127.0.0.53:53 is not a conflict
+        expected_output = {
+            'planned': {'tcp': 2772, 'udp': 2},
+            'ephemeral': '20000-60999',
+            'reserved': '30000-32000',
+            'conflicts': {
+                'tcp/2379-2380': {
+                    'services': ['etcd'],
+                    'listeners': ['0.0.0.0:2380', '127.0.0.1:2379']
+                },
+                'tcp/6443': {
+                    'services': ['Kubernetes API server'],
+                    'listeners': ['0.0.0.0:6443']
+                },
+                'udp/8472': {
+                    'services': ['VXLAN overlay network'],
+                    'listeners': ['0.0.0.0:8472']
+                }
+            },
+            'ephemeral_overlap': {
+                '32001-32767': {
+                    'services': ['Kubernetes NodePort range'],
+                    'listeners': []
+                }
+            },
+            'recommended_reserved': '30000-32767'
+        }
+        returns = profile.port_plan(True, 'tests/fixtures/procfs', plan)
+
+        self.assertEquals(
+            expected_output,
+            returns,
+            'Returned values did not match expected output'
+        )
+
+    def test_port_plan_no_sockets(self):
+        returns = profile.port_plan(False, 'tests/fixtures/no_procfs')
+
+        self.assertEquals(
+            None,
+            returns,
+            'Returned values did not match expected output'
+        )
+
+    def test_conntrack_not_loaded(self):
+        returns = profile.conntrack_check(
+            False,
+            proc_dir='tests/fixtures/no_procfs'
+        )
+
+        self.assertEquals(
+            None,
+            returns,
+            'Returned values did not match expected output'
+        )
+
+    # Performance mode
+    def test_performance_mode(self):
+        expected_output = {
+            'transparent_hugepage': {'enabled': 'always', 'defrag': 'madvise'},
+            'hugepages': {
+                '1048576kB': {'total': 0, 'free': 0},
+                '2048kB': {'total': 512, 'free': 512}
+            },
+            'fragmentation': {
+                'free_pages': 34265,
+                'high_order_percent': 10.46
+            },
+            'governors': {'powersave': 2, 'performance': 2},
+            'pstate': {
+                'driver': 'intel_pstate',
+                'status': 'active',
+                'no_turbo': 1
+            }
+        }
+        returns = profile.performance_mode(
+            True,
+            'tests/fixtures/sysfs',
+            'tests/fixtures/procfs'
+        )
+
+        self.assertEquals(
+            expected_output,
+            returns,
+            'Returned values did not match expected output'
+        )
+
+    def test_performance_deviations(self):
+        performance = profile.model.PerformanceMode.from_dict(
+            profile.performance_mode(
+                False,
+                'tests/fixtures/sysfs',
+                'tests/fixtures/procfs'
+            )
+        )
+        expected_output = [
+            'Transparent hugepage enabled is always, recommended madvise '
+            'or never',
+            '512 2048kB hugepages are reserved and none are in use',
+            '2 of 4 CPUs use the powersave governor, recommended performance',
+            'Turbo is disabled in intel_pstate'
         ]
+        returns = profile.performance_deviations(performance)
+
+        self.assertEquals(
+            expected_output,
+            returns,
+            'Returned values did not match expected output'
+        )
+
+    def test_buddy_fragmentation(self):
+        expected_output = {'free_pages': 2048, 'high_order_percent': 50.0}
+        returns = profile.buddy_fragmentation(
+            'Node 0, zone   Normal   1024   0   0   0   0   0   0   0   0   '
+            '2   0\n'
+        )
+
+        self.assertEquals(
+            expected_output,
+            returns,
+            'Returned values did not match expected output'
+        )
+
+    # Memory performance
+    def test_llc_size(self):
+        expected_output = 30720 * 1024
+        returns = profile.get_llc_size('tests/fixtures/cpu_cache')
+        self.assertEquals(
+            expected_output,
+            returns,
+            'Returned values did not match expected output'
+        )
+
+    def test_llc_size_missing(self):
+        expected_output = 32 * 1024**2
+        returns = profile.get_llc_size('tests/fixtures/no_cpu_cache')
+        self.assertEquals(
+            expected_output,
+            returns,
+            'Returned values did not match expected output'
+        )
+
+    def test_copy_bandwidth_buffer(self):
+        with mock.patch.dict('sys.modules', {'numpy': None}):
+            returns = profile.measure_copy_bandwidth(1024**2, 2)
+
+        self.assertTrue(
+            returns > 0,
+            'Did not get a positive bandwidth value'
+        )
+
+    def test_memory_latency(self):
+        returns = profile.measure_memory_latency(1024**2, 1000)
+        self.assertTrue(
+            returns >= 0,
+            'Did not get a valid latency value'
+        )
+
+    def test_memory_performance(self):
+        expected_output = {
+            'buffer_size': 64.0,
+            'copy_bandwidth': {'minimum': 4.0, 'actual': 9.5},
+            'all_core_bandwidth': {
+                'minimum': 16.0,
+                'actual': 19.0,
+                'workers': 2
+            },
+            'latency': {'maximum': 150.0, 'actual': 90.0}
+        }
         with mock.patch(
-            'system_profile.profile.execute_command',
-            side_effect=mock_response
-        ):
-            returns = profile.check_sysctl(True)
+            'system_profile.profile.multiprocessing'
+        ) as multi:
+            multi.cpu_count.return_value = 2
+            multi.Pool.return_value.map.return_value = [9.5, 9.5]
+            with mock.patch(
+                'system_profile.profile.measure_copy_bandwidth'
+            ) as copy:
+                copy.return_value = 9.5
+                with mock.patch(
+                    'system_profile.profile.measure_memory_latency'
+                ) as latency:
+                    latency.return_value = 90.0
+                    returns = profile.memory_performance(
+                        64 * 1024**2,
+                        profile.MEMORY_PERFORMANCE,
+                        True
+                    )
 
         self.assertEquals(
             expected_output,
@@ -0,0 +1,118 @@
+from __future__ import absolute_import
+from system_profile import upload
+
+
+import gzip
+import json
+import sys
+import io
+
+
+if sys.version_info[:2] >= (2, 7):
+    from unittest import TestCase
+else:
+    from unittest2 import TestCase
+
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+
+PAYLOAD = {
+    'host': 'node1',
+    'timestamp': 1000.0,
+    'results': {},
+    'verdicts': {},
+    'overall': 'PASS'
+}
+
+
+class Response(object):
+    def read(self):
+        return b'{"run_id": 7}'
+
+    def close(self):
+        pass
+
+
+class TestUpload(TestCase):
+    def test_compress(self):
+        body = upload.compress(PAYLOAD)
+        with gzip.GzipFile(fileobj=io.BytesIO(body)) as f:
+            self.assertEquals(
+                PAYLOAD,
+                json.loads(f.read().decode('utf-8')),
+                'Payload did not survive compression'
+            )
+
+    def test_backoff_delay(self):
+        with mock.patch('system_profile.upload.random.uniform') as uniform:
+            upload.backoff_delay(3, 0.5)
+            upload.backoff_delay(20, 0.5)
+
+        self.assertEquals(
+            [mock.call(0, 4.0), mock.call(0, upload.MAX_BACKOFF)],
+            uniform.call_args_list,
+            'Backoff did not grow exponentially up to the maximum'
+        )
+
+    def test_retries_then_succeeds(self):
+        with mock.patch(
+            'system_profile.upload.urlopen',
+            side_effect=[
+                upload.URLError('connection refused'),
+                upload.HTTPError('http://c/results', 503, 'busy', {}, None),
+                Response()
+            ]
+        ) as urlopen:
+            with mock.patch('system_profile.upload.time.sleep') as sleep:
+                returns = upload.upload_results(
+                    'http://c/results',
+                    PAYLOAD,
+                    False
+                )
+
+        self.assertEquals({'run_id': 7}, returns, 'Response was not decoded')
+        self.assertEquals(3, urlopen.call_count, 'Upload was not retried')
+        self.assertEquals(2, sleep.call_count, 'Retries did not back off')
+        request = urlopen.call_args[0][0]
+        self.assertEquals(
+            'gzip',
+            request.get_header('Content-encoding'),
+            'Results were not sent compressed'
+        )
+
+    def test_gives_up(self):
+        with mock.patch(
+            'system_profile.upload.urlopen',
+            side_effect=upload.URLError('connection refused')
+        ) as urlopen:
+            with mock.patch('system_profile.upload.time.sleep'):
+                with self.assertRaises(upload.UploadError):
+                    upload.upload_results(
+                        'http://c/results',
+                        PAYLOAD,
+                        True,
+                        retries=2
+                    )
+
+        self.assertEquals(3, urlopen.call_count, 'Retries were not limited')
+
+    def test_refused_is_not_retried(self):
+        error = upload.HTTPError(
+            'http://c/results',
+            400,
+            'Bad Request',
+            {},
+            io.BytesIO(b'{"error": "Missing host"}')
+        )
+        with mock.patch(
+            'system_profile.upload.urlopen',
+            side_effect=error
+        ) as urlopen:
+            with self.assertRaises(upload.UploadError):
+                upload.upload_results('http://c/results', PAYLOAD, False)
+
+        self.assertEquals(1, urlopen.call_count, 'Refused upload was retried')